@@ -16,11 +16,54 @@
 #                                     (area), inside contour, outside contour]
 #     narrowband: the number of pixels over which to evaluate energies [3]
 #     plot_progress: flag for whether to plot progress each iteration
+#     reinit: method used to reset phi to a signed distance function after
+#        each iteration; 'edt' uses the exact distance transform of the full
+#        image, 'band' recomputes distances only within narrowband+2 pixels
+#        of the contour and clamps phi to +/-(narrowband+1) elsewhere [3]
+#        (optional, default 'edt')
+#     incremental: flag for whether to track the interior and exterior means
+#        with running sums and counts, updated each iteration from only the 
+#        pixels that changed class, rather than recomputing them over the 
+#        full image (optional, default False)
+#     workspace: ACWEWorkspace holding preallocated buffers for images of the
+#        shape of I, reused across iterations and across calls (optional, 
+#        default None allocates new arrays every iteration)
+#     exterior: sum and count (s,n) of pixels that are part of the exterior 
+#        but not of I, for evolving a crop of a larger image; the mean of the
+#        exterior includes these pixels (optional, default None)
 #
 # Output:
 #    seg: mask of segmented image, corresponding to the zero level set; '1' 
 #         denotes the interior of the contour (foreground) and '0' the exterior
 #         (background)
+#
+# seg = acwe_sparse(I,m,N,weights,narrowband,plot_progress,reinit,incremental,
+#                   workspace,exterior)
+#
+# Same inputs and output as acwe, but keeps an explicit list of the flat
+# indices of the pixels in the narrowband and evaluates the forces and the
+# gradient of phi only at those pixels, rather than over the full image.
+# reinit defaults to 'band', as a full image distance transform each 
+# iteration would cost more than the sparse evolution saves.
+#
+# seg = acwe_batch(I,m,N,weights,narrowband,reinit,incremental,workspace)
+#
+# As acwe_sparse, for a stack of images I and masks m of shape (B,H,W) evolved
+# together with vectorized operations.  Each image keeps its own means and
+# timestep; lambda_i and lambda_o may be given per image.
+#
+# workspace = ACWEWorkspace(shape,dtype)
+#
+# Preallocated, correctly typed buffers (phi, gradients, masks, and the 
+# class change counts used by the convergence check of the callers) for an 
+# image, or stack of images, of the given shape.  Floating point buffers are
+# of type dtype (default float64).  The segmentation returned by the engines
+# is always a new array, never one of the buffers.
+#
+# The level set, forces and means are computed in the floating point type of
+# I (float64 for integer images), so a float32 image is evolved entirely in 
+# single precision; running sums of the incremental means are kept in 
+# float64.
 # 
 # References:
 # [1] T. F. Chan & L. A. Vese, "Active Contours Without Edges," IEEE 
@@ -54,35 +97,297 @@
 #
 # Last Update: Sep 06, 2022: reset phi has been updated to use segmentation
 #                            (seg) for all terms.
+#              Added acwe_sparse, which evolves only an explicit list of
+#              narrowband pixels.
+#              Added band limited reinitialization of phi (reinit='band').
+#              Added incremental tracking of interior and exterior means.
+#              Added acwe_batch for evolving a stack of images together.
+#              Added ACWEWorkspace for reusing buffers between iterations.
+#              Added exterior, for evolving a crop of a larger image.
+#              Level set is evolved in the floating point type of the image.
 
 from scipy.ndimage.morphology import distance_transform_edt
-from numpy import log10, array, sqrt
+from numpy import log10, array, sqrt, flatnonzero, unravel_index, minimum, \
+    maximum, zeros, where, concatenate, full, unique, ravel_multi_index, nan, \
+    asarray, broadcast_to, bincount, empty, invert, multiply, less_equal, \
+    not_equal, copyto, absolute, subtract, float64
 from matplotlib import pyplot as plt
 from scipy.ndimage.filters import convolve
 
-def sobel_gradient(I):
+class ACWEWorkspace:
+    # preallocated buffers for evolving images (or stacks of images) of shape
+    def __init__(self,shape,dtype=float):
+        self.shape = tuple(int(s) for s in shape)
+        self.phi = empty(self.shape,dtype=dtype) # level set
+        self.scratch1 = empty(self.shape,dtype=dtype) # sobel gradient of phi,
+                                                      # distance transform of
+                                                      # exterior
+        self.scratch2 = empty(self.shape,dtype=dtype) # sobel gradient in y, 
+                                                      # |phi|, distance 
+                                                      # transform of interior
+        self.seg = empty(self.shape,dtype=bool) # current segmentation
+        self.band = empty(self.shape,dtype=bool) # narrowband of phi
+        self.edge = empty(self.shape,dtype=bool) # boundary pixels of seg
+        self.mask = empty(self.shape,dtype=bool) # general purpose mask
+        self.background = empty(self.shape,dtype=bool) # on-disk background, 
+                                                       # for the callers
+        self.changed = empty(self.shape,dtype=bool) # pixels that changed 
+                                                    # class, for the callers
+        self.seg_diff_cum = empty(self.shape,dtype='int32') # times pixels 
+                                                            # changed class
+
+    def fits(self,shape,dtype=None):
+        # whether the buffers are for images of this shape (and type)
+        return self.shape == tuple(int(s) for s in shape) and \
+            (dtype is None or self.phi.dtype == dtype)
+
+    def view(self,n):
+        # workspace made of the buffers of the first n images of a stack
+        ws = ACWEWorkspace.__new__(ACWEWorkspace)
+        for name,buf in vars(self).items():
+            setattr(ws,name,buf[:n] if name != 'shape' else buf)
+        ws.shape = (n,) + self.shape[1:]
+        return ws
+
+    def crop(self,shape):
+        # workspace for smaller images, made of the start of these buffers
+        n = 1
+        for s in shape:
+            n = n*int(s)
+        if n > self.phi.size:
+            raise ValueError('workspace is too small for shape %s' % (shape,))
+        ws = ACWEWorkspace.__new__(ACWEWorkspace)
+        ws.shape = tuple(int(s) for s in shape)
+        for name,buf in vars(self).items():
+            if name != 'shape':
+                setattr(ws,name,buf.reshape(-1)[:n].reshape(ws.shape))
+        return ws
+
+    def narrowband(self,phi,narrowband):
+        # mask of the pixels within narrowband of the zero level set
+        absolute(phi,out=self.scratch2)
+        return less_equal(self.scratch2,narrowband,out=self.band)
+
+def float_type(I):
+    # floating point type in which image I is evolved
+    return I.dtype.type if I.dtype.kind == 'f' else float64
+
+def image_stack(a):
+    # view of an image, or stack of images, as a stack of 2D images
+    return a.reshape((-1,)+a.shape[-2:])
+
+def sobel_gradient(I,workspace=None):
     # define gradient of image using sobel masks
     sx = array([[-1, 0, 1],[-2, 0, 2],[-1, 0, 1]]) # vertical sobel mask
     sy = array([[-1, -2, -1],[0, 0, 0],[1, 2, 1]]) # horizontal sobel mask
+    if workspace is not None:
+        gx = convolve(I,sx,output=workspace.scratch1,mode='reflect')
+        gy = convolve(I,sy,output=workspace.scratch2,mode='reflect')
+        g = multiply(gx,gx,out=gx)
+        g += multiply(gy,gy,out=gy)
+        return sqrt(g,out=g)
     gx = convolve(I,sx,mode='reflect')
     gy = convolve(I,sy,mode='reflect')
     g = sqrt(gx**2 + gy**2)
     return g
 
-def level_set_evolve(F,phi,narrowband):
+def level_set_evolve(F,phi,narrowband,workspace=None):
     # evolve level set
-    phi_grad = sobel_gradient(phi) # determine gradient of phi
+    phi_grad = sobel_gradient(phi,workspace) # determine gradient of phi
     delta_t = 0.49*1/max(F) # define small enough timestep per Courant-
                              # Friedrichs-Lewy (CFL) stability [REF?]
+    if workspace is not None:
+        band = workspace.narrowband(phi,narrowband)
+        phi[band] = phi[band] - delta_t*F*phi_grad[band] # evolve phi only in
+                                                        # narrowband
+        return phi
     phi[abs(phi)<=narrowband] = phi[abs(phi)<=narrowband] - \
         delta_t*F*phi_grad[abs(phi)<=narrowband] # evolve phi only in narrowband
     return phi
 
-def acwe(I,m,N,weights,narrowband,plot_progress):
+def narrowband_indices(phi,narrowband):
+    # flat indices of the pixels within narrowband of the zero level set
+    return flatnonzero(abs(phi)<=narrowband)
+
+def sobel_gradient_sparse(phi,idx):
+    # gradient of phi using sobel masks, evaluated only at flat indices idx
+    # neighbors are clamped to the image edge, which matches mode='reflect'
+    # of the full image convolution in sobel_gradient for a 3x3 mask
+    # for a stack of images, the gradient is taken in the last two axes
+    coords = unravel_index(idx,phi.shape)
+    lead = coords[:-2] # image index, for a stack of images
+    rows,cols = coords[-2:]
+    rm = maximum(rows-1,0) # row above
+    rp = minimum(rows+1,phi.shape[-2]-1) # row below
+    cm = maximum(cols-1,0) # column to the left
+    cp = minimum(cols+1,phi.shape[-1]-1) # column to the right
+    def p(r,c):
+        return phi[lead+(r,c)]
+    gx = (p(rm,cp) + 2*p(rows,cp) + p(rp,cp)) - \
+         (p(rm,cm) + 2*p(rows,cm) + p(rp,cm))
+    gy = (p(rp,cm) + 2*p(rp,cols) + p(rp,cp)) - \
+         (p(rm,cm) + 2*p(rm,cols) + p(rm,cp))
+    g = sqrt(gx**2 + gy**2)
+    return g
+
+def level_set_evolve_sparse(F,phi,idx):
+    # evolve level set only at the narrowband pixels listed in idx
+    phi_grad = sobel_gradient_sparse(phi,idx) # gradient of phi in narrowband
+    delta_t = 0.49*1/F.max() # define small enough timestep per CFL stability
+    phi.flat[idx] = phi.flat[idx] - delta_t*F*phi_grad
+    return phi
+
+def level_set_evolve_batch(F,phi,idx,k):
+    # evolve a stack of level sets only at the narrowband pixels listed in 
+    # idx, where k is the (sorted) image index of each narrowband pixel; each
+    # image gets its own CFL timestep
+    phi_grad = sobel_gradient_sparse(phi,idx) # gradient of phi in narrowband
+    F_max = full(phi.shape[0],nan) # maximum force of each image
+    images,starts = unique(k,return_index=True)
+    F_max[images] = maximum.reduceat(F,starts)
+    delta_t = 0.49*1/F_max # define small enough timestep per CFL stability
+    phi.flat[idx] = phi.flat[idx] - delta_t[k]*F*phi_grad
+    return phi
+
+def signed_distance(seg,workspace=None,dtype=float):
+    # signed distance function of seg per [2]; the distance_transform_edt
+    # function returns distance to nearest *background* pixel, so need to
+    # complement mask, and pixels on the interior boundary are assigned -0.5
+    # and those on the exterior boundary +0.5
+    if workspace is not None:
+        # distances written into the workspace, one image at a time
+        invert(seg,out=workspace.mask)
+        for s,s_c,d_o,d_i in zip(image_stack(seg),image_stack(workspace.mask),
+                                 image_stack(workspace.scratch1),
+                                 image_stack(workspace.scratch2)):
+            if d_o.dtype == float64:
+                distance_transform_edt(s_c,distances=d_o)
+                distance_transform_edt(s,distances=d_i)
+            else: # distances can only be written into float64 arrays
+                d_o[...] = distance_transform_edt(s_c)
+                d_i[...] = distance_transform_edt(s)
+        phi = subtract(workspace.scratch1,workspace.scratch2,out=workspace.phi)
+        phi += seg
+        phi -= 0.5
+        return phi
+    if seg.ndim > 2:
+        # stack of images, each transformed separately
+        return array([signed_distance(s,dtype=dtype) for s in seg])
+    phi = distance_transform_edt(~seg) - distance_transform_edt(seg) + \
+          seg - 0.5
+    return phi.astype(dtype,copy=False)
+
+def band_offsets(radius):
+    # pixel offsets (row, column, squared distance) with 0 < distance <= 
+    # radius, ordered by increasing distance
+    r = int(radius)
+    offsets = [(dr,dc,dr**2+dc**2) for dr in range(-r,r+1) 
+               for dc in range(-r,r+1) if 0 < dr**2+dc**2 <= radius**2]
+    return sorted(offsets,key=lambda o: o[2])
+
+def band_signed_distance(seg,narrowband,workspace=None,dtype=float):
+    # signed distance function of seg computed only near the contour [3]
+    # Distances are exact for every pixel within narrowband+2 of the contour,
+    # which covers the narrowband and all neighbors read by the sobel mask
+    # when evolving it.  Everything further away is clamped to 
+    # +/-(narrowband+1), which is never read during evolution.
+    # Returns phi and the flat indices of the pixels that were computed.
+    # For a stack of images, distances are taken in the last two axes.
+    rows_n,cols_n = seg.shape[-2:]
+    if workspace is None:
+        phi = where(seg,dtype(-(narrowband+1.)),
+                    dtype(narrowband+1.)) # clamped background
+        edge = zeros(seg.shape,dtype=bool)
+    else:
+        phi = workspace.phi
+        phi.fill(narrowband+1.) # clamped background
+        copyto(phi,-(narrowband+1.),where=seg)
+        edge = workspace.edge
+        edge.fill(False)
+
+    # boundary pixels: pixels with a 4-neighbor of the opposite class; the 
+    # nearest pixel of the opposite class is always one of these
+    out = None if workspace is None else workspace.mask[...,1:,:]
+    d = not_equal(seg[...,1:,:],seg[...,:-1,:],out=out)
+    edge[...,1:,:] |= d
+    edge[...,:-1,:] |= d
+    out = None if workspace is None else workspace.mask[...,:,1:]
+    d = not_equal(seg[...,:,1:],seg[...,:,:-1],out=out)
+    edge[...,:,1:] |= d
+    edge[...,:,:-1] |= d
+    b = flatnonzero(edge)
+    if len(b) == 0:
+        return phi,b
+    coords = unravel_index(b,seg.shape)
+    lead = coords[:-2] # image index, for a stack of images
+    rows,cols = coords[-2:]
+    b_class = seg.flat[b]
+
+    # scatter distances outward from the boundary in order of increasing 
+    # distance, so the first distance recorded for a pixel is its minimum
+    targets = []
+    dists = []
+    for dr,dc,d2 in band_offsets(narrowband+2):
+        r = rows + dr
+        c = cols + dc
+        valid = (r>=0) & (r<rows_n) & (c>=0) & (c<cols_n)
+        t = ravel_multi_index(tuple(l[valid] for l in lead) + \
+                              (r[valid],c[valid]),seg.shape)
+        t = t[seg.flat[t] != b_class[valid]] # opposite class only
+        targets.append(t)
+        dists.append(full(len(t),d2))
+    targets = concatenate(targets)
+    dists = concatenate(dists)
+    idx,first = unique(targets,return_index=True)
+    dist = sqrt(dists[first])
+    phi.flat[idx] = where(seg.flat[idx],0.5-dist,dist-0.5)
+    return phi,idx
+
+def reinitialize(seg,narrowband,reinit,workspace=None,dtype=float):
+    # reset phi to a signed distance function using the requested method
+    # Returns phi (of type dtype, or that of the workspace) and the flat 
+    # indices of the narrowband, if known
+    if reinit == 'edt':
+        return signed_distance(seg,workspace,dtype),None
+    elif reinit == 'band':
+        phi,idx = band_signed_distance(seg,narrowband,workspace,dtype)
+        return phi,idx[abs(phi.flat[idx])<=narrowband]
+    else:
+        raise ValueError("reinit must be 'edt' or 'band'")
+
+def update_sums(I_band,old,new,s_i,n_i):
+    # update running sum and count of the interior from the narrowband pixels
+    # that changed class, given their class before (old) and after (new)
+    gained = new & ~old
+    lost = old & ~new
+    s_i = s_i + I_band[gained].sum() - I_band[lost].sum()
+    n_i = n_i + gained.sum() - lost.sum()
+    return s_i,n_i
+
+def interior_sums(I,seg,workspace=None):
+    # sum of the interior of each image in a stack
+    if workspace is None:
+        return (I*seg).sum(axis=(-2,-1),dtype=float64)
+    return multiply(I,seg,out=workspace.scratch1).sum(axis=(-2,-1),
+                                                      dtype=float64)
+
+def plot_contour(I,phi):
+    # display the image with the current zero level set overlaid
+    plt.figure(1)
+    plt.clf()
+    plt.imshow(log10(I),vmin=log10(100),vmax=log10(2500),cmap='gray')
+    plt.contour(phi,0,colors='y')
+    plt.axis('off')
+    plt.draw()
+    plt.pause(1)
+
+def acwe(I,m,N,weights,narrowband,plot_progress,reinit='edt',
+         incremental=False,workspace=None,exterior=None):
+    ftype = float_type(I) # type of phi, forces and means
     mu = weights[0] # surface tension (length) weight
     nu = weights[1] # stiffness (area) weight
-    lambda_i = weights[2] # inside contour weight
-    lambda_o = weights[3] # outside contour weight
+    lambda_i = ftype(weights[2]) # inside contour weight
+    lambda_o = ftype(weights[3]) # outside contour weight
 
     # Convert initial mask into signed distance function [2]
     # By convention, distance is 0 on contour, <0 outside of contour, and >0
@@ -92,39 +397,190 @@ def acwe(I,m,N,weights,narrowband,plot_progress):
     # Also need to assure that the pixels on the interior boundary of the 
     # original mask are assigned distance -0.5 pixels and those pixels on the 
     # exterior boundary assigned distance +0.5 pixels 
-    phi = distance_transform_edt(~m) - distance_transform_edt(m) + m - 0.5
+    phi,_ = reinitialize(m,narrowband,reinit,workspace,ftype)
     
     counter = 0 # keep track of number of iterations
     iterate = 1 # flag to keep iterating
     seg = m
+    s_x,n_x = (0,0) if exterior is None else exterior # exterior not in I
+    if incremental:
+        s_all = I.sum(dtype=float64) + s_x # sum of full image
+        n_all = I.size + n_x # number of pixels in full image
+        s_i = I[seg].sum(dtype=float64) # running sum of interior
+        n_i = seg.sum() # running count of interior
     while (counter<N and iterate):
-        m_i = I[seg].mean() # mean of interior
-        m_o = I[~seg].mean() # mean of exterior
-        F_image = -lambda_i*(I[abs(phi)<=narrowband]-m_i)**2 + \
-            +lambda_o*(I[abs(phi)<=narrowband]-m_o)**2 # define image force
+        if workspace is None:
+            band = abs(phi)<=narrowband # narrowband, only pixels that can flip
+        else:
+            band = workspace.narrowband(phi,narrowband)
+        if incremental:
+            m_i = ftype(s_i/n_i) # mean of interior
+            m_o = ftype((s_all-s_i)/(n_all-n_i)) # mean of exterior
+            seg_band = seg[band] # class of narrowband before evolution
+        elif exterior is None:
+            m_i = I[seg].mean() # mean of interior
+            m_o = I[~seg].mean() # mean of exterior
+        else:
+            m_i = I[seg].mean() # mean of interior
+            I_o = I[~seg] # exterior within I
+            m_o = ftype((I_o.sum(dtype=float64)+s_x)/\
+                        (I_o.size+n_x)) # mean of exterior
+        I_band = I[band] # image values in narrowband
+        F_image = -lambda_i*(I_band-m_i)**2 + \
+            +lambda_o*(I_band-m_o)**2 # define image force
         F_length = mu*0
         F_area = nu*0
 
         F_total = F_length + F_area + F_image # total energy only for narrowband
     
-        phi = level_set_evolve(F_total,phi,narrowband)
-        seg = phi<=0
+        phi = level_set_evolve(F_total,phi,narrowband,workspace)
+        if workspace is None:
+            seg = phi<=0
+        else:
+            seg = less_equal(phi,0,out=workspace.seg)
+        if incremental:
+            s_i,n_i = update_sums(I_band,seg_band,seg[band],s_i,n_i)
 
         # reset phi to signed distance transform manually 
         # could probably reinitialize phi, but code wasn't working and manual
         # approach worked
-        phi = distance_transform_edt(~seg) - distance_transform_edt(seg) + \
-              seg - 0.5
+        phi,_ = reinitialize(seg,narrowband,reinit,workspace,ftype)
 
         if plot_progress:
-            plt.figure(1)
-            plt.clf()
-            plt.imshow(log10(I),vmin=log10(100),vmax=log10(2500),cmap='gray')
-            plt.contour(phi,0,colors='y')
-            plt.axis('off')
-            plt.draw()
-            plt.pause(1)
+            plot_contour(I,phi)
 
         counter = counter + 1
         
+    if workspace is not None and seg is workspace.seg:
+        seg = seg.copy() # never return the buffer
+    return seg
+
+def acwe_sparse(I,m,N,weights,narrowband,plot_progress,reinit='band',
+                incremental=False,workspace=None,exterior=None):
+    ftype = float_type(I) # type of phi, forces and means
+    mu = weights[0] # surface tension (length) weight
+    nu = weights[1] # stiffness (area) weight
+    lambda_i = ftype(weights[2]) # inside contour weight
+    lambda_o = ftype(weights[3]) # outside contour weight
+
+    # Convert initial mask into signed distance function, as in acwe
+    phi,idx = reinitialize(m,narrowband,reinit,workspace,ftype)
+
+    counter = 0 # keep track of number of iterations
+    iterate = 1 # flag to keep iterating
+    if workspace is None:
+        seg = m.copy() # only narrowband pixels are updated below
+    else:
+        seg = workspace.seg
+        copyto(seg,m)
+    s_x,n_x = (0,0) if exterior is None else exterior # exterior not in I
+    if incremental:
+        s_all = I.sum(dtype=float64) + s_x # sum of full image
+        n_all = I.size + n_x # number of pixels in full image
+        s_i = I[seg].sum(dtype=float64) # running sum of interior
+        n_i = seg.sum() # running count of interior
+    while (counter<N and iterate):
+        if idx is None:
+            idx = narrowband_indices(phi,narrowband) # active narrowband pixels
+        if incremental:
+            m_i = ftype(s_i/n_i) # mean of interior
+            m_o = ftype((s_all-s_i)/(n_all-n_i)) # mean of exterior
+        elif exterior is None:
+            m_i = I[seg].mean() # mean of interior
+            m_o = I[~seg].mean() # mean of exterior
+        else:
+            m_i = I[seg].mean() # mean of interior
+            I_o = I[~seg] # exterior within I
+            m_o = ftype((I_o.sum(dtype=float64)+s_x)/\
+                        (I_o.size+n_x)) # mean of exterior
+        I_band = I.flat[idx] # image values in narrowband
+        F_image = -lambda_i*(I_band-m_i)**2 + \
+            +lambda_o*(I_band-m_o)**2 # define image force
+        F_length = mu*0
+        F_area = nu*0
+
+        F_total = F_length + F_area + F_image # total energy only for narrowband
+
+        phi = level_set_evolve_sparse(F_total,phi,idx)
+        seg_band = phi.flat[idx]<=0 # phi outside narrowband is unchanged
+        if incremental:
+            s_i,n_i = update_sums(I_band,seg.flat[idx],seg_band,s_i,n_i)
+        seg.flat[idx] = seg_band
+
+        # reset phi to signed distance transform
+        phi,idx = reinitialize(seg,narrowband,reinit,workspace,ftype)
+
+        if plot_progress:
+            plot_contour(I,phi)
+
+        counter = counter + 1
+
+    if workspace is not None:
+        seg = seg.copy() # never return the buffer
+    return seg
+
+def acwe_batch(I,m,N,weights,narrowband,reinit='band',incremental=False,
+               workspace=None):
+    # Same as acwe_sparse, but for a stack of images I and masks m of shape
+    # (B,H,W) evolved together; each image keeps its own interior and exterior
+    # means and its own CFL timestep.  The inside and outside weights in 
+    # weights may be scalars or one value per image.
+    B = I.shape[0] # number of images
+    n_px = I.shape[-2]*I.shape[-1] # number of pixels in each image
+    mu = weights[0] # surface tension (length) weight
+    nu = weights[1] # stiffness (area) weight
+    ftype = float_type(I) # type of phi, forces and means
+    lambda_i = broadcast_to(asarray(weights[2],dtype=ftype),(B,)) # inside
+    lambda_o = broadcast_to(asarray(weights[3],dtype=ftype),(B,)) # outside
+
+    # Convert initial masks into signed distance functions, as in acwe
+    phi,idx = reinitialize(m,narrowband,reinit,workspace,ftype)
+
+    counter = 0 # keep track of number of iterations
+    iterate = 1 # flag to keep iterating
+    if workspace is None:
+        seg = m.copy() # only narrowband pixels are updated below
+    else:
+        seg = workspace.seg
+        copyto(seg,m)
+    s_all = I.sum(axis=(-2,-1),dtype=float64) # sum of each full image
+    if incremental:
+        s_i = interior_sums(I,seg,workspace) # running sum of each interior
+        n_i = seg.sum(axis=(-2,-1)) # running count of each interior
+    while (counter<N and iterate):
+        if idx is None:
+            idx = narrowband_indices(phi,narrowband) # active narrowband pixels
+        k = idx//n_px # image of each narrowband pixel
+        if not incremental:
+            s_i = interior_sums(I,seg,workspace) # sum of each interior
+            n_i = seg.sum(axis=(-2,-1)) # count of each interior
+        m_i = (s_i/n_i).astype(ftype) # mean of each interior
+        m_o = ((s_all-s_i)/(n_px-n_i)).astype(ftype) # mean of each exterior
+        I_band = I.flat[idx] # image values in narrowband
+        F_image = -lambda_i[k]*(I_band-m_i[k])**2 + \
+            +lambda_o[k]*(I_band-m_o[k])**2 # define image force
+        F_length = mu*0
+        F_area = nu*0
+
+        F_total = F_length + F_area + F_image # total energy only for narrowband
+
+        phi = level_set_evolve_batch(F_total,phi,idx,k)
+        seg_band = phi.flat[idx]<=0 # phi outside narrowband is unchanged
+        if incremental:
+            old = seg.flat[idx]
+            gained = seg_band & ~old
+            lost = old & ~seg_band
+            s_i = s_i + bincount(k[gained],I_band[gained],B) - \
+                  bincount(k[lost],I_band[lost],B)
+            n_i = n_i + bincount(k[gained],minlength=B) - \
+                  bincount(k[lost],minlength=B)
+        seg.flat[idx] = seg_band
+
+        # reset phi to signed distance transform
+        phi,idx = reinitialize(seg,narrowband,reinit,workspace,ftype)
+
+        counter = counter + 1
+
+    if workspace is not None:
+        seg = seg.copy() # never return the buffer
     return seg
@@ -52,17 +52,6 @@ from matplotlib import pyplot as plt
 import correct_limb_brightening
 import acwe
 
-def make_circle_mask(c,im_dims,r):
-    # defomes a binary image with image dimensions im_dims of a circle with 
-    # center c and radius r
-    cx = c[0]
-    cy = c[1]
-    ix = im_dims[0]
-    iy = im_dims[1]
-    x,y = np.meshgrid(np.arange(-(cx),(ix-cx),1),np.arange(-(cy),(iy-cy),1))
-    c_mask = (x**2+y**2)<=r**2
-    return c_mask
-
 plt.ion() # interactive plotting on 
 
 # define the base directory under which fits files exist
@@ -101,7 +90,8 @@ for filename in files:
     I = correct_limb_brightening.correct_limb_brightening(I,sun_radius)
 
     # Define solar disk mask
-    sd_mask = make_circle_mask(im_size/2,im_size,sun_radius)
+    sd_mask = correct_limb_brightening.make_circle_mask(im_size/2,im_size,
+                                                        sun_radius)
  
     # Determine threshold value for initialization of AC as percentage of QS;  
     # estimage QS as maximum bin of histogram
@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Batch runner for segmenting the frames of a Carrington rotation (CR) in a
+    pool of worker processes. Each worker loads its per-process state (ACWE
+    tools, solar disk geometry cache and ACWE workspace) once, then segments
+    frames as the run scripts do: open the .fits file, update it to level
+    1.5 if needed, run ACWE and save the results in the mirrored folder
+    layout of the run scripts. Progress is reported in the order of the
+    dataset, and an interrupt (Ctrl+C or SIGTERM) lets the frames in progress
+    finish before stopping, so no partial results are left behind.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import time
+import signal
+import socket
+import http.client
+import urllib.error
+import traceback
+import collections
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from . import acweFunctions_v6, acweSaveSeg_v5
+from . import acweDiskGeometry, acweTelemetry, acweManifest
+from . import acweRegisteredCache, acwePrefetch
+from .ACWE_python_v3 import acwe
+
+# In[2]
+# Load Frame
+def transient_error(error):
+    '''
+    Returns
+    -------
+    transient : bool
+        True if error, raised while opening or registering an image, may not
+        occur on another attempt: network errors and timeouts, e.g. of
+        update_pointing, and I/O errors of the file system. Missing files,
+        denied permissions and corrupt .fits files, which astropy reports
+        as OSError without an errno, are not transient.
+    '''
+    if isinstance(error,(FileNotFoundError,IsADirectoryError,
+                         NotADirectoryError,PermissionError)):
+        return False
+    if isinstance(error,(ConnectionError,TimeoutError,socket.timeout,
+                         urllib.error.URLError,http.client.HTTPException)):
+        return True
+    return isinstance(error,OSError) and error.errno is not None
+
+def load_image(filename,retries=5,wait=30.,telemetry=None):
+    '''
+    Opens a solar EUV image and, if it is not already, updates it to a level
+    1.5 data product, as in the run scripts.
+
+    Parameters
+    ----------
+    filename : str
+        Full path of the .fits file.
+    retries : int, optional
+        Number of further attempts if the file cannot be opened or updated
+        because of a transient error (see transient_error), e.g. when
+        update_pointing times out. Other errors are raised at once.
+
+        Default Value: 5
+    wait : float, optional
+        Seconds to wait between attempts.
+
+        Default Value: 30.0
+    telemetry : acweTelemetry.Telemetry, optional
+        Records the time spent reading ('load') and updating ('register')
+        the image.
+
+        Default Value: None
+    Returns
+    -------
+    I : [float]
+        Level 1.5 solar EUV image
+    H : dict
+        .fits header of I
+    '''
+    from astropy.io import fits
+
+    for attempt in range(retries+1):
+        try:
+            # Extract Image and Header Data
+            with acweTelemetry.stage(telemetry,'load'):
+                hdulist = fits.open(filename)
+                hdulist.verify('silentfix')
+                h = hdulist[1].header
+                J = hdulist[1].data
+                hdulist.close()
+
+            # Update to Level 1.5 Data Product
+            with acweTelemetry.stage(telemetry,'register'):
+                import sunpy.map
+                if h['LVL_NUM'] < 1.5:
+                    from aiapy.calibrate import register, update_pointing
+                    m = sunpy.map.Map((J,h))    # Create Sunpy Map
+                    m = update_pointing(m)      # Update Header
+                    m = register(m)             # Recenter and rotate
+                    I = m.data
+                # Skip if already Level 1.5
+                else:
+                    m = sunpy.map.Map((J,h))
+                    I = J*1
+
+            # Undo Keyword Renaming
+            H = dict()
+            for k in m.meta.keys():
+                H[k.upper()] = m.meta[k]
+            return I,H
+        except Exception as error:
+            if attempt == retries or not transient_error(error):
+                raise
+            time.sleep(wait)
+
+def acwe_filename(file,prefix):
+    '''
+    Parameters
+    ----------
+    file : str
+        Entry of a CR*.csv list, e.g. '2010-07-13T090002Z/aia...fits'
+    prefix : str
+        Prefix of the segmentation, e.g. 'ACWE.'
+    Returns
+    -------
+    acweFile : str
+        Segmentation file of file, relative to the save folder of the CR, in
+        the mirrored folder layout of the run scripts.
+    '''
+    return file.split('/')[0] + '/' + prefix + os.path.basename(file) + '.npz'
+
+def save_atomic(filename,*args,**kwargs):
+    '''
+    Saves a segmentation with acweSaveSeg_v5.saveSeg, to a temporary file
+    that then replaces filename, so an interrupted save never leaves a
+    partial file under filename.
+    '''
+    folder,name = os.path.split(filename)
+    tmp = os.path.join(folder,'.tmp.' + str(os.getpid()) + '.' + name)
+    acweSaveSeg_v5.saveSeg(tmp,*args,**kwargs)
+    os.replace(tmp,filename)
+
+# In[3]
+# Tasks
+class ACWETask:
+    '''
+    Segments a frame with run_acwe (or run_acwe_confidenceMap) and saves the
+    result, as in Standard/runACWEdefault.py, Scaled/runACWEscaledDefault.py
+    and ConfidenceMapping/runACWEconfidenceLevelSet_Default.py.
+
+    Other segmentations can be run with any object with the same outputs
+    and __call__ methods, defined at module level so that it can be sent to
+    the worker processes. Such an object may also define a load method,
+    which then opens each frame instead of acweRegisteredCache.load (see
+    acweScaleStore.ScaleStoreTask).
+
+    Parameters
+    ----------
+    prefix : str, optional
+        Prefix of the segmentation files, e.g. 'ACWE.' or 'ACWEconMap.'
+
+        Default Value: 'ACWE.'
+    confidenceMap : bool, optional
+        Generate a confidence map with run_acwe_confidenceMap, in which case
+        background_weight is the list of background weights.
+
+        Default Value: False
+    resize_param, foreground_weight, background_weight, alpha, narrowband,
+    N, correctLimbBrightening, rollingAlpha, fillInitHoles : optional
+        See acweFunctions_v6.run_acwe. The defaults are those of
+        Standard/runACWEdefault.py.
+    compressed : bool, optional
+        Save compressed .npz files, see acweSaveSeg_v5.saveSeg.
+
+        Default Value: True
+    **kwargs : optional
+        Any other parameters of run_acwe or run_acwe_confidenceMap, e.g.
+        engine, interpolation or cropToSeed.
+    '''
+
+    def __init__(self,prefix='ACWE.',confidenceMap=False,resize_param=8,
+                 foreground_weight=1,background_weight=1/50.,alpha=0.3,
+                 narrowband=2,N=10,correctLimbBrightening=True,
+                 rollingAlpha=0.01,fillInitHoles=True,compressed=True,
+                 **kwargs):
+        self.prefix = prefix
+        self.confidenceMap = confidenceMap
+        self.resize_param = resize_param
+        self.foreground_weight = foreground_weight
+        self.background_weight = background_weight
+        self.alpha = alpha
+        self.narrowband = narrowband
+        self.N = N
+        self.correctLimbBrightening = correctLimbBrightening
+        self.rollingAlpha = rollingAlpha
+        self.fillInitHoles = fillInitHoles
+        self.compressed = compressed
+        self.kwargs = kwargs
+
+    def outputs(self,file):
+        '''
+        Returns
+        -------
+        acweFiles : [str]
+            Files saved for file, relative to the save folder of the CR.
+        '''
+        return [acwe_filename(file,self.prefix)]
+
+    def segment(self,I,H,state,telemetry=None):
+        '''
+        Segments the level 1.5 image I with header H. state is the
+        WorkerState of the process and telemetry, if given, records the
+        stage times.
+
+        Returns
+        -------
+        seg : [bool] OR [float]
+            Segmentation, or segmentations of the confidence map
+        alphar : float
+            Final alpha used to generate the initial mask
+        m : [bool]
+            Initial mask
+        '''
+        run = acweFunctions_v6.run_acwe_confidenceMap if self.confidenceMap \
+              else acweFunctions_v6.run_acwe
+        kwargs = dict(self.kwargs)
+        kwargs.setdefault('geometryCache',state.geometryCache)
+        kwargs.setdefault('workspace',state.workspace(
+            np.asarray(I.shape)//self.resize_param,
+            kwargs.get('dtype',np.float64)))
+        results = run(I,H,self.resize_param,self.foreground_weight,
+                      self.background_weight,self.alpha,self.narrowband,
+                      self.N,False,self.correctLimbBrightening,
+                      self.rollingAlpha,self.fillInitHoles,
+                      telemetry=telemetry,**kwargs)
+        if self.rollingAlpha != 0:
+            seg,alphar,m = results[:3]
+        else:
+            (seg,m),alphar = results[:2],self.alpha
+        return seg,alphar,m
+
+    def segment_prepared(self,prepared,state,telemetry=None):
+        '''
+        Segments an image already resized and limb brightening corrected,
+        e.g. from acweScaleStore, as segment does the level 1.5 image. The
+        parameters of the preparation (dtype, interpolation) are those of
+        prepared; confidence maps and pyramid seeding are not supported.
+
+        Parameters
+        ----------
+        prepared : acweSweep.PreparedImage
+            Image prepared at self.resize_param.
+        state, telemetry :
+            See segment.
+        Returns
+        -------
+        seg, alphar, m :
+            See segment.
+        '''
+        if self.confidenceMap or self.kwargs.get('pyramid') is not None:
+            raise ValueError('Confidence maps and pyramid seeding need the '
+                             'level 1.5 image, use segment')
+        keys = ['engine','reinit','incrementalMeans','workspace',
+                'cropToSeed','cropMargin']
+        kwargs = {k:v for k,v in self.kwargs.items() if k in keys}
+        kwargs.setdefault('workspace',state.workspace(prepared.im_size,
+                                                      prepared.I.dtype))
+        results = prepared.segment(self.foreground_weight,
+                                   self.background_weight,self.alpha,
+                                   self.narrowband,self.N,False,
+                                   self.rollingAlpha,self.fillInitHoles,
+                                   telemetry=telemetry,**kwargs)
+        if self.rollingAlpha != 0:
+            return results
+        seg,m = results
+        return seg,self.alpha,m
+
+    def save(self,filename,seg,H,alphar,m,telemetry=None,
+             image_preprocess=None,writer=None):
+        '''
+        Saves a segmentation of this task to filename, see save_atomic. If
+        writer (an acwePrefetch.Writer or Pipeline) is given, it is saved in
+        the writer thread.
+        '''
+        args = (filename,seg,H,self.correctLimbBrightening,self.resize_param,
+                self.foreground_weight,self.background_weight,m,
+                'alpha*mean(qs)',self.fillInitHoles,self.alpha,alphar,
+                self.narrowband,self.N,image_preprocess)
+        kwargs = {'telemetry':telemetry,'compressed':self.compressed}
+        with acweTelemetry.stage(telemetry,'save'):
+            if writer is None:
+                save_atomic(*args,**kwargs)
+            else:
+                writer.submit(save_atomic,*args,**kwargs)
+
+    def __call__(self,I,H,file,crSaveFolder,state,telemetry=None):
+        '''
+        Segments the level 1.5 image I with header H, the frame file, and
+        saves the result in crSaveFolder, see segment.
+        '''
+        seg,alphar,m = self.segment(I,H,state,telemetry)
+        self.save(crSaveFolder + self.outputs(file)[0],seg,H,alphar,m,
+                  telemetry,writer=state.writer)
+
+class MultiTask:
+    '''
+    Runs several tasks on each frame, so that the frame is loaded once, e.g.
+    ACWE at several values of resize_param as in Scaled/runACWEscaledDefault.py.
+
+    Parameters
+    ----------
+    tasks : [ACWETask]
+        Tasks performed on each frame, in order.
+    overwrite : bool, optional
+        Run every task; otherwise tasks whose outputs already exist are
+        skipped.
+
+        Default Value: False
+    '''
+
+    def __init__(self,tasks,overwrite=False):
+        self.tasks = list(tasks)
+        self.overwrite = overwrite
+        self.prefix = ''.join(task.prefix for task in self.tasks)
+
+    def outputs(self,file):
+        return [f for task in self.tasks for f in task.outputs(file)]
+
+    def __call__(self,I,H,file,crSaveFolder,state,telemetry=None):
+        for task in self.tasks:
+            if self.overwrite or not all(os.path.exists(crSaveFolder + f)
+                                         for f in task.outputs(file)):
+                task(I,H,file,crSaveFolder,state,telemetry)
+
+# In[4]
+# Worker State
+class WorkerState:
+    '''
+    State kept by each worker process for all of its frames: a solar disk
+    geometry cache, shared by the frames of a CR after registration, an
+    ACWE workspace, reused while the image dimensions stay the same, the
+    registered image cache, if any, and the writer through which results
+    are saved, if any (see acwePrefetch.py).
+
+    Parameters
+    ----------
+    tolerance : float, optional
+        Tolerance of the geometry cache, see acweDiskGeometry.
+        DiskGeometryCache.
+
+        Default Value: 0.0
+    cache : acweRegisteredCache.RegisteredCache or str, optional
+        Registered image cache, or its folder, through which images are
+        opened.
+
+        Default Value: None
+    '''
+
+    def __init__(self,tolerance=0.,cache=None):
+        self.geometryCache = acweDiskGeometry.DiskGeometryCache(
+            tolerance=tolerance)
+        self.cache = acweRegisteredCache.as_cache(cache)
+        self.writer = None
+        self._workspace = None
+
+    def workspace(self,im_size,dtype=np.float64):
+        '''
+        Returns
+        -------
+        workspace : acwe.ACWEWorkspace
+            Workspace for images of dimensions im_size and type dtype, reused
+            from the previous frame when possible.
+        '''
+        if self._workspace is None or \
+           not self._workspace.fits(im_size,np.dtype(dtype)):
+            self._workspace = acwe.ACWEWorkspace(im_size,dtype)
+        return self._workspace
+
+_worker = None
+def _initialize(task,dataFolder,crSaveFolder,overwrite,retries,wait,
+                tolerance,cache,worker=True):
+    # Per-process state, sent once to each worker process; the workers leave
+    # interrupts to the main process, which shuts them down gracefully
+    global _worker
+    if worker:
+        signal.signal(signal.SIGINT,signal.SIG_IGN)
+        signal.signal(signal.SIGTERM,signal.SIG_DFL) # not run_rotation's
+    _worker = (task,dataFolder,crSaveFolder,overwrite,retries,wait,
+               WorkerState(tolerance,cache))
+
+def _load(task,filename,file,state,retries,wait,telemetry=None):
+    # Open a frame, with the load method of task if it has one
+    if hasattr(task,'load'):
+        return task.load(filename,file,state,retries,wait,telemetry)
+    return acweRegisteredCache.load(filename,state.cache,retries,wait,
+                                    telemetry)
+
+def _process(file):
+    # Segment one frame; module level so that it can be pickled
+    task,dataFolder,crSaveFolder,overwrite,retries,wait,state = _worker
+    start = time.perf_counter()
+    record = {'file':file,'outputs':task.outputs(file),'status':'done',
+              'error':None,'time':0.,'times':{}}
+
+    # Check for Files
+    if not overwrite and all(os.path.exists(crSaveFolder + f)
+                             for f in record['outputs']):
+        record['status'] = 'skipped'
+        return record
+
+    try:
+        # Placement Folder
+        os.makedirs(crSaveFolder + file.split('/')[0],exist_ok=True)
+
+        # Load, Segment and Save
+        telemetry = acweTelemetry.Telemetry()
+        I,H = _load(task,dataFolder + file,file,state,retries,wait,
+                    telemetry)
+        task(I,H,file,crSaveFolder,state,telemetry)
+        record['times'] = dict(telemetry.times)
+    except Exception:
+        record['status'] = 'failed'
+        record['error'] = traceback.format_exc()
+    record['time'] = time.perf_counter()-start
+    return record
+
+# In[5]
+# Batch Runner
+def run_rotation(files,dataFolder,crSaveFolder,task,processes=None,
+                 overwrite=False,verbose=True,retries=5,wait=30.,
+                 tolerance=0.,manifest=None,cache=None,prefetch=0):
+    '''
+    Segments the frames of a CR in a pool of worker processes.
+
+    Parameters
+    ----------
+    files : [str]
+        Frames to segment, as listed in a CR*.csv file, e.g.
+        data[keys[acweChoice]] in the run scripts.
+    dataFolder : str
+        Folder of the CR in the dataset, e.g. dataFolder + CR + '/'
+    crSaveFolder : str
+        Folder of the CR where the results are saved, e.g.
+        saveFolder + CR + '/'. Results are placed in the mirrored folder
+        layout of the run scripts.
+    task : ACWETask
+        Segmentation performed on each frame.
+    processes : int, optional
+        Number of worker processes; 0 segments the frames one after another
+        in this process. If None, os.cpu_count() processes are used.
+
+        Default Value: None
+    overwrite : bool, optional
+        Segment frames that already have results; otherwise they are
+        skipped, so an interrupted CR can be resumed.
+
+        Default Value: False
+    verbose : bool, optional
+        Report the progress of each frame, in the order of files.
+
+        Default Value: True
+    retries, wait : optional
+        See load_image.
+    tolerance : float, optional
+        See WorkerState.
+
+        Default Value: 0.0
+    manifest : acweManifest.Manifest or str, optional
+        Job manifest of the CR, or its filename. If given, only the frames
+        it lists as pending or failed are segmented, found in one query
+        instead of checking the outputs of every frame, and the status,
+        attempts, errors and times of each frame are recorded in it. Frames
+        that fail manifest.maxAttempts times are quarantined and skipped by
+        later runs. With overwrite, every frame of files is reset to
+        pending.
+
+        Default Value: None
+    cache : acweRegisteredCache.RegisteredCache or str, optional
+        Registered image cache, or its folder, through which the workers
+        open the images, so that each level 1 image is registered once for
+        all runs that share the cache.
+
+        Default Value: None
+    prefetch : int, optional
+        With processes=0, the number of frames opened ahead in a loader
+        thread while the current frame is segmented, with results saved in
+        a writer thread (see acwePrefetch.Pipeline); 0 opens, segments and
+        saves each frame in turn. The load time of a prefetched frame is the
+        time spent waiting for it. With worker processes, each worker
+        already overlaps its I/O with the ACWE of the others, and prefetch
+        is not used.
+
+        Default Value: 0
+    Returns
+    -------
+    records : [dict]
+        One record per frame processed before any interrupt, in the order of
+        files (only those left to segment when a manifest is given), with
+        the 'file', its 'outputs', its 'status' ('done', 'skipped' or
+        'failed'), the 'error' traceback of failed frames, and the total
+        'time' and stage 'times' in seconds.
+    '''
+    files = list(files)
+    os.makedirs(crSaveFolder,exist_ok=True)
+    initargs = (task,dataFolder,crSaveFolder,overwrite,retries,wait,tolerance,
+                cache)
+    records = []
+
+    # Frames left to segment
+    manifest = acweManifest.as_manifest(manifest)
+    if manifest is not None:
+        todo = manifest.plan(files,overwrite,lambda file: all(
+            os.path.exists(crSaveFolder + f) for f in task.outputs(file)))
+        files = [file for file in files if file in todo]
+
+    def start(file):
+        if manifest is not None:
+            manifest.start(file)
+        return file
+
+    def report(record):
+        records.append(record)
+        if manifest is not None:
+            record['status'] = {acweManifest.QUARANTINED:'quarantined'}.get(
+                manifest.finish(record),record['status'])
+        if verbose:
+            print('[{}/{}] {} {} ({:.1f} s)'.format(len(records),len(files),
+                  os.path.basename(record['file']),record['status'],
+                  record['time']))
+            if record['error'] is not None:
+                print(record['error'])
+
+    # One after another, in this process
+    if processes == 0 and prefetch == 0:
+        _initialize(*initargs,worker=False)
+        try:
+            for file in files:
+                report(_process(start(file)))
+        except KeyboardInterrupt:
+            if verbose:
+                print('Interrupted,',len(records),'of',len(files),'frames')
+        return records
+
+    # One after another, in this process, opening frames ahead and saving
+    # results in the background
+    if processes == 0:
+        _initialize(*initargs,worker=False)
+        state = _worker[-1]
+        def done(file):
+            return not overwrite and all(os.path.exists(crSaveFolder + f)
+                                         for f in task.outputs(file))
+        pipeline = acwePrefetch.Pipeline(
+            lambda file: _load(task,dataFolder + file,file,state,retries,
+                               wait),
+            [file for file in files if not done(file)],prefetch,
+            report=report)
+        state.writer = pipeline
+        try:
+            with pipeline:
+                for file in files:
+                    telemetry = acweTelemetry.Telemetry()
+                    with pipeline.frame(start(file),telemetry) as record:
+                        record['outputs'] = task.outputs(file)
+                        if done(file):
+                            record['status'] = 'skipped'
+                            continue
+                        os.makedirs(crSaveFolder + file.split('/')[0],
+                                    exist_ok=True)
+                        I,H = pipeline.load(file,telemetry)
+                        task(I,H,file,crSaveFolder,state,telemetry)
+        except KeyboardInterrupt:
+            if verbose:
+                print('Interrupted,',len(records),'of',len(files),'frames')
+        return records
+
+    # SIGTERM, e.g. from a job scheduler, stops the CR as Ctrl+C does
+    def terminate(signum,frame):
+        raise KeyboardInterrupt
+    previous = signal.signal(signal.SIGTERM,terminate)
+
+    def report_future(file,future):
+        # Report the record of a frame from its future; False if its worker
+        # died
+        try:
+            report(future.result())
+            return True
+        except BrokenProcessPool:
+            report({'file':file,'outputs':task.outputs(file),
+                    'status':'failed','error':traceback.format_exc(),
+                    'time':0.,'times':{}})
+            return False
+
+    # Frames are submitted, and started in the manifest, only when a worker
+    # is free to take them, so a crashed run counts no attempt of the frames
+    # it never reached
+    processes = os.cpu_count() if processes is None else processes
+    executor = concurrent.futures.ProcessPoolExecutor(
+        processes,initializer=_initialize,initargs=initargs)
+    queue = collections.deque(files)
+    pending = collections.deque() # (file, future), in the order of files
+    try:
+        while queue or pending:
+            running = [future for file,future in pending if not future.done()]
+            broken = False
+            while queue and len(running) < processes:
+                try:
+                    running.append(executor.submit(_process,queue[0]))
+                except BrokenProcessPool:
+                    broken = True
+                    break
+                pending.append((start(queue.popleft()),running[-1]))
+            if not broken:
+                concurrent.futures.wait(
+                    running,return_when=concurrent.futures.FIRST_COMPLETED)
+            while pending and pending[0][1].done():
+                file,future = pending.popleft()
+                broken = not report_future(file,future) or broken
+
+            # A worker died, e.g. killed for memory or crashed in a library;
+            # every frame in progress fails with the error, and the remaining
+            # frames continue in a new pool
+            if broken:
+                executor.shutdown(wait=True)
+                while pending:
+                    report_future(*pending.popleft())
+                executor = concurrent.futures.ProcessPoolExecutor(
+                    processes,initializer=_initialize,initargs=initargs)
+        executor.shutdown()
+    except KeyboardInterrupt:
+        # Frames in progress finish and are saved, the rest are not started
+        if verbose:
+            print('Interrupted, finishing frames in progress...')
+        for file,future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for file,future in pending:
+            if future.done() and not future.cancelled():
+                report_future(file,future)
+            elif manifest is not None:
+                manifest.release(file)
+    finally:
+        signal.signal(signal.SIGTERM,previous)
+    return records
@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Command line entry point for generating ACWE segmentations of one or more
+    Carrington rotations (CRs) without editing the run scripts, e.g.
+
+        acwe run --mode standard --cr CR2133 --config params.toml
+
+    Each mode reproduces a run script, with its default parameters and file
+    prefix: 'standard' (Standard/runACWEdefault.py), 'scaled'
+    (Scaled/runACWEscaledDefault.py), 'intensity'
+    (Intensity/runIntensityInvDefault.py) and 'conmap'
+    (ConfidenceMapping/runACWEconfidenceLevelSet_Default.py). Folders and
+    parameters are read from a .toml or .json configuration file and can be
+    overridden on the command line. Frames are segmented in a pool of worker
+    processes (see acweBatch.py). To spread CRs over several nodes, workers
+    on each node run
+
+        acwe work --mode standard --cr CR2133 CR2134 --config params.toml
+                  --coordinator /shared/acwe.sqlite
+
+    and claim batches of frames from the shared coordinator until none is
+    left (see acweCoordinator.py).
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import sys
+import json
+import inspect
+import argparse
+import numpy as np
+import pandas as pd
+from . import acweBatch, acweFunctions_v6, acweManifest
+from . import acweRegisteredCache, acweScaleStore
+from . import acweCoordinator
+
+# In[2]
+# Key Values
+
+# Root directory of the project
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Defaults shared by all modes
+DEFAULTS = {'dataFolder'  : None,
+            'saveFolder'  : None,
+            'traceFolder' : os.path.join(ROOT_DIR,'DatasetTools',
+                                         'DownloadLists',''),
+            'channel'     : '193',
+            'workers'     : None,
+            'prefetch'    : 0,
+            'retries'     : 5,
+            'wait'        : 30.,
+            'maxAttempts' : 3,
+            'cacheFolder' : None,
+            'cacheSize'   : 100.,
+            'scaleStore'  : None,
+            'storeScales' : [],
+            'format'      : 'npz'}
+
+# Output formats, see acweSaveSeg_v5.saveSeg
+FORMATS = {'npz'              : True,
+           'npz-uncompressed' : False}
+
+# Intensity scalings of Intensity/runIntensityInvDefault.py;
+# [min, max, scale type, restore for ACWE, name]
+SCALE_TYPES = [["Imin","Imax","linear",False,"LinearCompressFull."],
+               ["Imin","Imax","linear",True ,"LinearCompressFullRestored."],
+               [0     ,"Imax","Linear",False,"LinearCompress0toMax."],
+               [0     ,"Imax","linear",True ,"LinearCompress0toMaxRestored."],
+               ["Smin","Smax","linear",False,"LinearCompressSolarLimits."],
+               ["Smin","Smax","linear",True ,"LinearCompressSolarLimitsRestored."],
+               [20.0  ,2500.0,"linear",False,"LinearCompressDefault."],
+               [20.0  ,2500.0,"linear",True ,"LinearCompressDefaultRestored."],
+               ["Imin","Imax","log10", False,"Log10CompressFull."],
+               ["Imin","Imax","log10", True ,"Log10CompressFullRestored."],
+               [0     ,"Imax","log10" ,False,"Log10Compress0toMax."],
+               [0     ,"Imax","log10" ,True ,"Log10Compress0toMaxRestored."],
+               ["Smin","Smax","log10" ,False,"Log10CompressSolarLimits."],
+               ["Smin","Smax","log10" ,True ,"Log10CompressSolarLimitsRestored."],
+               [20.0  ,2500.0,"log10" ,False,"Log10CompressDefault."],
+               [20.0  ,2500.0,"log10" ,True ,"Log10CompressDefaultRestored."]]
+
+# Defaults of each mode, from its run script; 'acwe' holds the parameters of
+# acweBatch.ACWETask that differ from those of Standard/runACWEdefault.py
+MODES = {'standard'  : {'prefix' : 'ACWE.',
+                        'acwe'   : {}},
+         'scaled'    : {'prefix' : None, # see scaled_prefix
+                        'acwe'   : {'resize_param' : [4]}},
+         'intensity' : {'prefix' : 'ACWE_IntInv_',
+                        'acwe'   : {'rollingAlpha' : 0},
+                        'scaleTypes' : SCALE_TYPES},
+         'conmap'    : {'prefix' : 'ACWEconMap.',
+                        'acwe'   : {'background_weight' :
+                                    list(1/np.arange(10,101))}}}
+
+# In[3]
+# Tasks
+def scaled_prefix(resize_param,prefix=None):
+    '''
+    Prefix of a segmentation at resize_param, as in
+    Scaled/runACWEscaledDefault.py: 'ACWE.' for the standard resize_param of
+    8 and 'ACWEresize_param<resize_param>.' otherwise. If prefix is given,
+    it is formatted with resize_param, e.g. 'ACWEscaled{resize_param}.'
+    '''
+    if prefix is not None:
+        return prefix.format(resize_param=resize_param)
+    if resize_param == 8:
+        return 'ACWE.'
+    return 'ACWEresize_param' + str(resize_param) + '.'
+
+def _pngScale2():
+    # Intensity/pngScale2.py is a script folder module, not part of the
+    # package
+    folder = os.path.join(ROOT_DIR,'Intensity')
+    if folder not in sys.path:
+        sys.path.append(folder)
+    import pngScale2
+    return pngScale2
+
+class IntensityTask(acweBatch.ACWETask):
+    '''
+    Segments a frame after each intensity scaling of scaleTypes, as in
+    Intensity/runIntensityInvDefault.py. A scaling for which ACWE fails is
+    saved as NaN.
+
+    Parameters
+    ----------
+    scaleTypes : list, optional
+        [min, max, scale type, restore for ACWE, name] of each scaling.
+        min and max are values, or 'Imin'/'Imax' for the image limits and
+        'Smin'/'Smax' for the limits on the solar disk.
+
+        Default Value: SCALE_TYPES
+    prefix : str, optional
+        Prefix of the segmentation files, followed by the name of the
+        scaling.
+
+        Default Value: 'ACWE_IntInv_'
+    overwrite : bool, optional
+        Segment every scaling; otherwise scalings that already have results
+        are skipped.
+
+        Default Value: False
+    **kwargs : optional
+        See acweBatch.ACWETask.
+    '''
+
+    def __init__(self,scaleTypes=SCALE_TYPES,prefix='ACWE_IntInv_',
+                 overwrite=False,**kwargs):
+        kwargs.setdefault('rollingAlpha',0)
+        acweBatch.ACWETask.__init__(self,prefix,False,**kwargs)
+        self.scaleTypes = [list(scaleType) for scaleType in scaleTypes]
+        self.overwrite = overwrite
+
+    def outputs(self,file):
+        return [acweBatch.acwe_filename(file,self.prefix + scaleType[-1])
+                for scaleType in self.scaleTypes]
+
+    def __call__(self,I,H,file,crSaveFolder,state,telemetry=None):
+        pngScale2 = _pngScale2()
+        for scaleType,acweFile in zip(self.scaleTypes,self.outputs(file)):
+            if not self.overwrite and os.path.exists(crSaveFolder + acweFile):
+                continue
+
+            # Update Scale As Needed
+            Imin = scaleType[0];Imax = scaleType[1]
+            if Imin == 'Smin' or Imax == 'Smax':
+                Ishape = np.asarray(I.shape)
+                c_mask = state.geometryCache.get(Ishape,Ishape/2.,
+                                                 H['R_SUN']).disk_mask()
+            if Imin == 'Imin':   # Image Minimum
+                Imin = np.min(I)
+            elif Imin == 'Smin': # Minimum Value on Solar Disk
+                Imin = np.min(I[c_mask])
+            if Imax == 'Imax':   # Image Maximum
+                Imax = np.max(I)
+            elif Imax == 'Smax': # Maximum Value on Solar Disk
+                Imax = np.max(I[c_mask])
+
+            # Scale (and Unscale)
+            Itmp = pngScale2.scale(I,scaleType[2],Imin,Imax)
+            if scaleType[3]:
+                Itmp = pngScale2.unScale(Itmp,scaleType[2],Imin,Imax)
+            image_preprocess = {'min':[scaleType[0],Imin],
+                                'max':[scaleType[1],Imax],
+                                'scaleType':scaleType[2],
+                                'ReverseScale':scaleType[3]}
+
+            # Run ACWE, Saving NaN if it Fails
+            try:
+                seg,alphar,m = self.segment(Itmp,H,state,telemetry)
+            except Exception:
+                segShape = (np.asarray(I.shape)/self.resize_param).astype(int)
+                seg = np.empty(segShape); seg[:] = np.nan
+                m = np.empty(segShape); m[:] = np.nan
+                alphar = self.alpha * 1
+            self.save(crSaveFolder + acweFile,seg,H,alphar,m,telemetry,
+                      image_preprocess,state.writer)
+
+def _acwe_parameters(confidenceMap=False):
+    # Parameters that the [acwe] table and --set may give: those of ACWETask
+    # and of the run_acwe function it calls, other than those set here or
+    # per frame
+    run = acweFunctions_v6.run_acwe_confidenceMap if confidenceMap \
+          else acweFunctions_v6.run_acwe
+    keys = set(inspect.signature(acweBatch.ACWETask).parameters) | \
+           set(inspect.signature(run).parameters)
+    return keys - {'prefix','confidenceMap','compressed','kwargs','J','h',
+                   'verbose','telemetry'}
+
+def build_task(mode,config,overwrite=False):
+    '''
+    Parameters
+    ----------
+    mode : str
+        'standard', 'scaled', 'intensity' or 'conmap'
+    config : dict
+        Configuration, see load_config. config['acwe'] overrides the
+        defaults of the mode; config['prefix'] and config['scaleTypes'], if
+        given, override the prefix and the intensity scalings.
+    overwrite : bool, optional
+        See acweBatch.run_rotation.
+
+        Default Value: False
+    Raises
+    ------
+    ValueError
+        If config['acwe'] has a key that is not a parameter of
+        acweBatch.ACWETask or acweFunctions_v6.run_acwe (run_acwe_confidenceMap
+        in 'conmap' mode), so that a misspelt parameter stops the run before
+        any frame is started.
+    Returns
+    -------
+    task : acweBatch.ACWETask, acweBatch.MultiTask or
+    acweScaleStore.ScaleStoreTask
+        Segmentation performed on each frame. In 'scaled' mode with
+        config['scaleStore'], the frames are preprocessed at every
+        resize_param, and config['storeScales'], in the store.
+    '''
+    if mode not in MODES:
+        raise ValueError('Unknown mode ' + repr(mode) + ', choose from ' +
+                         ', '.join(MODES))
+    unknown = sorted(set(config.get('acwe',{})) -
+                     _acwe_parameters(mode == 'conmap'))
+    if unknown:
+        raise ValueError('unknown ACWE parameter(s) ' + ', '.join(unknown) +
+                         ', see acweFunctions_v6.run_acwe')
+    params = dict(MODES[mode]['acwe'])
+    params.update(config.get('acwe',{}))
+    params['compressed'] = FORMATS[config.get('format',DEFAULTS['format'])]
+    prefix = config.get('prefix',MODES[mode]['prefix'])
+
+    if mode == 'scaled':
+        resize_params = np.atleast_1d(params.pop('resize_param')).tolist()
+        tasks = [acweBatch.ACWETask(scaled_prefix(r,prefix),False,r,**params)
+                 for r in resize_params]
+        if config.get('scaleStore') is not None:
+            store = acweScaleStore.ScaleStore(
+                config['scaleStore'],
+                params.get('correctLimbBrightening',True),
+                params.get('dtype',np.float64),
+                params.get('interpolation','Bi-cubic'))
+            return acweScaleStore.ScaleStoreTask(
+                tasks,store,config.get('storeScales',[]),overwrite)
+        return acweBatch.MultiTask(tasks,overwrite)
+    if mode == 'intensity':
+        return IntensityTask(config.get('scaleTypes',
+                                        MODES[mode]['scaleTypes']),
+                             prefix,overwrite,**params)
+    return acweBatch.ACWETask(prefix,mode == 'conmap',**params)
+
+# In[4]
+# Configuration
+def load_config(filename=None):
+    '''
+    Reads a configuration file, e.g.
+
+        dataFolder = '/data/newDataset/'
+        saveFolder = '/data/Standard/'
+        workers = 8
+
+        [acwe]
+        background_weight = 0.02
+        engine = 'sparse'
+
+    Top level keys are those of DEFAULTS, 'prefix' and 'scaleTypes'.
+    prefetch is that of acweBatch.run_rotation, retries and wait are those
+    of acweBatch.load_image, maxAttempts that of acweManifest.Manifest, and
+    cacheFolder and cacheSize (in GB) the folder and size of the registered
+    image cache (see acweRegisteredCache.py), and scaleStore and storeScales
+    the folder and further scales of the preprocessed image store of
+    'scaled' mode (see acweScaleStore.py). The [acwe] table holds parameters
+    of acweBatch.ACWETask, i.e. of acweFunctions_v6.run_acwe.
+
+    Parameters
+    ----------
+    filename : str, optional
+        .toml or .json file. .toml files require Python 3.11 or the tomli
+        package. If None, only the defaults are used.
+
+        Default Value: None
+    Returns
+    -------
+    config : dict
+        DEFAULTS updated with the contents of filename.
+    '''
+    config = dict(DEFAULTS)
+    if filename is None:
+        return config
+    if filename.endswith('.json'):
+        with open(filename) as f:
+            contents = json.load(f)
+    else:
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        with open(filename,'rb') as f:
+            contents = tomllib.load(f)
+    unknown = set(contents) - set(DEFAULTS) - {'acwe','prefix','scaleTypes'}
+    if unknown:
+        raise ValueError('Unknown configuration keys: ' +
+                         ', '.join(sorted(unknown)))
+    config.update(contents)
+    return config
+
+def _value(text):
+    # Value of a --set option: JSON if possible, e.g. 0.02, true or [1,2,4],
+    # otherwise a string
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def _record(mode,config,cr):
+    # Parameters of a run, saved with its results so that it can be resumed
+    keys = ['channel','format','prefix','scaleTypes','acwe']
+    record = {'mode':mode,'cr':cr}
+    record.update({k:config[k] for k in keys if k in config})
+    return json.loads(json.dumps(record,default=float))
+
+# In[5]
+# Command Line
+def _add_arguments(command):
+    # Options shared by the run and work commands
+    command.add_argument('--mode',choices=list(MODES),default='standard',
+                         help='Run script to reproduce (default: standard)')
+    command.add_argument('--cr',nargs='+',required=True,
+                         help='CR(s), named as their lists, e.g. CR2133')
+    command.add_argument('--config',help='.toml or .json configuration file')
+    command.add_argument('--data-folder',dest='dataFolder',
+                         help='Dataset folder, holding a folder for each CR')
+    command.add_argument('--save-folder',dest='saveFolder',
+                         help='Folder where results are saved, in a folder '
+                              'for each CR')
+    command.add_argument('--trace-folder',dest='traceFolder',
+                         help='Folder of the CR*.csv lists (default: '
+                              'DatasetTools/DownloadLists/)')
+    command.add_argument('--channel',help='Column of the CR*.csv list to '
+                                          'segment (default: 193)')
+    command.add_argument('--prefix',help='Prefix of the segmentation files')
+    command.add_argument('--workers',type=int,help='Worker processes; 0 '
+                         'segments frames in this process (default: all '
+                         'CPUs)')
+    command.add_argument('--prefetch',type=int,help='With --workers 0, '
+                         'frames opened ahead in a loader thread while ACWE '
+                         'runs, with results saved in a writer thread '
+                         '(default: 0)')
+    command.add_argument('--format',choices=list(FORMATS),
+                         help='Output format (default: npz, compressed)')
+    command.add_argument('--set',action='append',default=[],
+                         metavar='KEY=VALUE',
+                         help='Set an ACWE parameter, e.g. '
+                              'background_weight=0.02; may be repeated')
+    command.add_argument('--overwrite',action='store_true',
+                         help='Segment every frame, replacing existing '
+                              'results')
+    command.add_argument('--cache-folder',dest='cacheFolder',
+                         help='Registered image cache, shared with other '
+                              'runs and the run scripts')
+    command.add_argument('--scale-store',dest='scaleStore',
+                         help="Preprocessed image store of 'scaled' mode, so "
+                              'that each frame is resized and corrected once '
+                              'for every resize_param')
+    command.add_argument('--max-attempts',dest='maxAttempts',type=int,
+                         help='Attempts, over all runs, after which a '
+                              'failing frame (run) or batch (work) is '
+                              'quarantined (default: 3)')
+    command.add_argument('--retry-quarantined',action='store_true',
+                         help='Retry frames (run) or batches (work) '
+                              'quarantined by earlier runs')
+    command.add_argument('--quiet',action='store_true',
+                         help='Only report the summary')
+
+def parser():
+    '''
+    Returns
+    -------
+    parser : argparse.ArgumentParser
+        Parser of the acwe command.
+    '''
+    parser = argparse.ArgumentParser(prog='acwe',description='Generate ACWE '
+                                     'segmentations of Carrington rotations.')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    run = commands.add_parser('run',help='Segment one or more CRs.')
+    _add_arguments(run)
+    run.add_argument('--resume',action='store_true',
+                     help='Continue a previous run of the same mode and '
+                          'parameters, skipping frames with results')
+    work = commands.add_parser('work',help='Segment batches of frames of '
+                               'one or more CRs, claimed from a coordinator '
+                               'shared by workers on any number of nodes.')
+    _add_arguments(work)
+    work.add_argument('--coordinator',required=True,
+                      help='SQLite database of the batches, shared by the '
+                           'workers (see acweCoordinator.py)')
+    work.add_argument('--batch-size',dest='batchSize',type=int,default=24,
+                      help='Frames per batch (default: 24)')
+    work.add_argument('--lease',type=float,default=600.,
+                      help='Seconds after which the batches of a worker that '
+                           'stopped renewing them are claimed by others '
+                           '(default: 600)')
+    work.add_argument('--worker-id',dest='worker',
+                      help='Name of this worker (default: host:pid)')
+    work.add_argument('--poll',type=float,default=30.,
+                      help='Seconds between claims while other workers hold '
+                           'the remaining batches (default: 30)')
+    return parser
+
+def _configure(args):
+    # Configuration of a command, from its configuration file and options;
+    # None if it is incomplete
+    config = load_config(args.config)
+    for key in ['dataFolder','saveFolder','traceFolder','channel','prefix',
+                'workers','prefetch','format','maxAttempts','cacheFolder',
+                'scaleStore']:
+        if getattr(args,key) is not None:
+            config[key] = getattr(args,key)
+    config['acwe'] = dict(config.get('acwe',{}))
+    for setting in args.set:
+        key,_,value = setting.partition('=')
+        config['acwe'][key.strip()] = _value(value)
+    for key in ['dataFolder','saveFolder']:
+        if config[key] is None:
+            print('acwe: ' + key + ' must be given in the configuration '
+                  'file or on the command line',file=sys.stderr)
+            return None
+    return config
+
+def _build_task(args,config):
+    # Task of a command; None if its parameters are invalid
+    try:
+        return build_task(args.mode,config,args.overwrite)
+    except ValueError as error:
+        print('acwe: ' + str(error),file=sys.stderr)
+        return None
+
+def _cache(config):
+    # Registered image cache of a configuration, if any
+    if config['cacheFolder'] is None:
+        return None
+    return acweRegisteredCache.RegisteredCache(config['cacheFolder'],
+                                               config['cacheSize']*1e9)
+
+def run(args):
+    '''
+    Runs the 'run' command with the parsed args.
+
+    Returns
+    -------
+    status : int
+        0 if every frame was segmented, 1 if any frame failed or was left
+        by an interrupt, and 2 if a CR could not be started.
+    '''
+    config = _configure(args)
+    if config is None:
+        return 2
+    task = _build_task(args,config)
+    if task is None:
+        return 2
+
+    cache = _cache(config)
+    status = 0
+    for cr in args.cr:
+        crSaveFolder = os.path.join(config['saveFolder'],cr,'')
+        recordFile = crSaveFolder + 'acweRun.' + args.mode + '.json'
+        record = _record(args.mode,config,cr)
+
+        # Refuse to mix results of different runs
+        if os.path.exists(recordFile) and not args.overwrite:
+            with open(recordFile) as f:
+                previous = json.load(f)
+            if not args.resume:
+                print('acwe: ' + cr + ' already has results of a ' +
+                      args.mode + ' run, use --resume to continue it or '
+                      '--overwrite to replace it',file=sys.stderr)
+                status = 2
+                continue
+            if previous != record:
+                print('acwe: the parameters of ' + cr + ' differ from those '
+                      'of the run being resumed (' + recordFile + '), use '
+                      '--overwrite to replace it',file=sys.stderr)
+                status = 2
+                continue
+
+        # Frames of the CR
+        data = pd.read_csv(os.path.join(config['traceFolder'],cr + '.csv'),
+                           header=0)
+        files = data[str(config['channel'])]
+
+        # Segment, with the frames left to segment from the job manifest
+        os.makedirs(crSaveFolder,exist_ok=True)
+        with open(recordFile,'w') as f:
+            json.dump(record,f,indent=1)
+        with acweManifest.Manifest(acweManifest.manifest_file(
+                crSaveFolder,task.prefix),config['maxAttempts']) as manifest:
+            if args.retry_quarantined:
+                manifest.reset(status=acweManifest.QUARANTINED)
+            acweBatch.run_rotation(files,os.path.join(config['dataFolder'],
+                                                      cr,''),
+                                   crSaveFolder,task,config['workers'],
+                                   args.overwrite,not args.quiet,
+                                   config['retries'],config['wait'],
+                                   manifest=manifest,cache=cache,
+                                   prefetch=config['prefetch'])
+            counts = manifest.summary()
+
+        # Summary
+        print('{}: {} frames, {} done, {} failed, {} quarantined, {} left'
+              .format(cr,len(files),counts['done'],counts['failed'],
+                      counts['quarantined'],counts['pending']+
+                                            counts['running']))
+        if counts['done'] < len(files):
+            status = max(status,1)
+    return status
+
+def work(args):
+    '''
+    Runs the 'work' command with the parsed args: adds the batches of the
+    CRs to the coordinator, then segments batches claimed from it until
+    none is left (see acweCoordinator.run_worker). Any number of workers,
+    on any number of nodes, can share the coordinator.
+
+    Returns
+    -------
+    status : int
+        0 if every batch of the coordinator is done, 1 otherwise, e.g. if
+        batches were quarantined or this worker was interrupted, and 2 if
+        the worker could not be started.
+    '''
+    config = _configure(args)
+    if config is None:
+        return 2
+    task = _build_task(args,config)
+    if task is None:
+        return 2
+    coordinator = acweCoordinator.SQLiteCoordinator(args.coordinator,
+                                                    args.lease,
+                                                    config['maxAttempts'])
+
+    # Refuse to mix results of different parameters
+    record = json.loads(json.dumps(_record(args.mode,config,None)))
+    if coordinator.settings(record) != record:
+        print('acwe: the parameters differ from those of the other workers '
+              'of ' + args.coordinator + ', use a new coordinator',
+              file=sys.stderr)
+        return 2
+
+    # Batches of the CRs, then segment batches of any CR of the coordinator
+    coordinator.add(acweCoordinator.frame_batches(config['traceFolder'],
+                                                  args.cr,config['channel'],
+                                                  args.batchSize))
+    if args.retry_quarantined:
+        coordinator.reset(acweCoordinator.QUARANTINED)
+    batches = acweCoordinator.run_worker(coordinator,task,
+                                         config['dataFolder'],
+                                         config['saveFolder'],args.worker,
+                                         config['workers'],args.overwrite,
+                                         not args.quiet,config['retries'],
+                                         config['wait'],_cache(config),
+                                         config['prefetch'],args.poll)
+
+    # Summary
+    counts = coordinator.summary()
+    print('{}: {} batches segmented here; coordinator: {} done, {} '
+          'quarantined, {} left'.format(args.worker or
+                                        acweCoordinator.default_worker(),
+                                        len(batches),counts['done'],
+                                        counts['quarantined'],
+                                        counts['pending']+counts['running']))
+    return 0 if counts['done'] == sum(counts.values()) else 1
+
+def main(argv=None):
+    '''
+    Entry point of the acwe command.
+    '''
+    args = parser().parse_args(argv)
+    if args.command == 'run':
+        return run(args)
+    if args.command == 'work':
+        return work(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
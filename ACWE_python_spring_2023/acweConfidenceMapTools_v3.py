@@ -14,7 +14,7 @@ from . import acweRestoreScale
 # Smart Combine Function (Recommended default)
 def smartConMap(SEG,ACWEHEADER,buffer=0.05,normalize=True,restoreScale=True,
                 interpolation='Bi-linear',split=0.5,returnInitMask=False,
-                returnBackgroundWeights=False):
+                returnBackgroundWeights=False,dtype=np.float64):
     """
     Generate Confidence map from input segmentation group. This function will
     attempt to recognize and remove Change of Target Cases
@@ -51,6 +51,10 @@ def smartConMap(SEG,ACWEHEADER,buffer=0.05,normalize=True,restoreScale=True,
     returnBackgroundWeights : bool, optional
         Return an copy of background weights that are part of the final 
         segmentation. The default is False.
+    dtype : numpy dtype, optional
+        Floating point type of the upscaled segmentations and of the 
+        normalized map, e.g. np.float32 for full resolution maps. The default
+        is np.float64.
 
     Returns
     -------
@@ -126,13 +130,13 @@ def smartConMap(SEG,ACWEHEADER,buffer=0.05,normalize=True,restoreScale=True,
         # Upscale
         ConMap,init_mask = acweRestoreScale.upscaleConMap(ConMap,newHeader,
                                                           interpolation,
-                                                          split,True)
+                                                          split,True,dtype)
     # Combine Segmentations
     ConMap = np.sum(ConMap.astype(int),axis=0)
     
     # Normalize Map if User Requests
     if normalize:
-        ConMap = ConMap / float(SegNumber)
+        ConMap = np.divide(ConMap,float(SegNumber),dtype=dtype)
     
     # Return Confidence Map
     if returnInitMask and returnBackgroundWeights:
@@ -147,7 +151,8 @@ def smartConMap(SEG,ACWEHEADER,buffer=0.05,normalize=True,restoreScale=True,
 # In[3]
 # Simple Combine Function
 def conMapCombine(SEG,ACWEHEADER,normalize=True,restoreScale=True,
-                  interpolation='Bi-linear',split=0.5,returnInitMask=False):
+                  interpolation='Bi-linear',split=0.5,returnInitMask=False,
+                  dtype=np.float64):
     """
     Generate Confidence map without accounting for Change of Target.
 
@@ -173,6 +178,10 @@ def conMapCombine(SEG,ACWEHEADER,normalize=True,restoreScale=True,
     returnInitMask : bool, optional
         Return an copy of the initial mask at the same scale. The default is 
         False.
+    dtype : numpy dtype, optional
+        Floating point type of the upscaled segmentations and of the 
+        normalized map, e.g. np.float32 for full resolution maps. The default
+        is np.float64.
 
     Returns
     -------
@@ -189,7 +198,7 @@ def conMapCombine(SEG,ACWEHEADER,normalize=True,restoreScale=True,
         # Upscale
         ConMap,init_mask = acweRestoreScale.upscaleConMap(SEG,ACWEHEADER,
                                                           interpolation,
-                                                          split,True)
+                                                          split,True,dtype)
         
         # Combine
         ConMap = np.sum(ConMap,axis=0)
@@ -200,7 +209,8 @@ def conMapCombine(SEG,ACWEHEADER,normalize=True,restoreScale=True,
     
     # Normalize Map if User Requests
     if normalize:
-        ConMap = ConMap / float(len(ACWEHEADER['BACKGROUND_WEIGHT']))
+        ConMap = np.divide(ConMap,float(len(ACWEHEADER['BACKGROUND_WEIGHT'])),
+                           dtype=dtype)
         
     # Return Results
     if returnInitMask:
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Work distribution for segmenting many Carrington rotations (CRs) with
+    workers on any number of nodes. The frames of the CR*.csv lists in
+    DatasetTools/DownloadLists are split into batches, which workers claim
+    from a coordinator under a lease. A worker renews the leases of its
+    batches while it segments them, so the batches of a worker that dies are
+    claimed again by another worker once their lease expires. Completion is
+    idempotent: results are saved atomically and frames with results are
+    skipped (see acweBatch.py), so a batch segmented twice, e.g. by a worker
+    that was only slow, gives the same results, and is counted once.
+
+    Coordinators are pluggable: any object with the methods of Coordinator
+    can be used. SQLiteCoordinator, the default, keeps the batches in an
+    SQLite database, locked by SQLite, for workers on one machine or on a
+    file system with reliable locks.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+import pandas as pd
+from . import acweBatch
+
+# In[2]
+# Key Values
+
+# Batch status
+PENDING     = 'pending'     # Not claimed, or released
+RUNNING     = 'running'     # Claimed by a worker, under a lease
+DONE        = 'done'        # Every frame segmented
+QUARANTINED = 'quarantined' # Claimed maxAttempts times without success
+STATUS = [PENDING,RUNNING,DONE,QUARANTINED]
+
+SCHEMA = ['''CREATE TABLE IF NOT EXISTS batches (
+                 id       TEXT PRIMARY KEY,
+                 cr       TEXT NOT NULL,
+                 files    TEXT NOT NULL,
+                 status   TEXT NOT NULL,
+                 worker   TEXT,
+                 leased   REAL,
+                 attempts INTEGER NOT NULL DEFAULT 0,
+                 done     INTEGER NOT NULL DEFAULT 0,
+                 failed   INTEGER NOT NULL DEFAULT 0,
+                 error    TEXT,
+                 finished REAL)''',
+          '''CREATE TABLE IF NOT EXISTS settings (
+                 id       INTEGER PRIMARY KEY CHECK (id = 0),
+                 record   TEXT NOT NULL)''']
+
+# In[3]
+# Batches
+def frame_batches(traceFolder,crs,channel='193',batchSize=24):
+    '''
+    Splits the frames of CRs into batches.
+
+    Parameters
+    ----------
+    traceFolder : str
+        Folder of the CR*.csv lists, e.g. DatasetTools/DownloadLists/
+    crs : [str]
+        CRs, named as their lists, e.g. ['CR2133','CR2134']
+    channel : str, optional
+        Column of the lists to segment.
+
+        Default Value: '193'
+    batchSize : int, optional
+        Frames per batch; 24 is a day of the hourly lists.
+
+        Default Value: 24
+    Returns
+    -------
+    batches : [dict]
+        Batches with an 'id' (e.g. 'CR2133/193/0003'), the 'cr' and its
+        'files', in the order of the lists.
+    '''
+    batches = []
+    for cr in crs:
+        data = pd.read_csv(os.path.join(traceFolder,cr + '.csv'),header=0)
+        files = list(data[str(channel)])
+        for i in range(0,len(files),batchSize):
+            batches.append({'id':'{}/{}/{:04d}'.format(cr,channel,
+                                                       i//batchSize),
+                            'cr':cr,'files':files[i:i+batchSize]})
+    return batches
+
+def default_worker():
+    '''
+    Returns
+    -------
+    worker : str
+        Name of this worker, unique across nodes, e.g. 'node12:4711'
+    '''
+    return socket.gethostname() + ':' + str(os.getpid())
+
+# In[4]
+# Coordinators
+class Coordinator:
+    '''
+    Interface of a coordinator, which hands out batches to workers. Other
+    backends, e.g. a database server shared by the nodes of a cluster,
+    implement these methods.
+    '''
+
+    def add(self,batches):
+        '''
+        Adds batches (see frame_batches) not yet known, as pending. Every
+        worker may add the same batches.
+        '''
+        raise NotImplementedError
+
+    def claim(self,worker):
+        '''
+        Returns
+        -------
+        batch : dict
+            A pending batch, or a batch whose lease has expired, now leased
+            to worker, with its 'id', 'cr', 'files' and 'attempts'; None if
+            there is none.
+        '''
+        raise NotImplementedError
+
+    def renew(self,batchId,worker):
+        '''
+        Extends the lease of worker on a batch. Returns False if the batch
+        is no longer leased to worker.
+        '''
+        raise NotImplementedError
+
+    def complete(self,batchId,worker,records):
+        '''
+        Records the result of a batch, with the records of its frames (see
+        acweBatch.run_rotation). Completing a batch that is done has no
+        effect. Returns the status of the batch.
+        '''
+        raise NotImplementedError
+
+    def release(self,batchId,worker):
+        '''
+        Returns a batch leased to worker to pending, e.g. on an interrupt,
+        without counting the attempt.
+        '''
+        raise NotImplementedError
+
+    def summary(self):
+        '''
+        Returns
+        -------
+        counts : dict
+            Number of batches with each status.
+        '''
+        raise NotImplementedError
+
+    def settings(self,record):
+        '''
+        Returns the settings of the run (e.g. its parameters), recording
+        record if there are none yet, so that workers can check that they
+        all run with the same settings.
+        '''
+        raise NotImplementedError
+
+class SQLiteCoordinator(Coordinator):
+    '''
+    Coordinator backed by an SQLite database. Each call opens its own
+    connection, so it can be used by any number of processes and threads.
+    Leases are compared with time.time() of each worker, so the clocks of
+    the nodes must be synchronized.
+
+    Parameters
+    ----------
+    filename : str
+        SQLite database, created if it does not exist.
+    leaseTime : float, optional
+        Seconds for which a claimed batch is leased; a worker renews its
+        lease every leaseTime/3 seconds while it segments the batch (see
+        run_worker).
+
+        Default Value: 600.0
+    maxAttempts : int, optional
+        Number of claims after which a batch that has not been completed,
+        e.g. because its workers died, or that still has failed frames, is
+        quarantined.
+
+        Default Value: 3
+    timeout : float, optional
+        Seconds to wait for the database when it is locked.
+
+        Default Value: 60.0
+    '''
+
+    def __init__(self,filename,leaseTime=600.,maxAttempts=3,timeout=60.):
+        self.filename = filename
+        self.leaseTime = leaseTime
+        self.maxAttempts = maxAttempts
+        self.timeout = timeout
+        with self._connect() as connection:
+            for schema in SCHEMA:
+                connection.execute(schema)
+
+    def _connect(self):
+        # Short lived connection in autocommit mode; transactions are begun
+        # explicitly, with BEGIN IMMEDIATE when they write
+        connection = sqlite3.connect(self.filename,timeout=self.timeout,
+                                     isolation_level=None)
+        return _Connection(connection)
+
+    def add(self,batches):
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'INSERT OR IGNORE INTO batches (id,cr,files,status) VALUES '
+                '(?,?,?,?)',[(batch['id'],batch['cr'],
+                              json.dumps(list(batch['files'])),PENDING)
+                             for batch in batches])
+            connection.execute('COMMIT')
+
+    def claim(self,worker):
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+
+            # Batches whose workers keep dying
+            connection.execute(
+                'UPDATE batches SET status=? WHERE status=? AND leased<? AND '
+                'attempts>=?',(QUARANTINED,RUNNING,now,self.maxAttempts))
+
+            # First pending or expired batch
+            row = connection.execute(
+                'SELECT id,cr,files,attempts FROM batches WHERE status=? OR '
+                '(status=? AND leased<?) ORDER BY rowid LIMIT 1',
+                (PENDING,RUNNING,now)).fetchone()
+            if row is None:
+                connection.execute('COMMIT')
+                return None
+            connection.execute(
+                'UPDATE batches SET status=?,worker=?,leased=?,'
+                'attempts=attempts+1 WHERE id=?',
+                (RUNNING,worker,now+self.leaseTime,row[0]))
+            connection.execute('COMMIT')
+        return {'id':row[0],'cr':row[1],'files':json.loads(row[2]),
+                'attempts':row[3]+1}
+
+    def renew(self,batchId,worker):
+        with self._connect() as connection:
+            cursor = connection.execute(
+                'UPDATE batches SET leased=? WHERE id=? AND worker=? AND '
+                'status=?',(time.time()+self.leaseTime,batchId,worker,
+                            RUNNING))
+        return cursor.rowcount == 1
+
+    def complete(self,batchId,worker,records):
+        failed = [record for record in records
+                  if record['status'] not in ['done','skipped']]
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            status,owner,attempts = connection.execute(
+                'SELECT status,worker,attempts FROM batches WHERE id=?',
+                (batchId,)).fetchone()
+
+            # Done already, e.g. by another worker after a lease expired;
+            # or failed here while another worker has it
+            if status == DONE or (failed and owner != worker):
+                connection.execute('COMMIT')
+                return status
+
+            if not failed:
+                status = DONE
+            elif attempts >= self.maxAttempts:
+                status = QUARANTINED
+            else:
+                status = PENDING
+            connection.execute(
+                'UPDATE batches SET status=?,worker=?,leased=NULL,done=?,'
+                'failed=?,error=?,finished=? WHERE id=?',
+                (status,worker,len(records)-len(failed),len(failed),
+                 failed[0]['error'] if failed else None,time.time(),batchId))
+            connection.execute('COMMIT')
+        return status
+
+    def release(self,batchId,worker):
+        with self._connect() as connection:
+            connection.execute(
+                'UPDATE batches SET status=?,leased=NULL,attempts=attempts-1 '
+                'WHERE id=? AND worker=? AND status=?',
+                (PENDING,batchId,worker,RUNNING))
+
+    def reset(self,status=QUARANTINED):
+        '''
+        Returns the batches with status to pending, with no attempts, e.g.
+        to retry quarantined batches.
+        '''
+        with self._connect() as connection:
+            connection.execute(
+                'UPDATE batches SET status=?,attempts=0,leased=NULL WHERE '
+                'status=?',(PENDING,status))
+
+    def summary(self):
+        counts = dict.fromkeys(STATUS,0)
+        with self._connect() as connection:
+            counts.update(connection.execute(
+                'SELECT status,COUNT(*) FROM batches GROUP BY status'))
+        return counts
+
+    def batches(self,status=None):
+        '''
+        Returns
+        -------
+        batches : [dict]
+            Every batch, or those with status, with its cr, status, last
+            worker, lease expiry (time.time()), attempts, number of done and
+            failed frames, error of its first failed frame and finish time.
+        '''
+        query = 'SELECT id,cr,status,worker,leased,attempts,done,failed,' + \
+                'error,finished FROM batches'
+        args = ()
+        if status is not None:
+            query += ' WHERE status=?'
+            args = (status,)
+        keys = ['id','cr','status','worker','leased','attempts','done',
+                'failed','error','finished']
+        with self._connect() as connection:
+            return [dict(zip(keys,row)) for row in
+                    connection.execute(query + ' ORDER BY rowid',args)]
+
+    def settings(self,record):
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('INSERT OR IGNORE INTO settings (id,record) '
+                               'VALUES (0,?)',(json.dumps(record),))
+            stored, = connection.execute(
+                'SELECT record FROM settings WHERE id=0').fetchone()
+            connection.execute('COMMIT')
+        return json.loads(stored)
+
+class _Connection:
+    # Closes an SQLite connection at the end of a with block (the with block
+    # of sqlite3.Connection only ends its transaction)
+    def __init__(self,connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self.connection
+
+    def __exit__(self,*args):
+        self.connection.close()
+
+def as_coordinator(coordinator,leaseTime=600.,maxAttempts=3):
+    '''
+    Returns coordinator if it is a Coordinator (or any object with its
+    methods), and an SQLiteCoordinator if it is a filename.
+    '''
+    if isinstance(coordinator,str):
+        return SQLiteCoordinator(coordinator,leaseTime,maxAttempts)
+    return coordinator
+
+# In[5]
+# Worker
+class _Heartbeat:
+    # Renews the lease of a batch in a thread while it is segmented
+    def __init__(self,coordinator,batchId,worker,interval):
+        self.lost = False
+        self._stop = threading.Event()
+        def beat():
+            while not self._stop.wait(interval):
+                if not coordinator.renew(batchId,worker):
+                    self.lost = True
+                    return
+        self._thread = threading.Thread(target=beat,daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+def run_worker(coordinator,task,dataFolder,saveFolder,worker=None,
+               processes=0,overwrite=False,verbose=True,retries=5,wait=30.,
+               cache=None,prefetch=0,poll=30.,renew=None):
+    '''
+    Claims batches from coordinator and segments them with
+    acweBatch.run_rotation until no batch is left.
+
+    Parameters
+    ----------
+    coordinator : Coordinator or str
+        Coordinator of the batches (see frame_batches and Coordinator.add),
+        or the filename of an SQLiteCoordinator.
+    task : acweBatch.ACWETask
+        Segmentation performed on each frame, see acweBatch.run_rotation.
+    dataFolder : str
+        Dataset folder, holding a folder for each CR.
+    saveFolder : str
+        Folder where results are saved, in a folder for each CR.
+    worker : str, optional
+        Name of this worker. If None, default_worker().
+
+        Default Value: None
+    processes, overwrite, verbose, retries, wait, cache, prefetch : optional
+        See acweBatch.run_rotation. processes defaults to 0 here, as one
+        worker is usually run per node, or per core.
+    poll : float, optional
+        Seconds to wait, when no batch can be claimed but other workers
+        still hold batches, before trying again; their batches are claimed
+        if their leases expire.
+
+        Default Value: 30.0
+    renew : float, optional
+        Seconds between renewals of the lease of a batch. If None,
+        coordinator.leaseTime/3.
+
+        Default Value: None
+    Returns
+    -------
+    batches : [dict]
+        Batches segmented by this worker, with their 'id', 'status' and
+        frame 'records'.
+    '''
+    coordinator = as_coordinator(coordinator)
+    worker = default_worker() if worker is None else worker
+    if renew is None:
+        renew = coordinator.leaseTime/3.
+    batches = []
+    while True:
+        batch = coordinator.claim(worker)
+
+        # Nothing to claim - wait for the batches of other workers, which
+        # are claimed here if those workers die
+        if batch is None:
+            if coordinator.summary()[RUNNING] == 0:
+                break
+            time.sleep(poll)
+            continue
+
+        if verbose:
+            print(worker,'claimed',batch['id'],'(attempt',
+                  str(batch['attempts']) + ',',len(batch['files']),
+                  'frames)')
+        heartbeat = _Heartbeat(coordinator,batch['id'],worker,renew)
+        try:
+            records = acweBatch.run_rotation(
+                batch['files'],os.path.join(dataFolder,batch['cr'],''),
+                os.path.join(saveFolder,batch['cr'],''),task,processes,
+                overwrite,verbose,retries,wait,cache=cache,prefetch=prefetch)
+        finally:
+            heartbeat.stop()
+
+        # Interrupted - leave the batch to another worker
+        if len(records) < len(batch['files']):
+            coordinator.release(batch['id'],worker)
+            if verbose:
+                print(worker,'released',batch['id'])
+            break
+
+        status = coordinator.complete(batch['id'],worker,records)
+        if verbose:
+            print(worker,batch['id'],status +
+                  (' (lease lost)' if heartbeat.lost else ''))
+        batches.append({'id':batch['id'],'status':status,'records':records})
+    return batches
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Solar disk geometry (radius map, disk masks and limb annulus labels) for
+    an image of a given size, solar center and solar radius, with a least
+    recently used (LRU) cache so that geometry shared by many images, such as
+    the registered images of a Carrington rotation, is computed only once.
+
+    The masks are identical to those of make_circle_mask, as both compare the
+    same squared radii.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import collections
+import numpy as np
+from .ACWE_python_v3 import correct_limb_brightening
+
+# In[2]
+# Disk Geometry
+class DiskGeometry:
+    '''
+    Geometry of the solar disk within an image. All maps are computed the
+    first time they are requested and kept for later requests; they are 
+    returned read-only, since they are shared by every user of the geometry.
+
+    Parameters
+    ----------
+    im_size : [int]
+        Dimensions of the image.
+    sun_center : [float]
+        Coordinates of the center of the sun in the image, as returned by
+        resize_EUV.
+    sun_radius : float
+        Radius of the Sun in the image.
+    '''
+
+    def __init__(self,im_size,sun_center,sun_radius):
+        self.im_size = tuple(int(s) for s in im_size)
+        self.sun_center = np.asarray(sun_center,dtype=float)
+        self.sun_radius = float(sun_radius)
+        self._d2 = None
+        self._masks = {}
+        self._labels = {}
+
+    def squared_radius(self):
+        '''
+        Returns
+        -------
+        d2 : [float]
+            Squared distance of every pixel from the solar center.
+        '''
+        if self._d2 is None:
+            d2 = correct_limb_brightening.squared_radius(self.sun_center,
+                                                         self.im_size)
+            d2.setflags(write=False)
+            self._d2 = d2
+        return self._d2
+
+    def radius(self):
+        '''
+        Returns
+        -------
+        d : [float]
+            Distance of every pixel from the solar center, in pixels.
+        '''
+        return np.sqrt(self.squared_radius())
+
+    def disk_mask(self,scale=1.):
+        '''
+        Parameters
+        ----------
+        scale : float, optional
+            Radius of the mask as a fraction of the solar radius.
+
+            Default Value: 1.0
+        Returns
+        -------
+        mask : [bool]
+            Mask of the pixels within sun_radius*scale of the solar center,
+            as make_circle_mask(sun_center,im_size,sun_radius*scale).
+        '''
+        if scale not in self._masks:
+            r = self.sun_radius*scale
+            mask = self.squared_radius()<=r**2
+            mask.setflags(write=False)
+            self._masks[scale] = mask
+        return self._masks[scale]
+
+    def annulus_labels(self,inner,outer):
+        '''
+        Parameters
+        ----------
+        inner, outer : float
+            Inner and outer radius, in pixels, of a set of 1 pixel wide
+            annuli with inner radii np.arange(inner,outer,1).
+        Returns
+        -------
+        radii : [float]
+            Inner radius of each annulus.
+        labels : [int]
+            Index of the annulus each pixel belongs to, or -1 for pixels
+            outside all annuli.
+        '''
+        key = (inner,outer)
+        if key not in self._labels:
+            radii = np.arange(inner,outer,1)
+            labels = correct_limb_brightening.annulus_index(
+                self.squared_radius(),radii)
+            radii.setflags(write=False); labels.setflags(write=False)
+            self._labels[key] = (radii,labels)
+        return self._labels[key]
+
+    def matches(self,im_size,sun_center,sun_radius,tolerance=0.):
+        '''
+        Returns
+        -------
+        match : bool
+            True if this geometry is for an image of size im_size and its
+            solar center and radius are within tolerance pixels of sun_center
+            and sun_radius.
+        '''
+        return self.im_size == tuple(int(s) for s in im_size) and \
+            np.all(np.abs(self.sun_center-np.asarray(sun_center))<=tolerance) \
+            and abs(self.sun_radius-sun_radius)<=tolerance
+
+# In[3]
+# Disk Geometry Cache
+class DiskGeometryCache:
+    '''
+    Least recently used (LRU) cache of DiskGeometry objects.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Number of geometries kept. Each geometry holds a squared radius map
+        and any masks and annulus labels requested from it, so memory grows
+        with both maxsize and the image dimensions.
+
+        Default Value: 4
+    tolerance : float, optional
+        Default distance, in pixels, within which the solar center and radius
+        of a cached geometry are considered the same as those requested. The
+        default of 0 only reuses geometries with exactly the same center and
+        radius. After registration (e.g. aiapy.calibrate.register), the
+        center and radius of a rotation are nearly constant, and a small
+        tolerance lets all of its images share one geometry.
+
+        Default Value: 0.0
+    '''
+
+    def __init__(self,maxsize=4,tolerance=0.):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self,im_size,sun_center,sun_radius,tolerance=None):
+        '''
+        Parameters
+        ----------
+        im_size : [int]
+            Dimensions of the image.
+        sun_center : [float]
+            Coordinates of the center of the sun in the image.
+        sun_radius : float
+            Radius of the Sun in the image.
+        tolerance : float, optional
+            Tolerance of this request, see DiskGeometryCache. If None, the
+            tolerance of the cache is used.
+
+            Default Value: None
+        Returns
+        -------
+        geometry : DiskGeometry
+            Cached geometry within tolerance of the request, or a new geometry
+            if there is none.
+        '''
+        if tolerance is None:
+            tolerance = self.tolerance
+
+        # Most recently used geometry first
+        for key in reversed(self._entries):
+            geometry = self._entries[key]
+            if geometry.matches(im_size,sun_center,sun_radius,tolerance):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return geometry
+
+        # New geometry, evicting the least recently used if needed
+        self.misses += 1
+        geometry = DiskGeometry(im_size,sun_center,sun_radius)
+        key = (geometry.im_size,tuple(geometry.sun_center),
+               geometry.sun_radius,tolerance)
+        self._entries[key] = geometry
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return geometry
+
+    def clear(self):
+        '''
+        Remove all cached geometries.
+        '''
+        self._entries.clear()
+
+# Shared cache, for use by the ACWE functions and analysis scripts
+cache = DiskGeometryCache()
@@ -25,11 +25,24 @@ import skimage.transform
 import copy
 from .ACWE_python_v3 import correct_limb_brightening
 import scipy as sp
+import scipy.sparse
 from .ACWE_python_v3 import acwe
+from . import acweDiskGeometry
+from . import acweTelemetry
+
+# ACWE evolution engines, selectable by name
+engines = {'dense'  : acwe.acwe,        # full image masks every iteration
+           'sparse' : acwe.acwe_sparse} # explicit list of narrowband pixels
+
+# Default level set reinitialization of each engine; the sparse engines only
+# pay off if phi is also reset within the narrowband alone
+reinits = {'dense'  : 'edt',
+           'sparse' : 'band',
+           'batch'  : 'band'}
 
 # In[2]:
 # Resizing Function
-def resize_EUV(J,h,resize_param=8,interpolation='Bi-cubic'):
+def resize_EUV(J,h,resize_param=8,interpolation='Bi-cubic',dtype=None):
     '''
     Resizes solar EUV image based on user-specified resize parameter, and 
     return useful metadata about resized image.
@@ -51,9 +64,21 @@ def resize_EUV(J,h,resize_param=8,interpolation='Bi-cubic'):
     interpolation : str, optional
         Interpolation method for the resizing process. Valid options are 
         'Nearest-neighbor','Bi-linear','Bi-quadratic','Bi-cubic',
-        'Bi-quartic', and 'Bi-quintic'.
+        'Bi-quartic', and 'Bi-quintic', which use skimage.transform.resize 
+        with anti-aliasing, and 'Block-mean' and 'Gaussian-decimate', which 
+        are faster methods for integer resize_param that divides the image 
+        dimensions (see integer_downsample). Use check_interpolation to 
+        compare the segmentations of two methods.
         
         Default Value: 'Bi-cubic'
+    dtype : numpy dtype, optional
+        Floating point type of the resized image, e.g. np.float32 for single
+        precision. The image is converted before resizing, so the resizing is
+        also done in this precision. If None, the image is resized in the 
+        default precision of skimage.transform.resize and returned unchanged
+        if resize_param is 1.
+        
+        Default Value: None
     Returns
     -------
         I : [float]
@@ -73,13 +98,21 @@ def resize_EUV(J,h,resize_param=8,interpolation='Bi-cubic'):
         if downsample[order] == interpolation:
             break
     
+    # Convert to requested precision
+    if dtype is not None:
+        J = np.asarray(J,dtype=dtype)
+    
     # Resize image
-    if resize_param > 1:
+    if resize_param > 1 and interpolation in integer_methods:
+        I = integer_downsample(J,resize_param,interpolation)
+    elif resize_param > 1:
         I = skimage.transform.resize(J,np.asarray(J.shape)/resize_param,
                                      order=order,preserve_range=True,
                                      anti_aliasing=True)
     else:
         I = copy.deepcopy(J)
+    if dtype is not None:
+        I = I.astype(dtype,copy=False) # resize may return float64
         
     # Determine characteristics of image
     im_size = np.asarray(I.shape) # size of the image
@@ -99,6 +132,78 @@ def resize_EUV(J,h,resize_param=8,interpolation='Bi-cubic'):
     return I,im_size,sun_radius,sun_center
 
 
+# Integer Factor Downsampling
+integer_methods = ['Block-mean','Gaussian-decimate']
+def integer_downsample(J,resize_param,method='Block-mean'):
+    '''
+    Downsamples an image by an integer factor with block means or a sparse 
+    decimation filter, rather than spline interpolation.
+    
+    Parameters
+    ----------
+    J : [float]
+        Image, with dimensions divisible by resize_param
+    resize_param : int
+        Downsampling factor in each dimension
+    method : str, optional
+        'Block-mean' returns the mean of each resize_param x resize_param 
+        block of pixels. 'Gaussian-decimate' applies the anti-aliasing filter
+        of skimage.transform.resize (a Gaussian with standard deviation 
+        (resize_param-1)/2), then samples the center of each block, which is
+        the location the spline methods of resize_EUV sample. The center of a
+        block with even resize_param falls between pixels and is taken as the
+        mean of the 2x2 central pixels, as bi-linear interpolation would.
+        
+        Default Value: 'Block-mean'
+    Returns
+    -------
+    I : [float]
+        Downsampled image, float64 unless J is of another floating point type
+    '''
+    
+    # Check factor
+    k = int(resize_param)
+    if k != resize_param or np.any(np.asarray(J.shape) % k):
+        raise ValueError(method+' requires an integer resize_param that '+
+                         'divides the image dimensions')
+    J = np.asarray(J,dtype=acwe.float_type(J))
+    n,m = J.shape
+    if k == 1:
+        return J.copy()
+    
+    # Mean over blocks
+    if method == 'Block-mean':
+        return J.reshape(n//k,k,m//k,k).mean(axis=(1,3),dtype=J.dtype)
+    elif method != 'Gaussian-decimate':
+        raise ValueError('method must be one of '+str(integer_methods))
+    
+    # Separable prefilter, evaluated only at the sampled rows and columns
+    I = decimation_matrix(n,k,J.dtype) @ J
+    return np.ascontiguousarray((decimation_matrix(m,k,J.dtype) @ I.T).T)
+
+def decimation_matrix(n,k,dtype=float):
+    '''
+    Sparse matrix D such that D @ x is the Gaussian filter of 
+    integer_downsample applied to a signal x of length n, sampled at the 
+    center of each block of k samples. The Gaussian is truncated at 4 
+    standard deviations with mirrored edges, as in 
+    scipy.ndimage.gaussian_filter.
+    '''
+    sigma = (k-1)/2.
+    x = np.arange(-int(4*sigma+0.5),int(4*sigma+0.5)+1)
+    w = np.exp(-0.5*(x/sigma)**2)
+    
+    # Sample positions; for even k, the mean of the two central samples
+    centers = np.arange((k-1)//2,k//2+1)
+    cols = np.arange(0,n,k)[:,None,None]+centers[None,:,None]+x[None,None,:]
+    cols = np.abs(cols) # mirror at both edges
+    cols = np.where(cols>n-1,2*(n-1)-cols,cols)
+    vals = np.broadcast_to(w/(w.sum()*len(centers)),cols.shape)
+    rows = np.broadcast_to(np.arange(n//k)[:,None,None],cols.shape)
+    return sp.sparse.csr_matrix((vals.ravel().astype(dtype),
+                                 (rows.ravel(),cols.ravel())),shape=(n//k,n))
+
+
 # In[3]
 # Masking Functions
 
@@ -124,16 +229,122 @@ def make_circle_mask(c,im_dims,r):
         Mask of size im_dims where circle of radius r, centered at c, is given
         the value of 1 and all other regions are assigned a value of 0.
     '''
-    cx = c[0]
-    cy = c[1]
-    ix = im_dims[0]
-    iy = im_dims[1]
-    x,y = np.meshgrid(np.arange(-(cx),(ix-cx),1),np.arange(-(cy),(iy-cy),1))
-    c_mask = (x**2+y**2)<=r**2
-    return c_mask
+    return acweDiskGeometry.DiskGeometry(im_dims,c,r).disk_mask().copy()
+
+# Resize Mask
+def resize_mask(m,im_size,split=0.5):
+    '''
+    Resizes a binary mask, such as a segmentation generated at a different 
+    resize parameter, to the dimensions im_size.
+    
+    Parameters
+    ----------
+    m : [bool]
+        Mask to be resized
+    im_size : [int]
+        Dimensions of the resized mask
+    split : float, optional
+        Value above which all pixels in the bi-linearly interpolated mask 
+        are assumed to be part of the mask.
+        
+        Default Value: 0.5
+    Returns
+    -------
+    m : [bool]
+        Resized mask
+    '''
+    m = skimage.transform.resize(np.asarray(m).astype(float),im_size,order=1,
+                                 preserve_range=True,anti_aliasing=False)
+    return m>split
+
+# Solar Disk Geometry
+def disk_geometry(im_size,sun_center,sun_radius,geometryCache=None):
+    '''
+    Returns the solar disk geometry of a resized image, shared by the limb 
+    brightening correction and the initial masks.
+    
+    Parameters
+    ----------
+    im_size : [int]
+        Dimensions of the resized image.
+    sun_center : [float]
+        Coordinates of the center of the sun in the resized image.
+    sun_radius : float
+        Radius of the Sun in the resized image.
+    geometryCache : acweDiskGeometry.DiskGeometryCache, optional
+        Cache to take the geometry from, e.g. acweDiskGeometry.cache. If None,
+        the geometry is computed for this image only.
+        
+        Default Value: None
+    Returns
+    -------
+    geometry : acweDiskGeometry.DiskGeometry
+        Solar disk geometry of the image.
+    '''
+    if geometryCache is None:
+        return acweDiskGeometry.DiskGeometry(im_size,sun_center,sun_radius)
+    return geometryCache.get(im_size,sun_center,sun_radius)
+
+# Quiet Sun Intensity
+def quiet_sun_intensity(I,sd_mask):
+    '''
+    Estimates the mean quiet Sun intensity (QS) of [1] as the center of the 
+    maximum bin of a 100 bin histogram of the solar disk.
+    
+    Parameters
+    ----------
+    I : [float]
+        Solar EUV Image, resized to user-specified dimensions.
+    sd_mask : [bool]
+        Mask that separates on-disk and off-disk areas
+    Returns
+    -------
+    QS : float
+        Quiet Sun intensity; the initial mask threshold is alpha*QS.
+    References
+    ----------
+    [1] 
+        L. E. Boucheron, M. Valluri, and R. T. J. McAteer, "Segmentation 
+        of Coronal Holes Using Active Contours Without Edges," Solar 
+        Physics, vol. 291, pp. 2353-2372, 2016.
+    '''
+    Ihist,ihist_edges = np.histogram(I[sd_mask],100) # 100 bin histogram of SD
+    ihist_centers = (ihist_edges[:-1]+ihist_edges[1:])/2. # bin centers
+    ihistmax = Ihist.argmax() # index of maximum bin
+    return ihist_centers[ihistmax] # bin center of maximum bin
+
+# Alpha Sweep
+def alpha_sweep(I,sd_mask,alphas):
+    '''
+    Returns the number of pixels in the initial mask of inital_masks for 
+    each of a series of alpha parameters, e.g. for parameter studies. The 
+    on-disk intensities are sorted once, after which each alpha only costs a
+    binary search.
+    
+    Parameters
+    ----------
+    I : [float]
+        Solar EUV Image, resized to user-specified dimensions.
+    sd_mask : [bool]
+        Mask that separates on-disk and off-disk areas
+    alphas : [float]
+        Alpha parameters to evaluate.
+    Returns
+    -------
+    counts : [int]
+        Number of pixels in the initial mask (I<=alpha*QS)*sd_mask for each
+        alpha, before any holes are filled.
+    QS : float
+        Quiet Sun intensity, see quiet_sun_intensity.
+    '''
+    QS = quiet_sun_intensity(I,sd_mask)
+    disk = np.sort(I[sd_mask]) # NaNs are sorted last, and never in the mask
+    thresh = np.asarray(alphas,dtype=float)*QS
+    return np.searchsorted(disk,thresh,side='right'),QS
 
 # Initial Masks
-def inital_masks(I,im_size,sun_radius,sun_center,alpha=0.3,rollingAlpha=0):
+def inital_masks(I,im_size,sun_radius,sun_center,alpha=0.3,rollingAlpha=0,
+                 geometry=None,rollingSearch='direct'):
     '''
     Function returns circle mask that separates on-disk and off disk areas
     and initial mask for performing ACWE.
@@ -163,6 +374,21 @@ def inital_masks(I,im_size,sun_radius,sun_center,alpha=0.3,rollingAlpha=0):
         process.
         
         Default Value: 0 (Mask will always be alpha * QS)
+    geometry : acweDiskGeometry.DiskGeometry, optional
+        Precomputed solar disk geometry of I (see disk_geometry), from which 
+        the solar disk mask is taken. If None, the geometry is computed for
+        this image only.
+        
+        Default Value: None
+    rollingSearch : str, optional
+        Method used to find the alpha of a non-empty initial mask when 
+        rollingAlpha != 0. 'loop' raises alpha in steps of 0.01 and 
+        regenerates the mask until it is non-empty. 'direct' takes the same 
+        steps on the threshold alone, stopping once it reaches the minimum 
+        on-disk intensity, and generates the mask once. Both return the same
+        alphar and mask.
+        
+        Default Value: 'direct'
     Returns
     -------
     sd_mask : [bool]
@@ -186,15 +412,14 @@ def inital_masks(I,im_size,sun_radius,sun_center,alpha=0.3,rollingAlpha=0):
     '''
     
     # Define solar disk mask
-    sd_mask = make_circle_mask(sun_center,im_size,sun_radius)
+    if geometry is None:
+        geometry = disk_geometry(im_size,sun_center,sun_radius)
+    sd_mask = geometry.disk_mask()
     
     # Determine threshold value for initialization of AC as percentage of QS;  
     # estimate QS as maximum bin of histogram
-    Ihist,ihist_edges = np.histogram(I[sd_mask],100) # 100 bin histogram of SD
-    ihist_centers = (ihist_edges[:-1]+ihist_edges[1:])/2. # bin centers
-    ihistmax = Ihist.argmax() # index of maximum bin
-    initial_thresh = alpha*ihist_centers[ihistmax] # bin center of maximum bin
-    m = (I<=initial_thresh)*sd_mask # initial mask
+    QS = quiet_sun_intensity(I,sd_mask)
+    initial_thresh = alpha*QS # bin center of maximum bin
     
     if rollingAlpha != 0:
         # Save old alpha parameter for exception check
@@ -202,14 +427,31 @@ def inital_masks(I,im_size,sun_radius,sun_center,alpha=0.3,rollingAlpha=0):
     
         # Adjust Alpha Parameter, if needed and instructed 
         # to do so to ensure valid initial mask
-        while np.sum(m.astype(int)) == 0:
-            alphar += 0.01 # increase alpha by 1% and regenerate initial mask
-            initial_thresh = alphar*ihist_centers[ihistmax] # bin center of maximum bin
-            m = (I<=initial_thresh)*sd_mask # new initial mask
+        if rollingSearch == 'direct':
+            # The mask is non-empty once the threshold reaches the minimum 
+            # on-disk intensity, so step alpha as the loop would, without 
+            # regenerating the mask each step
+            onDisk = I[sd_mask]
+            onDisk = onDisk[~np.isnan(onDisk)]
+            Imin = np.min(onDisk) if onDisk.size > 0 else np.inf
+            if initial_thresh < Imin and (QS <= 0 or np.isinf(Imin)):
+                raise ValueError('no alpha produces a non-empty initial mask')
+            while alphar*QS < Imin:
+                alphar += 0.01 # increase alpha by 1%
+            m = (I<=alphar*QS)*sd_mask # initial mask
+        elif rollingSearch == 'loop':
+            m = (I<=initial_thresh)*sd_mask # initial mask
+            while np.sum(m.astype(int)) == 0:
+                alphar += 0.01 # increase alpha by 1% and regenerate mask
+                initial_thresh = alphar*QS # bin center of maximum bin
+                m = (I<=initial_thresh)*sd_mask # new initial mask
+        else:
+            raise ValueError("rollingSearch must be 'direct' or 'loop'")
         
     # Return Results
         return sd_mask,m,alphar
     else:
+        m = (I<=initial_thresh)*sd_mask # initial mask
         return sd_mask,m
 
 # In[4]
@@ -218,7 +460,10 @@ def inital_masks(I,im_size,sun_radius,sun_center,alpha=0.3,rollingAlpha=0):
 # Single ACWE Segmentation
 def itterate_acwe(I,im_size,sd_mask,m,foreground_weight=1,
                   background_weight=1/50.,narrowband=2,N=10,
-                  fillInitHoles=True,verbose=False):
+                  fillInitHoles=True,verbose=False,engine='dense',
+                  reinit=None,incrementalMeans=False,workspace=None,
+                  cropToSeed=False,cropMargin=None,returnCounter=False,
+                  telemetry=None):
     '''
     Runs coronal hole (CH) segmentation using active contours without edges 
     (ACWE) as described in [1].
@@ -263,11 +508,71 @@ def itterate_acwe(I,im_size,sd_mask,m,foreground_weight=1,
         Display ACWE evolution in real time.
         
         Default Value: False
+    engine : str, optional
+        ACWE evolution engine. Valid options are 'dense', which evaluates the
+        narrowband over the full image each iteration, and 'sparse', which
+        keeps an explicit list of narrowband pixels and only updates those.
+        Both produce the same segmentation. The sparse engine is only faster
+        with reinit='band', its default.
+        
+        Default Value: 'dense'
+    reinit : str, optional
+        Method used to reset the level set to a signed distance function
+        after each ACWE iteration. Valid options are 'edt', which computes the
+        exact distance transform over the full image, and 'band', which only
+        recomputes distances near the contour and clamps the level set to
+        +/-(narrowband+1) elsewhere. Both produce the same segmentation. If
+        None, 'edt' is used with the dense engine and 'band' with the sparse
+        engine, which otherwise spends most of its time on the full image
+        distance transform.
+        
+        Default Value: None
+    incrementalMeans : bool, optional
+        Track the interior and exterior means within ACWE with running sums
+        that are updated from only the pixels that change class, rather than
+        recomputing both means over the full image every iteration.
+        
+        Default Value: False
+    workspace : acwe.ACWEWorkspace, optional
+        Preallocated buffers for images of dimensions im_size, reused across
+        ACWE iterations. Passing the same workspace to successive calls also
+        reuses the buffers across images. If None, or if the workspace does
+        not match the image dimensions, a new workspace is created for this
+        call.
+        
+        Default Value: None
+    cropToSeed : bool, optional
+        Evolve ACWE only within the bounding box of the segmentation plus a
+        margin, using itterate_acwe_cropped, rather than over the full image.
+        The crop grows automatically as the segmentation grows, and the 
+        background outside the crop is accounted for in the means, so the 
+        segmentation is equivalent. This is faster for images dominated by
+        quiet Sun.
+        
+        Default Value: False
+    cropMargin : int, optional
+        Margin around the bounding box of the segmentation when cropping, see
+        itterate_acwe_cropped. If None, the default margin is used.
+        
+        Default Value: None
+    returnCounter : bool, optional
+        Also return the number of checks for convergence, each of which 
+        follows N iterations of ACWE.
+        
+        Default Value: False
+    telemetry : acweTelemetry.Telemetry, optional
+        Record the number of checks for convergence and the convergence 
+        trace of this run in telemetry.
+        
+        Default Value: None
     Returns
     -------
     seg : [bool]
         final segmentation mask, in dimensions 
         np.asarray(J.shape)/resize_param
+    counter : int, optional
+        number of checks for convergence, returned if (and only if)
+        returnCounter == True; the number of ACWE iterations is counter*N
     References
     ----------
     [1] 
@@ -279,23 +584,44 @@ def itterate_acwe(I,im_size,sd_mask,m,foreground_weight=1,
     if verbose:
         plt.ion() # interactive plotting on 
     
+    # Select ACWE evolution engine
+    evolve = engines[engine]
+    if reinit is None:
+        reinit = reinits[engine]
+    
+    # Buffers reused across iterations
+    if workspace is None or not workspace.fits(im_size,acwe.float_type(I)):
+        workspace = acwe.ACWEWorkspace(im_size,acwe.float_type(I))
+    
     # Set up variables for ACWE iterations
     if fillInitHoles:
         m_seg = sp.ndimage.morphology.binary_fill_holes(m) # fill holes
     else:
         m_seg = m # image to keep track of current initialization of ACWE
+    if telemetry is not None:
+        telemetry.start_run(background_weight,N)
         
+    # Valid Mask - Perform ACWE within a crop
+    if np.sum(m.astype(int))!=0 and cropToSeed:
+        return itterate_acwe_cropped(I,sd_mask,m_seg,foreground_weight,
+                                     background_weight,narrowband,N,verbose,
+                                     engine,reinit,incrementalMeans,workspace,
+                                     cropMargin,returnCounter,telemetry,False)
+    
     # Valid Mask - Perform ACWE
-    if np.sum(m.astype(int))!=0:
+    elif np.sum(m.astype(int))!=0:
         
+        off_disk = ~sd_mask # pixels outside SD
+        background = np.greater(sd_mask,m_seg,out=workspace.background)
         I_seg = I # image of current segmentation
-        I_seg[~sd_mask] = I[~m_seg&sd_mask].mean() # set pixels outside SD to
-                                                   # mean of background to 
-                                                   # force ACWE to ignore
+        I_seg[off_disk] = I[background].mean() # set pixels outside SD to
+                                               # mean of background to 
+                                               # force ACWE to ignore
         counter = 0 # to keep track of proxy of iterations
-        seg_diff_cum = np.zeros(im_size) # to keep track of how many times
-                                         # pixels change classes over
-                                         # iterations
+        seg_diff = workspace.changed # pixels that changed classes
+        seg_diff_cum = workspace.seg_diff_cum # to keep track of how many 
+        seg_diff_cum.fill(0)                  # times pixels change classes
+                                              # over iterations
         iterate = 1 # flag to continue iterating
         
         # Continue iterating with N iterations of the ACWE evolution, 
@@ -306,45 +632,58 @@ def itterate_acwe(I,im_size,sd_mask,m,foreground_weight=1,
         if verbose:
             print('% Diff            % New Diff')
         while iterate:
-            seg = acwe.acwe(I_seg,m_seg,N,(0,0,foreground_weight,
-                            background_weight),narrowband,verbose) # Evolve ACWE 
-                                                                   # for N
-                                                                   # Iterations
+            seg = evolve(I_seg,m_seg,N,(0,0,foreground_weight,
+                         background_weight),narrowband,verbose,reinit,
+                         incrementalMeans,workspace) # Evolve ACWE for N 
+                                                     # Iterations
             
             # update current segmentation
             I_seg = I 
-            I_seg[~sd_mask] = I[~seg&sd_mask].mean() 
+            np.greater(sd_mask,seg,out=background)
+            I_seg[off_disk] = I[background].mean() 
             
             # difference in seg from previous iteration to now
-            seg_diff = seg.astype(int) - m_seg.astype(int) 
+            np.not_equal(seg,m_seg,out=seg_diff)
             
             m_seg = seg # update m_seg image
             counter = counter + 1 # iterate counter
             
             # compute percentage of pixels that changed between previous 
             # iteration, and now
-            percent_diff = float(abs(seg_diff).sum())/float(seg.sum())*100.0
+            n_diff = np.count_nonzero(seg_diff)
+            percent_diff = float(n_diff)/float(seg.sum())*100.0
             # keep track of how many times pixels have changed classes
-            seg_diff_cum = seg_diff_cum + abs(seg_diff)
+            seg_diff_cum += seg_diff
             # percentage of currently new pixels that have never changed
-            # classes before
-            percent_new_diff = float(((seg_diff_cum==1)*abs(seg_diff)).sum())/\
-                               float(((seg_diff_cum>=1)*abs(seg_diff)).sum()+\
-                               np.finfo(float).eps)*100 
+            # classes before; every changed pixel has changed at least once
+            new_diff = np.equal(seg_diff_cum,1,out=workspace.mask)
+            new_diff &= seg_diff
+            percent_new_diff = float(np.count_nonzero(new_diff))/\
+                               float(n_diff+np.finfo(float).eps)*100 
+            if telemetry is not None:
+                telemetry.check(percent_diff,percent_new_diff)
             if verbose:
                 print(str(percent_diff) + ' ' + str(percent_new_diff))
             if percent_new_diff==0 | ~(seg.sum()>0):
                 iterate = 0
         
         # Return Segmentation
+        if returnCounter:
+            return seg,counter
         return seg
+    elif returnCounter:
+        return m * 1,0
     else:
         return m * 1
 
 # ACWE Confidence Maps
 def itterate_acwe_confidence_map(I,im_size,sd_mask,m,foreground_weight=1,
                                  background_weights=[1/50.],narrowband=2,
-                                 N=10,fillInitHoles=True,verbose=False):
+                                 N=10,fillInitHoles=True,verbose=False,
+                                 engine='dense',reinit=None,
+                                 incrementalMeans=False,seeding='previous',
+                                 workspace=None,cropToSeed=False,
+                                 cropMargin=None,telemetry=None):
     '''
     Runs coronal hole (CH) segmentation using active contours without edges 
     (ACWE) as described in [1].
@@ -392,6 +731,71 @@ def itterate_acwe_confidence_map(I,im_size,sd_mask,m,foreground_weight=1,
         Display ACWE evolution in real time.
         
         Default Value: False
+    engine : str, optional
+        ACWE evolution engine. Valid options are 'dense', which evaluates the
+        narrowband over the full image each iteration, and 'sparse', which
+        keeps an explicit list of narrowband pixels and only updates those.
+        Both produce the same segmentation. The sparse engine is only faster
+        with reinit='band', its default.
+        
+        Default Value: 'dense'
+    reinit : str, optional
+        Method used to reset the level set to a signed distance function
+        after each ACWE iteration. Valid options are 'edt', which computes the
+        exact distance transform over the full image, and 'band', which only
+        recomputes distances near the contour and clamps the level set to
+        +/-(narrowband+1) elsewhere. Both produce the same segmentation. If
+        None, 'edt' is used with the dense engine and 'band' with the sparse
+        engine, which otherwise spends most of its time on the full image
+        distance transform.
+        
+        Default Value: None
+    incrementalMeans : bool, optional
+        Track the interior and exterior means within ACWE with running sums
+        that are updated from only the pixels that change class, rather than
+        recomputing both means over the full image every iteration.
+        
+        Default Value: False
+    seeding : str, optional
+        Initialization of each background weight. With 'previous', the 
+        confidence map of runACWEconfidenceLevelSet_Default.py, the weights are
+        evolved one after another from smallest to largest, each from the 
+        segmentation of the previous weight. With 'initial', every weight is 
+        evolved from the initial mask, as in the independent method of 
+        runACWEconfidenceIndependent_Old.py; as no weight depends on another,
+        all are evolved together as one stack using itterate_acwe_batch, and
+        engine is ignored. The two methods produce different segmentations.
+        
+        Default Value: 'previous'
+    workspace : acwe.ACWEWorkspace, optional
+        Preallocated buffers for images of dimensions im_size, reused across
+        ACWE iterations and background weights. Passing the same workspace 
+        to successive calls also reuses the buffers across images. If None,
+        or if the workspace does not match the image dimensions, a new 
+        workspace is created for this call. Not used when seeding is 
+        'initial'.
+        
+        Default Value: None
+    cropToSeed : bool, optional
+        Evolve ACWE only within the bounding box of the segmentation plus a
+        margin, using itterate_acwe_cropped, rather than over the full image.
+        The crop grows automatically as the segmentation grows, and the 
+        background outside the crop is accounted for in the means, so the 
+        segmentation is equivalent. This is faster for images dominated by
+        quiet Sun. Not used when seeding is 'initial'.
+        
+        Default Value: False
+    cropMargin : int, optional
+        Margin around the bounding box of the segmentation when cropping, see
+        itterate_acwe_cropped. If None, the default margin is used.
+        
+        Default Value: None
+    telemetry : acweTelemetry.Telemetry, optional
+        Record the checks for convergence of each background weight in 
+        telemetry, one run per unique background weight. Not used when 
+        seeding is 'initial'.
+        
+        Default Value: None
     Returns
     -------
     Segs : [float]
@@ -408,6 +812,15 @@ def itterate_acwe_confidence_map(I,im_size,sd_mask,m,foreground_weight=1,
     if verbose:
         plt.ion() # interactive plotting on 
     
+    # Select ACWE evolution engine
+    evolve = engines[engine]
+    if reinit is None:
+        reinit = reinits[engine]
+    
+    # Buffers reused across iterations and background weights
+    if workspace is None or not workspace.fits(im_size,acwe.float_type(I)):
+        workspace = acwe.ACWEWorkspace(im_size,acwe.float_type(I))
+    
     # Generate ordered list of background weights
     background_weight_ordered = np.unique(np.sort(background_weights))
     # Doubles are neither expected nor recommended, however accounting for this
@@ -424,10 +837,34 @@ def itterate_acwe_confidence_map(I,im_size,sd_mask,m,foreground_weight=1,
     # Prepare for ACWE
     outputShape = np.asarray(m_seg.shape)
     outputShape = np.hstack([len(background_weights),outputShape]).astype(int)
-    Segs = np.empty(outputShape); Segs[:] = np.nan
+    Segs = np.empty(outputShape,dtype=acwe.float_type(I)); Segs[:] = np.nan
+    
+    if seeding not in ['previous','initial']:
+        raise ValueError("seeding must be 'previous' or 'initial'")
+    
+    # Valid Mask - Perform ACWE on all background weights together, each from
+    # the initial mask
+    if np.sum(m.astype(int))!=0 and seeding == 'initial':
+        
+        # stack of K copies of the image and initial mask, one per weight
+        K = len(background_weight_ordered)
+        segs = itterate_acwe_batch(np.repeat(I[None],K,axis=0),sd_mask,
+                                   np.repeat(np.asarray(m)[None],K,axis=0),
+                                   foreground_weight,background_weight_ordered,
+                                   narrowband,N,fillInitHoles,verbose,reinit,
+                                   incrementalMeans)
+        
+        # Find and fill appropriate background weight index/indices
+        for k in range(K):
+            index = np.where(background_weight_ordered[k]==background_weights)[0]
+            for i in index:
+                Segs[i] = segs[k].astype(int) * 1
+        
+        # Return Segmentation
+        return Segs
     
     # Valid Mask - Perform ACWE
-    if np.sum(m.astype(int))!=0:
+    elif np.sum(m.astype(int))!=0:
     
         # evolve from smallest to largest background weight
         # Under the assumption that iterating outward from the initial threshold
@@ -435,54 +872,82 @@ def itterate_acwe_confidence_map(I,im_size,sd_mask,m,foreground_weight=1,
         # segmentation then working back in again, this method was chosen to 
         # further optimize runtime.
         for background_weight in background_weight_ordered:
+            if telemetry is not None:
+                telemetry.start_run(background_weight,N)
+            
+            # Evolve within a crop
+            if cropToSeed:
+                seg = itterate_acwe_cropped(I,sd_mask,m_seg,foreground_weight,
+                                            background_weight,narrowband,N,
+                                            verbose,engine,reinit,
+                                            incrementalMeans,workspace,
+                                            cropMargin,False,telemetry,
+                                            False)
+                m_seg = seg # update m_seg image
             
-            # Finish set up of variables for ACWE iterations
-            I_seg = I # image of current segmentation
-            I_seg[~sd_mask] = I[~m_seg&sd_mask].mean() # set pixels outside SD to
-                                                       # mean of background to
-                                                       # force ACWE to ignore
-            counter = 0 # to keep track of proxy of iterations
-            seg_diff_cum = np.zeros(im_size) # to keep track of how many times
-                                             # pixels change classes over
-                                             # iterations
-            iterate = 1 # flag to continue iterating
+            # Evolve over the full image
+            else:
             
-            # continue iterating with N iterations of the ACWE evolution, followed
-            # by check for convergence
-            # running ACWE for default of N=10 iterations is a good trade-off
-            # between checking too often and not often enough for convergence
-            if verbose:
-                print('% Diff            % New Diff')
-            while iterate:
-                seg = acwe.acwe(I_seg,m_seg,N,(0,0,foreground_weight,
-                                background_weight),narrowband,verbose) # Evolve
-                                                                       # ACWE for N
-                                                                       # Iterations
+                # Finish set up of variables for ACWE iterations
+                off_disk = ~sd_mask # pixels outside SD
+                background = np.greater(sd_mask,m_seg,out=workspace.background)
+                I_seg = I # image of current segmentation
+                I_seg[off_disk] = I[background].mean() # set pixels outside SD
+                                                       # to mean of background
+                                                       # to force ACWE to 
+                                                       # ignore
+                counter = 0 # to keep track of proxy of iterations
+                seg_diff = workspace.changed # pixels that changed classes
+                seg_diff_cum = workspace.seg_diff_cum # to keep track of how 
+                seg_diff_cum.fill(0)                  # many times pixels 
+                                                      # change classes over
+                                                      # iterations
+                iterate = 1 # flag to continue iterating
+            
+                # continue iterating with N iterations of the ACWE evolution,
+                # followed by check for convergence
+                # running ACWE for default of N=10 iterations is a good 
+                # trade-off between checking too often and not often enough
+                # for convergence
+                if verbose:
+                    print('% Diff            % New Diff')
+                while iterate:
+                    seg = evolve(I_seg,m_seg,N,(0,0,foreground_weight,
+                                 background_weight),narrowband,verbose,reinit,
+                                 incrementalMeans,workspace) # Evolve ACWE 
+                                                             # for N 
+                                                             # Iterations
                 
-                # update current segmentation
-                I_seg = I 
-                I_seg[~sd_mask] = I[~seg&sd_mask].mean() 
+                    # update current segmentation
+                    I_seg = I 
+                    np.greater(sd_mask,seg,out=background)
+                    I_seg[off_disk] = I[background].mean() 
                 
-                # difference in seg from previous iteration to now
-                seg_diff = seg.astype(int) - m_seg.astype(int) 
+                    # difference in seg from previous iteration to now
+                    np.not_equal(seg,m_seg,out=seg_diff)
                 
-                m_seg = seg # update m_seg image
-                counter = counter + 1 # iterate counter
+                    m_seg = seg # update m_seg image
+                    counter = counter + 1 # iterate counter
                 
-                # compute percentage of pixels that changed between previous
-                # iteration and now
-                percent_diff = float(abs(seg_diff).sum())/float(seg.sum())*100.0
-                # keep track of how many times pixels have changed classes
-                seg_diff_cum = seg_diff_cum + abs(seg_diff)
-                # percentage of currently new pixels that have never changed
-                # classes before
-                percent_new_diff = float(((seg_diff_cum==1)*abs(seg_diff)).sum())/\
-                                   float(((seg_diff_cum>=1)*abs(seg_diff)).sum()+\
-                                   np.finfo(float).eps)*100 
-                if verbose:
-                    print(str(percent_diff) + ' ' + str(percent_new_diff))
-                if percent_new_diff==0 | ~(seg.sum()>0):
-                    iterate = 0
+                    # compute percentage of pixels that changed between 
+                    # previous iteration and now
+                    n_diff = np.count_nonzero(seg_diff)
+                    percent_diff = float(n_diff)/float(seg.sum())*100.0
+                    # keep track of how many times pixels have changed classes
+                    seg_diff_cum += seg_diff
+                    # percentage of currently new pixels that have never 
+                    # changed classes before; every changed pixel has changed
+                    # at least once
+                    new_diff = np.equal(seg_diff_cum,1,out=workspace.mask)
+                    new_diff &= seg_diff
+                    percent_new_diff = float(np.count_nonzero(new_diff))/\
+                                       float(n_diff+np.finfo(float).eps)*100 
+                    if telemetry is not None:
+                        telemetry.check(percent_diff,percent_new_diff)
+                    if verbose:
+                        print(str(percent_diff) + ' ' + str(percent_new_diff))
+                    if percent_new_diff==0 | ~(seg.sum()>0):
+                        iterate = 0
             
             # Find and fill appropriate background weight index/indices
             index = np.where(background_weight==background_weights)[0]
@@ -495,11 +960,430 @@ def itterate_acwe_confidence_map(I,im_size,sd_mask,m,foreground_weight=1,
         Segs[:]=0
         return Segs
 
+# Cropped ACWE Segmentation
+def itterate_acwe_cropped(I,sd_mask,m_seg,foreground_weight=1,
+                          background_weight=1/50.,narrowband=2,N=10,
+                          verbose=False,engine='dense',reinit=None,
+                          incrementalMeans=False,workspace=None,
+                          cropMargin=None,returnCounter=False,
+                          telemetry=None,startRun=True):
+    '''
+    Runs coronal hole (CH) segmentation using active contours without edges 
+    (ACWE) as described in [1], evolving only a crop of the image around the
+    current segmentation. The crop is the bounding box of the segmentation 
+    plus a margin, and is regrown whenever the segmentation comes within 
+    N*(narrowband+1)+narrowband+3 pixels of its edge, which is further than
+    the contour can move in N iterations. Everything outside the crop is 
+    background, so its contribution to the background mean and to the value
+    of the off-disk pixels is accounted for with a precomputed sum and 
+    count. The segmentation is equivalent to that of itterate_acwe, up to 
+    floating point rounding of the means.
+    
+    Parameters
+    ----------
+    I : [float]
+        Solar EUV Image, resized to user-specified dimensions, with correction
+        for limb brightening, if needed. Pixels outside the solar disk are 
+        overwritten, as in itterate_acwe.
+    sd_mask : [bool]
+        Mask that separates on-disk and off-disk areas.
+    m_seg : [bool]
+        Initial mask, with holes already filled if desired. Must not be 
+        empty.
+    foreground_weight, background_weight, narrowband, N, verbose, engine, 
+    reinit, incrementalMeans : optional
+        See itterate_acwe.
+    workspace : acwe.ACWEWorkspace, optional
+        Preallocated buffers for images of dimensions I.shape. The buffers 
+        of each crop are taken from the start of these. If None, or if the
+        workspace does not match the image dimensions, a new workspace is 
+        created for this call.
+        
+        Default Value: None
+    cropMargin : int, optional
+        Number of pixels added around the bounding box of the segmentation 
+        when the crop is (re)computed. Values below the minimum of 
+        N*(narrowband+1)+narrowband+3 are raised to the minimum. Larger 
+        margins make regrowing the crop less frequent. If None, twice the
+        minimum is used.
+        
+        Default Value: None
+    returnCounter, telemetry : optional
+        See itterate_acwe.
+    startRun : bool, optional
+        Begin a new run in telemetry; False when the caller already has.
+        
+        Default Value: True
+    Returns
+    -------
+    seg : [bool]
+        final segmentation mask, in dimensions I.shape
+    counter : int, optional
+        number of checks for convergence, returned if (and only if)
+        returnCounter == True
+    References
+    ----------
+    [1] 
+        L. E. Boucheron, M. Valluri, and R. T. J. McAteer, "Segmentation 
+        of Coronal Holes Using Active Contours Without Edges," Solar
+        Physics, vol. 291, pp. 2353-2372, 2016.
+    '''
+    
+    # Select ACWE evolution engine
+    evolve = engines[engine]
+    if reinit is None:
+        reinit = reinits[engine]
+    
+    # Buffers reused across iterations
+    if workspace is None or not workspace.fits(I.shape,acwe.float_type(I)):
+        workspace = acwe.ACWEWorkspace(I.shape,acwe.float_type(I))
+    
+    # Smallest distance between the segmentation and the edge of the crop 
+    # at the start of N iterations, and the margin used to grow the crop
+    guard = N*(narrowband+1)+narrowband+3
+    if cropMargin is None:
+        margin = 2*guard
+    else:
+        margin = max(int(cropMargin),guard)
+    
+    # Set up variables for ACWE iterations
+    seg = np.array(m_seg,dtype=bool) # full size segmentation
+    off_disk = ~sd_mask # pixels outside SD
+    fill = I[~seg&sd_mask].mean() # mean of background on disk
+    seg_diff_cum = workspace.seg_diff_cum # to keep track of how many times
+    seg_diff_cum.fill(0)                  # pixels change classes over 
+                                          # iterations
+    crop = None # current crop, as a pair of slices
+    if telemetry is not None and startRun:
+        telemetry.start_run(background_weight,N)
+    counter = 0 # to keep track of proxy of iterations
+    iterate = 1 # flag to continue iterating
+    
+    if verbose:
+        print('% Diff            % New Diff')
+    while iterate:
+        
+        # Bounding box of the segmentation, within the current crop
+        if crop is None:
+            rows = np.flatnonzero(seg.any(axis=1))
+            cols = np.flatnonzero(seg.any(axis=0))
+        else:
+            rows = np.flatnonzero(seg_c.any(axis=1)) + crop[0].start
+            cols = np.flatnonzero(seg_c.any(axis=0)) + crop[1].start
+        
+        # (Re)compute crop if the segmentation is too close to its edge
+        if crop is None or \
+           (rows[0]-guard < crop[0].start and crop[0].start > 0) or \
+           (rows[-1]+guard >= crop[0].stop and crop[0].stop < I.shape[0]) or \
+           (cols[0]-guard < crop[1].start and crop[1].start > 0) or \
+           (cols[-1]+guard >= crop[1].stop and crop[1].stop < I.shape[1]):
+            crop = (slice(max(rows[0]-margin,0),
+                          min(rows[-1]+margin+1,I.shape[0])),
+                    slice(max(cols[0]-margin,0),
+                          min(cols[-1]+margin+1,I.shape[1])))
+            I[off_disk] = fill # bring off-disk pixels entering crop up to date
+            I_c = I[crop]; sd_c = sd_mask[crop]; off_c = off_disk[crop]
+            
+            # sum and count of background outside crop, on and off disk
+            outside = sd_mask.copy()
+            outside[crop] = False
+            s_disk = I[outside].sum(dtype=np.float64)
+            n_disk = np.count_nonzero(outside)
+            n_off = np.count_nonzero(off_disk) - np.count_nonzero(off_c)
+            ws = workspace.crop(I_c.shape)
+        seg_c = seg[crop]
+        
+        # Evolve ACWE for N Iterations
+        seg_new = evolve(I_c,seg_c,N,(0,0,foreground_weight,
+                         background_weight),narrowband,verbose,reinit,
+                         incrementalMeans,ws,(s_disk+n_off*fill,n_disk+n_off))
+        
+        # update current segmentation
+        background = np.greater(sd_c,seg_new,out=ws.background)
+        fill = (I_c[background].sum()+s_disk)/\
+               (np.count_nonzero(background)+n_disk)
+        I_c[off_c] = fill
+        
+        # difference in seg from previous iteration to now
+        seg_diff = np.not_equal(seg_new,seg_c,out=ws.changed)
+        seg_c[...] = seg_new # update seg image
+        counter = counter + 1 # iterate counter
+        
+        # compute percentage of pixels that changed between previous 
+        # iteration, and now
+        n_diff = np.count_nonzero(seg_diff)
+        n_seg = np.count_nonzero(seg_c)
+        percent_diff = float(n_diff)/float(n_seg+np.finfo(float).eps)*100.0
+        # keep track of how many times pixels have changed classes
+        seg_diff_cum[crop] += seg_diff
+        # percentage of currently new pixels that have never changed
+        # classes before; every changed pixel has changed at least once
+        new_diff = np.equal(seg_diff_cum[crop],1,out=ws.mask)
+        new_diff &= seg_diff
+        percent_new_diff = float(np.count_nonzero(new_diff))/\
+                           float(n_diff+np.finfo(float).eps)*100 
+        if telemetry is not None:
+            telemetry.check(percent_diff,percent_new_diff)
+        if verbose:
+            print(str(percent_diff) + ' ' + str(percent_new_diff))
+        if percent_new_diff==0 or n_seg==0:
+            iterate = 0
+    
+    # Leave off-disk pixels as itterate_acwe does
+    I[off_disk] = fill
+    
+    # Return Segmentation
+    if returnCounter:
+        return seg,counter
+    return seg
+
+# Batched ACWE Segmentation
+def itterate_acwe_batch(I,sd_mask,m,foreground_weight=1,
+                        background_weight=1/50.,narrowband=2,N=10,
+                        fillInitHoles=True,verbose=False,reinit=None,
+                        incrementalMeans=False,workspace=None):
+    '''
+    Runs coronal hole (CH) segmentation using active contours without edges 
+    (ACWE) as described in [1] on a stack of images at once. The images are 
+    evolved together using vectorized operations, but each image keeps its own
+    interior and exterior means and its own check for convergence, and is 
+    dropped from the stack as soon as it has converged. The segmentation of 
+    each image is the same as that returned by itterate_acwe.
+    
+    Parameters
+    ----------
+    I : [float]
+        [BxMxN] stack of solar EUV images, resized to user-specified 
+        dimensions, with correction for limb brightening, if needed.
+    sd_mask : [bool]
+        [BxMxN] stack, or a single [MxN] mask shared by all images, that 
+        separates on-disk and off-disk areas.
+    m : [bool]
+        [BxMxN] stack of initial masks.
+    foreground_weight : float OR [float], optional
+        Weight term for the foreground (CH) homogeneity within the energy 
+        functional, either shared by all images or one per image.
+        
+        Default Value: 1
+    background_weight : float OR [float], optional
+        Weight term for the background (quiet Sun and all remaining on disk
+        features) homogeneity within the energy functional, either shared by
+        all images or one per image.
+        
+        Default Value: 1/50.0
+    narrowband : int, optional
+        Constraint on ACWE evolution to ensure iterative optimization process
+        does not result in overcorrection of contour boundary.
+        
+        Default Value: 2
+    N : int, optional
+        Number of iterations of ACWE between checks for convergence
+        
+        Default Value: 10
+    fillInitHoles : bool, optional
+        Fill holes in initial masks using morphology prior to performing ACWE
+        
+        Default Value: True
+    verbose : bool, optional
+        Report the number of images still evolving after each check for 
+        convergence.
+        
+        Default Value: False
+    reinit : str, optional
+        Method used to reset the level sets to signed distance functions
+        after each ACWE iteration, 'edt' or 'band'. See itterate_acwe. If
+        None, 'band' is used, as the batch engine is sparse.
+        
+        Default Value: None
+    incrementalMeans : bool, optional
+        Track the interior and exterior means with running sums. See 
+        itterate_acwe.
+        
+        Default Value: False
+    workspace : acwe.ACWEWorkspace, optional
+        Preallocated buffers for a stack of dimensions I.shape, reused across
+        ACWE iterations as images are dropped from the stack. If None, or if 
+        the workspace does not match I.shape, a new workspace is created for
+        this call.
+        
+        Default Value: None
+    Returns
+    -------
+    segs : [bool]
+        [BxMxN] stack of final segmentation masks. Images with an empty 
+        initial mask return an empty segmentation.
+    References
+    ----------
+    [1] 
+        L. E. Boucheron, M. Valluri, and R. T. J. McAteer, "Segmentation 
+        of Coronal Holes Using Active Contours Without Edges," Solar
+        Physics, vol. 291, pp. 2353-2372, 2016.
+    '''
+    
+    if reinit is None:
+        reinit = reinits['batch']
+    
+    # Buffers reused across iterations
+    if workspace is None or not workspace.fits(I.shape,acwe.float_type(I)):
+        workspace = acwe.ACWEWorkspace(I.shape,acwe.float_type(I))
+    
+    # Share solar disk mask and weights between images, if needed
+    sd_mask = np.broadcast_to(sd_mask,I.shape)
+    foreground_weight = np.broadcast_to(foreground_weight,I.shape[:1])
+    background_weight = np.broadcast_to(background_weight,I.shape[:1])
+    
+    # Set up variables for ACWE iterations
+    m = np.asarray(m).astype(bool)
+    if fillInitHoles:
+        # fill holes within each image, but not between images in the stack
+        structure = np.zeros((3,3,3),dtype=bool)
+        structure[1] = sp.ndimage.generate_binary_structure(2,1)
+        m_seg = sp.ndimage.morphology.binary_fill_holes(m,structure)
+    else:
+        m_seg = m.copy() # stack to keep track of current initialization
+    
+    # Valid Masks - Perform ACWE
+    segs = np.zeros(I.shape,dtype=bool)
+    active = np.where(m.sum(axis=(1,2))!=0)[0] # images still evolving
+    
+    # set pixels outside SD to mean of background to force ACWE to ignore
+    background = ~m_seg&sd_mask
+    fill = (I*background).sum(axis=(1,2))/background.sum(axis=(1,2))
+    np.copyto(I,fill[:,None,None],where=~sd_mask)
+    
+    seg_diff_cum = workspace.seg_diff_cum # to keep track of how many times
+    seg_diff_cum.fill(0)                  # pixels change classes over 
+                                          # iterations
+    
+    # Continue iterating with N iterations of the ACWE evolution on all 
+    # images that have not yet converged, followed by check for convergence
+    while len(active) > 0:
+        ws = workspace.view(len(active)) # buffers for the images evolving
+        seg = acwe.acwe_batch(I[active],m_seg[active],N,(0,0,
+                              foreground_weight[active],
+                              background_weight[active]),narrowband,reinit,
+                              incrementalMeans,ws) # Evolve ACWE for N 
+                                                   # Iterations
+        
+        # update current segmentation
+        background = np.greater(sd_mask[active],seg,out=ws.background)
+        fill = np.multiply(I[active],background,
+                           out=ws.scratch1).sum(axis=(1,2))/\
+               background.sum(axis=(1,2))
+        I[active] = np.where(sd_mask[active],I[active],fill[:,None,None])
+        
+        # difference in seg from previous iteration to now
+        seg_diff = np.not_equal(seg,m_seg[active],out=ws.changed)
+        
+        m_seg[active] = seg # update m_seg stack
+        segs[active] = seg
+        
+        # keep track of how many times pixels have changed classes
+        seg_diff_cum[active] = seg_diff_cum[active] + seg_diff
+        # percentage of currently new pixels that have never changed
+        # classes before
+        cum = seg_diff_cum[active]
+        percent_new_diff = ((cum==1)*seg_diff).sum(axis=(1,2))/\
+                           (((cum>=1)*seg_diff).sum(axis=(1,2))+\
+                           np.finfo(float).eps)*100
+        
+        # drop converged or vanished segmentations from the stack
+        converged = (percent_new_diff==0) | ~(seg.sum(axis=(1,2))>0)
+        active = active[~converged]
+        if verbose:
+            print(len(active),'images still evolving')
+    
+    # Return Segmentations
+    return segs
+
 # In[5]
+# Coarse-to-Fine Seed
+def pyramid_seed(J,h,im_size,resize_param,pyramid,foreground_weight=1,
+                 background_weight=1/50.,alpha=0.3,narrowband=2,N=10,
+                 correctLimbBrightening=True,rollingAlpha=0,fillInitHoles=True,
+                 engine='dense',reinit=None,incrementalMeans=False,
+                 dtype=np.float64,geometryCache=None,interpolation='Bi-cubic'):
+    '''
+    Generates an initial mask for ACWE at resize parameter resize_param by 
+    first converging ACWE at coarser scales. ACWE is run to convergence at 
+    the coarsest scale from the usual thresholded initial mask, then the 
+    result is upsampled and used as the initial mask at the next finer scale,
+    and so on. The final segmentation is upsampled to the dimensions of the
+    image at resize_param. Since the contour only moves about one pixel per 
+    ACWE iteration, this greatly reduces the number of iterations needed at
+    the finest scales.
+    
+    Parameters
+    ----------
+    J : [float]
+        Solar EUV image stored as a numpy array
+    h : dict
+        .fits header for Solar EUV image J
+    im_size : [int]
+        Dimensions of the image at the target resize parameter, as returned 
+        by resize_EUV
+    resize_param : int
+        Target resize parameter
+    pyramid : [int]
+        Resize parameters of the coarser scales, e.g. [32,16]. Values that are
+        not greater than resize_param are ignored.
+    foreground_weight, background_weight, alpha, narrowband, N, 
+    correctLimbBrightening, rollingAlpha, fillInitHoles, engine, reinit, 
+    incrementalMeans, dtype, geometryCache, interpolation : optional
+        See run_acwe. These are used at every coarse scale.
+    Returns
+    -------
+    seed : [bool]
+        Initial mask in dimensions im_size. The mask is empty if no initial 
+        mask could be generated at the coarsest scale.
+    '''
+    
+    # Cycle from coarsest to finest scale
+    seg = None
+    for scale in sorted(pyramid,reverse=True):
+        if scale <= resize_param:
+            continue
+        
+        # Resize image and correct limb brightening
+        I,scale_size,sun_radius,sun_center = resize_EUV(J,h,scale,
+                                                        interpolation,dtype)
+        geometry = disk_geometry(scale_size,sun_center,sun_radius,
+                                 geometryCache)
+        if correctLimbBrightening:
+            I = correct_limb_brightening.correct_limb_brightening(I,sun_center,
+                                                                  sun_radius,
+                                                        acwe.float_type(I),
+                                                        geometry=geometry)
+        
+        # Coarsest scale - seed from threshold
+        if seg is None:
+            sd_mask,m = inital_masks(I,scale_size,sun_radius,sun_center,
+                                     alpha,rollingAlpha,geometry)[:2]
+            seg = itterate_acwe(I,scale_size,sd_mask,m,foreground_weight,
+                                background_weight,narrowband,N,fillInitHoles,
+                                False,engine,reinit,incrementalMeans)
+        
+        # Finer scales - seed from previous scale
+        else:
+            sd_mask = geometry.disk_mask()
+            m = resize_mask(seg,scale_size)
+            seg = itterate_acwe(I,scale_size,sd_mask,m,foreground_weight,
+                                background_weight,narrowband,N,False,False,
+                                engine,reinit,incrementalMeans)
+    
+    # Return seed at target scale
+    if seg is None:
+        return np.zeros(im_size,dtype=bool)
+    return resize_mask(seg,im_size)
+
 # Running ACWE
 def run_acwe(J,h,resize_param=8,foreground_weight=1,background_weight=1/50.,
              alpha=0.3,narrowband=2,N=10,verbose=False,
-             correctLimbBrightening=True,rollingAlpha=0,fillInitHoles=True):
+             correctLimbBrightening=True,rollingAlpha=0,fillInitHoles=True,
+             engine='dense',reinit=None,incrementalMeans=False,
+             pyramid=None,workspace=None,cropToSeed=False,cropMargin=None,
+             dtype=np.float64,geometryCache=None,interpolation='Bi-cubic',
+             telemetry=None):
     
     '''
     Primary function for running coronal hole (CH) segmentation using active 
@@ -566,6 +1450,83 @@ def run_acwe(J,h,resize_param=8,foreground_weight=1,background_weight=1/50.,
         Fill holes in initial mask
         
         Default Value: True
+    engine : str, optional
+        ACWE evolution engine. Valid options are 'dense', which evaluates the
+        narrowband over the full image each iteration, and 'sparse', which
+        keeps an explicit list of narrowband pixels and only updates those.
+        Both produce the same segmentation. The sparse engine is only faster
+        with reinit='band', its default.
+        
+        Default Value: 'dense'
+    reinit : str, optional
+        Method used to reset the level set to a signed distance function
+        after each ACWE iteration. Valid options are 'edt', which computes the
+        exact distance transform over the full image, and 'band', which only
+        recomputes distances near the contour and clamps the level set to
+        +/-(narrowband+1) elsewhere. Both produce the same segmentation. If
+        None, 'edt' is used with the dense engine and 'band' with the sparse
+        engine, which otherwise spends most of its time on the full image
+        distance transform.
+        
+        Default Value: None
+    incrementalMeans : bool, optional
+        Track the interior and exterior means within ACWE with running sums
+        that are updated from only the pixels that change class, rather than
+        recomputing both means over the full image every iteration.
+        
+        Default Value: False
+    pyramid : [int], optional
+        Resize parameters of coarser scales, e.g. [32,16], at which ACWE is 
+        converged first to generate the initial mask at resize_param (see 
+        pyramid_seed). The returned initial mask is still the thresholded
+        mask at resize_param. Set to None to disable.
+        
+        Default Value: None
+    workspace : acwe.ACWEWorkspace, optional
+        Preallocated ACWE buffers, see itterate_acwe. Create one with 
+        acwe.ACWEWorkspace(np.asarray(J.shape)//resize_param) and pass it to
+        every call to reuse it across images.
+        
+        Default Value: None
+    cropToSeed : bool, optional
+        Evolve ACWE only within a crop around the segmentation, see 
+        itterate_acwe.
+        
+        Default Value: False
+    cropMargin : int, optional
+        Margin of the crop, see itterate_acwe_cropped.
+        
+        Default Value: None
+    dtype : numpy dtype, optional
+        Floating point type in which the image is resized, corrected for limb
+        brightening and segmented, e.g. np.float32 to halve memory use and
+        bandwidth. Use check_precision to compare a reduced precision against
+        the float64 reference.
+        
+        Default Value: np.float64
+        
+    geometryCache : acweDiskGeometry.DiskGeometryCache, optional
+        Cache of solar disk geometry (radius map, disk masks and limb annuli)
+        shared between calls, e.g. acweDiskGeometry.cache, so images of the 
+        same size, solar center and radius, such as the registered images of
+        a rotation, reuse it. If None, the geometry is computed once per call.
+        
+        Default Value: None
+    interpolation : str, optional
+        Interpolation method used to resize the image, see resize_EUV. 
+        'Block-mean' and 'Gaussian-decimate' are much faster than the spline
+        methods for integer resize_param; use check_interpolation to compare
+        their segmentations with the default.
+        
+        Default Value: 'Bi-cubic'
+    telemetry : bool or acweTelemetry.Telemetry, optional
+        Record the wall time of each stage ('resize', 'limb', 'seed' and 
+        'evolve') and the convergence of ACWE. If True, a new Telemetry is
+        created; a Telemetry passed in, e.g. one already holding the load 
+        and registration times of a driver, is added to. Either way it is
+        returned after m.
+        
+        Default Value: None
         
     Returns
     -------
@@ -577,6 +1538,9 @@ def run_acwe(J,h,resize_param=8,foreground_weight=1,background_weight=1/50.,
         oldThreshold == True and rollingAlpha == True
     m : [bool]
         Initial mask without any holes filled
+    telemetry : acweTelemetry.Telemetry, optional
+        Stage times and convergence of ACWE, returned if (and only if) 
+        telemetry is given
     
     References
     ----------
@@ -591,38 +1555,69 @@ def run_acwe(J,h,resize_param=8,foreground_weight=1,background_weight=1/50.,
         Astronomy & Astrophysics, vol. 561, pp. A29, 2014.
     '''
     
+    telemetry = acweTelemetry.as_telemetry(telemetry)
+    
     # Resize image
-    I,im_size,sun_radius,sun_center = resize_EUV(J,h,resize_param)
+    with acweTelemetry.stage(telemetry,'resize'):
+        I,im_size,sun_radius,sun_center = resize_EUV(J,h,resize_param,
+                                                     interpolation,dtype)
+        geometry = disk_geometry(im_size,sun_center,sun_radius,geometryCache)
     
     # Correct limb brightening per Verbeeck et al. 2014
     if correctLimbBrightening:
-        I = correct_limb_brightening.correct_limb_brightening(I,sun_center,
-                                                              sun_radius)
+        with acweTelemetry.stage(telemetry,'limb'):
+            I = correct_limb_brightening.correct_limb_brightening(I,
+                                                                  sun_center,
+                                                                  sun_radius,
+                                                          acwe.float_type(I),
+                                                          geometry=geometry)
 
     #  Define solar disk mask and initial mask
-    if rollingAlpha != 0:
-        sd_mask,m,alphar = inital_masks(I,im_size,sun_radius,sun_center,
-                                        alpha,rollingAlpha)
-    else:
-        sd_mask,m = inital_masks(I,im_size,sun_radius,sun_center,alpha,
-                                 rollingAlpha)
+    with acweTelemetry.stage(telemetry,'seed'):
+        if rollingAlpha != 0:
+            sd_mask,m,alphar = inital_masks(I,im_size,sun_radius,sun_center,
+                                            alpha,rollingAlpha,geometry)
+        else:
+            sd_mask,m = inital_masks(I,im_size,sun_radius,sun_center,alpha,
+                                     rollingAlpha,geometry)
+    
+        # Generate initial mask from coarser scales, if requested
+        m_seg = m
+        if pyramid is not None:
+            seed = pyramid_seed(J,h,im_size,resize_param,pyramid,
+                                foreground_weight,background_weight,alpha,
+                                narrowband,N,correctLimbBrightening,
+                                rollingAlpha,fillInitHoles,engine,reinit,
+                                incrementalMeans,dtype,geometryCache,
+                                interpolation)
+            if np.sum(seed.astype(int))!=0:
+                m_seg = seed
     
     # Perform ACWE
-    seg = itterate_acwe(I,im_size,sd_mask,m,foreground_weight,
-                        background_weight,narrowband,N,fillInitHoles,verbose)
+    with acweTelemetry.stage(telemetry,'evolve'):
+        seg = itterate_acwe(I,im_size,sd_mask,m_seg,foreground_weight,
+                            background_weight,narrowband,N,
+                            fillInitHoles and m_seg is m,verbose,engine,
+                            reinit,incrementalMeans,workspace,cropToSeed,
+                            cropMargin,telemetry=telemetry)
     
     # Return Results
-    if rollingAlpha != 0:
-        return seg,alphar,m
-    
-    else:
-        return seg,m
+    results = (seg,alphar,m) if rollingAlpha != 0 else (seg,m)
+    if telemetry is not None:
+        return results+(telemetry,)
+    return results
 
 # ACWE Confidence Map
 def run_acwe_confidenceMap(J,h,resize_param=8,foreground_weight=1,
                            background_weights=[1/50.],alpha=0.3,narrowband=2,
                            N=10,verbose=False,correctLimbBrightening=True,
-                           rollingAlpha=0,fillInitHoles=True):
+                           rollingAlpha=0,fillInitHoles=True,
+                           engine='dense',reinit=None,
+                           incrementalMeans=False,seeding='previous',
+                           pyramid=None,workspace=None,cropToSeed=False,
+                           cropMargin=None,dtype=np.float64,
+                           geometryCache=None,interpolation='Bi-cubic',
+                           telemetry=None):
     
     '''
     Function for generating confidence map based segmentation of coronal hole 
@@ -692,6 +1687,90 @@ def run_acwe_confidenceMap(J,h,resize_param=8,foreground_weight=1,
         Fill holes in initial mask
         
         Default Value: True
+    engine : str, optional
+        ACWE evolution engine. Valid options are 'dense', which evaluates the
+        narrowband over the full image each iteration, and 'sparse', which
+        keeps an explicit list of narrowband pixels and only updates those.
+        Both produce the same segmentation. The sparse engine is only faster
+        with reinit='band', its default.
+        
+        Default Value: 'dense'
+    reinit : str, optional
+        Method used to reset the level set to a signed distance function
+        after each ACWE iteration. Valid options are 'edt', which computes the
+        exact distance transform over the full image, and 'band', which only
+        recomputes distances near the contour and clamps the level set to
+        +/-(narrowband+1) elsewhere. Both produce the same segmentation. If
+        None, 'edt' is used with the dense engine and 'band' with the sparse
+        engine, which otherwise spends most of its time on the full image
+        distance transform.
+        
+        Default Value: None
+    incrementalMeans : bool, optional
+        Track the interior and exterior means within ACWE with running sums
+        that are updated from only the pixels that change class, rather than
+        recomputing both means over the full image every iteration.
+        
+        Default Value: False
+    seeding : str, optional
+        Initialization of each background weight, 'previous' (the confidence
+        map of runACWEconfidenceLevelSet_Default.py) or 'initial' (the 
+        independent method of runACWEconfidenceIndependent_Old.py, evolved as
+        one stack). See itterate_acwe_confidence_map.
+        
+        Default Value: 'previous'
+    pyramid : [int], optional
+        Resize parameters of coarser scales, e.g. [32,16], at which ACWE is 
+        converged first, with the smallest background weight, to generate 
+        the initial mask at resize_param (see pyramid_seed). The returned 
+        initial mask is still the thresholded mask at resize_param. Set to 
+        None to disable.
+        
+        Default Value: None
+    workspace : acwe.ACWEWorkspace, optional
+        Preallocated ACWE buffers, see itterate_acwe_confidence_map. Create 
+        one with acwe.ACWEWorkspace(np.asarray(J.shape)//resize_param) and 
+        pass it to every call to reuse it across images.
+        
+        Default Value: None
+    cropToSeed : bool, optional
+        Evolve ACWE only within a crop around the segmentation, see 
+        itterate_acwe_confidence_map.
+        
+        Default Value: False
+    cropMargin : int, optional
+        Margin of the crop, see itterate_acwe_cropped.
+        
+        Default Value: None
+    dtype : numpy dtype, optional
+        Floating point type in which the image is resized, corrected for limb
+        brightening and segmented, and of the returned stack of 
+        segmentations, e.g. np.float32 to halve memory use and bandwidth. Use
+        check_precision to compare a reduced precision against the float64 
+        reference.
+        
+        Default Value: np.float64
+        
+    geometryCache : acweDiskGeometry.DiskGeometryCache, optional
+        Cache of solar disk geometry (radius map, disk masks and limb annuli)
+        shared between calls, e.g. acweDiskGeometry.cache, so images of the 
+        same size, solar center and radius, such as the registered images of
+        a rotation, reuse it. If None, the geometry is computed once per call.
+        
+        Default Value: None
+    interpolation : str, optional
+        Interpolation method used to resize the image, see resize_EUV. 
+        'Block-mean' and 'Gaussian-decimate' are much faster than the spline
+        methods for integer resize_param; use check_interpolation to compare
+        their segmentations with the default.
+        
+        Default Value: 'Bi-cubic'
+    telemetry : bool or acweTelemetry.Telemetry, optional
+        Record stage times and convergence, see run_acwe. Each unique 
+        background weight is recorded as its own run, except when 
+        seeding is 'initial', in which case only stage times are recorded.
+        
+        Default Value: None
     
     Returns
     -------
@@ -708,6 +1787,9 @@ def run_acwe_confidenceMap(J,h,resize_param=8,foreground_weight=1,
         oldThreshold == True and rollingAlpha == True 
     m : [bool]
         Initial mask without any holes filled
+    telemetry : acweTelemetry.Telemetry, optional
+        Stage times and convergence of ACWE, returned if (and only if) 
+        telemetry is given
     
     References
     ----------
@@ -722,30 +1804,284 @@ def run_acwe_confidenceMap(J,h,resize_param=8,foreground_weight=1,
             Astronomy & Astrophysics, vol. 561, pp. A29, 2014.
     '''
     
+    telemetry = acweTelemetry.as_telemetry(telemetry)
+    
     # Resize image
-    I,im_size,sun_radius,sun_center = resize_EUV(J,h,resize_param)
+    with acweTelemetry.stage(telemetry,'resize'):
+        I,im_size,sun_radius,sun_center = resize_EUV(J,h,resize_param,
+                                                     interpolation,dtype)
+        geometry = disk_geometry(im_size,sun_center,sun_radius,geometryCache)
     
     # Correct limb brightening per Verbeeck et al. 2014
     if correctLimbBrightening:
-        I = correct_limb_brightening.correct_limb_brightening(I,sun_center,
-                                                              sun_radius)
+        with acweTelemetry.stage(telemetry,'limb'):
+            I = correct_limb_brightening.correct_limb_brightening(I,
+                                                                  sun_center,
+                                                                  sun_radius,
+                                                          acwe.float_type(I),
+                                                          geometry=geometry)
 
     # Define solar disk mask and initial mask
-    if rollingAlpha != 0:
-        sd_mask,m,alphar = inital_masks(I,im_size,sun_radius,sun_center,
-                                        alpha,rollingAlpha)
-    else:
-        sd_mask,m = inital_masks(I,im_size,sun_radius,sun_center,alpha,
-                                 rollingAlpha)
+    with acweTelemetry.stage(telemetry,'seed'):
+        if rollingAlpha != 0:
+            sd_mask,m,alphar = inital_masks(I,im_size,sun_radius,sun_center,
+                                            alpha,rollingAlpha,geometry)
+        else:
+            sd_mask,m = inital_masks(I,im_size,sun_radius,sun_center,alpha,
+                                     rollingAlpha,geometry)
+    
+        # Generate initial mask from coarser scales, if requested
+        m_seg = m
+        if pyramid is not None:
+            seed = pyramid_seed(J,h,im_size,resize_param,pyramid,
+                                foreground_weight,np.min(background_weights),
+                                alpha,narrowband,N,correctLimbBrightening,
+                                rollingAlpha,fillInitHoles,engine,reinit,
+                                incrementalMeans,dtype,geometryCache,
+                                interpolation)
+            if np.sum(seed.astype(int))!=0:
+                m_seg = seed
     
     # Return ACWE
-    Segs = itterate_acwe_confidence_map(I,im_size,sd_mask,m,foreground_weight,
-                                        background_weights,narrowband,N,
-                                        fillInitHoles,verbose)
+    with acweTelemetry.stage(telemetry,'evolve'):
+        Segs = itterate_acwe_confidence_map(I,im_size,sd_mask,m_seg,
+                                            foreground_weight,
+                                            background_weights,narrowband,N,
+                                            fillInitHoles and m_seg is m,
+                                            verbose,engine,reinit,
+                                            incrementalMeans,seeding,
+                                            workspace,cropToSeed,cropMargin,
+                                            telemetry)
     
     # Return Results
-    if rollingAlpha != 0:
-        return Segs,alphar,m
+    results = (Segs,alphar,m) if rollingAlpha != 0 else (Segs,m)
+    if telemetry is not None:
+        return results+(telemetry,)
+    return results
+
+
+# Batched ACWE
+def run_acwe_batch(J,h,resize_param=8,foreground_weight=1,
+                   background_weight=1/50.,alpha=0.3,narrowband=2,N=10,
+                   verbose=False,correctLimbBrightening=True,rollingAlpha=0,
+                   fillInitHoles=True,reinit=None,incrementalMeans=False,
+                   workspace=None,dtype=np.float64,geometryCache=None,
+                   interpolation='Bi-cubic',telemetry=None):
+    '''
+    Function for running coronal hole (CH) segmentation using active 
+    contours without edges (ACWE) as described in [1] on a list of images of
+    the same size at once, such as the frames of a Carrington rotation. Each
+    image is preprocessed as in run_acwe, then all images are evolved 
+    together using itterate_acwe_batch.
     
-    else:
-        return Segs,m
+    Parameters
+    ----------
+    J : [[float]]
+        List of solar EUV images, all of the same dimensions
+    h : [dict]
+        List of .fits headers, one for each image in J
+    resize_param, foreground_weight, background_weight, alpha, narrowband, 
+    N, correctLimbBrightening, rollingAlpha, fillInitHoles, reinit, 
+    incrementalMeans, workspace, dtype, geometryCache, interpolation, 
+    telemetry : optional
+        See run_acwe. The same values are used for all images. Stage times 
+        are summed over all images; the convergence of the batch is not 
+        recorded.
+    verbose : bool, optional
+        Report the number of images still evolving after each check for 
+        convergence.
+        
+        Default Value: False
+        
+    Returns
+    -------
+    segs : [bool]
+        stack of final segmentation masks, in dimensions 
+        np.hstack([len(J),np.asarray(J[0].shape)/resize_param])
+    alphar : [float], optional
+        the final alpha parameter of each image, returned if (and only if)
+        rollingAlpha != 0
+    m : [bool]
+        stack of initial masks without any holes filled
+    telemetry : acweTelemetry.Telemetry, optional
+        Stage times, returned if (and only if) telemetry is given
+    
+    References
+    ----------
+    [1] 
+        L. E. Boucheron, M. Valluri, and R. T. J. McAteer, "Segmentation 
+        of Coronal Holes Using Active Contours Without Edges," Solar 
+        Physics, vol. 291, pp. 2353-2372, 2016.
+    '''
+    
+    telemetry = acweTelemetry.as_telemetry(telemetry)
+    
+    # Preprocess each image
+    I = []; sd_mask = []; m = []; alphar = []
+    for j in range(len(J)):
+        
+        # Resize image
+        with acweTelemetry.stage(telemetry,'resize'):
+            Ij,im_size,sun_radius,sun_center = resize_EUV(J[j],h[j],
+                                                          resize_param,
+                                                          interpolation,dtype)
+            geometry = disk_geometry(im_size,sun_center,sun_radius,
+                                     geometryCache)
+        
+        # Correct limb brightening per Verbeeck et al. 2014
+        if correctLimbBrightening:
+            with acweTelemetry.stage(telemetry,'limb'):
+                Ij = correct_limb_brightening.correct_limb_brightening(Ij,
+                                                                   sun_center,
+                                                                   sun_radius,
+                                                        acwe.float_type(Ij),
+                                                        geometry=geometry)
+        
+        # Define solar disk mask and initial mask
+        with acweTelemetry.stage(telemetry,'seed'):
+            if rollingAlpha != 0:
+                sd,mj,a = inital_masks(Ij,im_size,sun_radius,sun_center,alpha,
+                                       rollingAlpha,geometry)
+                alphar.append(a)
+            else:
+                sd,mj = inital_masks(Ij,im_size,sun_radius,sun_center,alpha,
+                                     rollingAlpha,geometry)
+        I.append(Ij); sd_mask.append(sd); m.append(mj)
+    I = np.asarray(I,dtype=dtype); sd_mask = np.asarray(sd_mask)
+    m = np.asarray(m)
+    
+    # Perform ACWE
+    with acweTelemetry.stage(telemetry,'evolve'):
+        segs = itterate_acwe_batch(I,sd_mask,m,foreground_weight,
+                                   background_weight,narrowband,N,
+                                   fillInitHoles,verbose,reinit,
+                                   incrementalMeans,workspace)
+    
+    # Return Results
+    results = (segs,np.asarray(alphar),m) if rollingAlpha != 0 else (segs,m)
+    if telemetry is not None:
+        return results+(telemetry,)
+    return results
+
+# Precision Check
+def check_precision(J,h,resize_param=8,dtype=np.float32,tolerance=0.01,
+                    **kwargs):
+    '''
+    Checks that a reduced floating point precision gives the same coronal hole
+    (CH) segmentation as the float64 reference, by running run_acwe at both
+    precisions.
+    
+    Parameters
+    ----------
+    J : [float]
+        Solar EUV image stored as a numpy array
+    h : dict
+        .fits header for Solar EUV image J
+    resize_param : int, optional
+        Resize parameter, see run_acwe.
+        
+        Default Value: 8
+    dtype : numpy dtype, optional
+        Floating point type to check against float64.
+        
+        Default Value: np.float32
+    tolerance : float, optional
+        Largest acceptable number of pixels that differ between the two 
+        segmentations, as a fraction of the number of CH pixels in the 
+        reference segmentation.
+        
+        Default Value: 0.01
+    **kwargs : optional
+        Any other parameters of run_acwe, used for both runs.
+    Returns
+    -------
+    passed : bool
+        True if the segmentations agree to within tolerance
+    mismatch : float
+        Number of pixels that differ, as a fraction of the number of CH pixels
+        in the reference segmentation
+    seg : [bool]
+        Segmentation at precision dtype
+    ref : [bool]
+        Segmentation at float64
+    '''
+    
+    # Segment at both precisions; run_acwe modifies neither J nor h
+    ref = run_acwe(J,h,resize_param,dtype=np.float64,**kwargs)[0]
+    seg = run_acwe(J,h,resize_param,dtype=dtype,**kwargs)[0]
+    
+    # Compare
+    mismatch = np.count_nonzero(seg.astype(bool)!=ref.astype(bool))/\
+               float(max(np.count_nonzero(ref),1))
+    
+    # Return Results
+    return mismatch<=tolerance,mismatch,seg,ref
+
+# Interpolation Check
+def check_interpolation(J,h,resize_param=8,interpolation='Block-mean',
+                        reference='Bi-cubic',tolerance=0.01,**kwargs):
+    '''
+    Checks that an alternative interpolation method for resizing (see 
+    resize_EUV) gives the same coronal hole (CH) segmentation as the 
+    reference method, by running run_acwe with both methods.
+    
+    Parameters
+    ----------
+    J : [float]
+        Solar EUV image stored as a numpy array
+    h : dict
+        .fits header for Solar EUV image J
+    resize_param : int, optional
+        Resize parameter, see run_acwe.
+        
+        Default Value: 8
+    interpolation : str, optional
+        Interpolation method to check against reference.
+        
+        Default Value: 'Block-mean'
+    reference : str, optional
+        Reference interpolation method.
+        
+        Default Value: 'Bi-cubic'
+    tolerance : float, optional
+        Largest acceptable number of pixels that differ between the two 
+        segmentations, as a fraction of the number of CH pixels in the 
+        reference segmentation.
+        
+        Default Value: 0.01
+    **kwargs : optional
+        Any other parameters of run_acwe, used for both runs.
+    Returns
+    -------
+    passed : bool
+        True if the segmentations agree to within tolerance
+    mismatch : float
+        Number of pixels that differ, as a fraction of the number of CH pixels
+        in the reference segmentation
+    difference : [float]
+        Largest and mean absolute difference between the two resized images,
+        as fractions of the largest absolute value of the reference image
+    seg : [bool]
+        Segmentation using interpolation
+    ref : [bool]
+        Segmentation using reference
+    '''
+    
+    # Compare resized images
+    dtype = kwargs.get('dtype',np.float64)
+    I = resize_EUV(J,h,resize_param,interpolation,dtype)[0]
+    I_ref = resize_EUV(J,h,resize_param,reference,dtype)[0]
+    scale = max(np.nanmax(np.abs(I_ref)),np.finfo(float).tiny)
+    diff = np.abs(I.astype(float)-I_ref)/scale
+    difference = np.asarray([np.nanmax(diff),np.nanmean(diff)])
+    
+    # Segment with both methods; run_acwe modifies neither J nor h
+    ref = run_acwe(J,h,resize_param,interpolation=reference,**kwargs)[0]
+    seg = run_acwe(J,h,resize_param,interpolation=interpolation,**kwargs)[0]
+    
+    # Compare
+    mismatch = np.count_nonzero(seg.astype(bool)!=ref.astype(bool))/\
+               float(max(np.count_nonzero(ref),1))
+    
+    # Return Results
+    return mismatch<=tolerance,mismatch,difference,seg,ref
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Persistent job manifest of the frames of a Carrington rotation (CR),
+    stored as an SQLite database next to the results. Each frame has a
+    status (pending, running, done, failed or quarantined), a count of
+    attempts, the error of its last failure and its timing, so a batch run
+    (see acweBatch.py) finds the frames left to segment in one query at
+    startup instead of checking every output file, and a frame that keeps
+    failing, e.g. a corrupt .fits file, is quarantined after a bounded number
+    of attempts instead of being retried forever.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import json
+import time
+import sqlite3
+import traceback
+import contextlib
+
+# In[2]
+# Key Values
+
+# Frame status
+PENDING     = 'pending'     # Not segmented yet
+RUNNING     = 'running'     # Being segmented
+DONE        = 'done'        # Results saved
+FAILED      = 'failed'      # Last attempt failed, will be retried
+QUARANTINED = 'quarantined' # Failed maxAttempts times, no longer retried
+STATUS = [PENDING,RUNNING,DONE,FAILED,QUARANTINED]
+
+SCHEMA = '''CREATE TABLE IF NOT EXISTS frames (
+                file     TEXT PRIMARY KEY,
+                status   TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error    TEXT,
+                started  REAL,
+                finished REAL,
+                time     REAL,
+                times    TEXT)'''
+
+# In[3]
+# Manifest
+class Manifest:
+    '''
+    Job manifest of the frames of a CR.
+
+    Parameters
+    ----------
+    filename : str
+        SQLite database, created if it does not exist, e.g.
+        crSaveFolder + 'acweManifest.sqlite'
+    maxAttempts : int, optional
+        Number of attempts after which a failing frame is quarantined.
+
+        Default Value: 3
+    timeout : float, optional
+        Seconds to wait for the database when it is locked by another
+        process.
+
+        Default Value: 60.0
+    '''
+
+    def __init__(self,filename,maxAttempts=3,timeout=60.):
+        self.filename = filename
+        self.maxAttempts = maxAttempts
+        self.connection = sqlite3.connect(filename,timeout=timeout)
+        with self.connection:
+            self.connection.execute(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def add(self,files,done=None):
+        '''
+        Adds frames that are not yet in the manifest, as pending. Frames
+        already in the manifest keep their status.
+
+        Parameters
+        ----------
+        files : [str]
+            Frames, as listed in a CR*.csv file.
+        done : function, optional
+            done(file) is True if the results of a new frame already exist,
+            e.g. from a run before the manifest was created; those frames
+            are added as done.
+
+            Default Value: None
+        '''
+        known = set(row[0] for row in
+                    self.connection.execute('SELECT file FROM frames'))
+        new = [file for file in files if file not in known]
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO frames (file,status) VALUES (?,?)',
+                [(file,DONE if done is not None and done(file) else PENDING)
+                 for file in new])
+        return len(new)
+
+    def reset(self,files=None,status=None):
+        '''
+        Returns frames to pending, with no attempts, e.g. to segment them
+        again with overwrite or to retry quarantined frames.
+
+        Parameters
+        ----------
+        files : [str], optional
+            Frames to reset. If None, every frame is reset.
+
+            Default Value: None
+        status : str, optional
+            Only reset frames with this status, e.g. QUARANTINED.
+
+            Default Value: None
+        '''
+        query = 'UPDATE frames SET status=?,attempts=0,error=NULL'
+        condition = '' if status is None else ' AND status=?'
+        args = [] if status is None else [status]
+        with self.connection:
+            if files is None:
+                self.connection.execute(query + ' WHERE 1' + condition,
+                                        [PENDING] + args)
+            else:
+                self.connection.executemany(
+                    query + ' WHERE file=?' + condition,
+                    [[PENDING,file] + args for file in files])
+
+    def recover(self):
+        '''
+        Returns frames left running by an interrupted or crashed run to
+        pending. Their attempt is still counted, so a frame that crashes
+        every run that reaches it, e.g. by exhausting memory, is quarantined
+        once it has been started maxAttempts times.
+        '''
+        with self.connection:
+            self.connection.execute(
+                'UPDATE frames SET status=?,error=? WHERE status=? AND '
+                'attempts>=?',(QUARANTINED,'Run ended while the frame was '
+                               'running',RUNNING,self.maxAttempts))
+            self.connection.execute('UPDATE frames SET status=? WHERE '
+                                    'status=?',(PENDING,RUNNING))
+
+    def plan(self,files,overwrite=False,done=None):
+        '''
+        Prepares the manifest for a run over files: adds new frames (see
+        add), resets every frame with overwrite, and recovers the frames of
+        an interrupted run (see recover).
+
+        Parameters
+        ----------
+        files : [str]
+            Frames of the run.
+        overwrite : bool, optional
+            Segment every frame again.
+
+            Default Value: False
+        done : function, optional
+            See add.
+
+            Default Value: None
+        Returns
+        -------
+        todo : set
+            Frames to segment, see todo.
+        '''
+        if overwrite:
+            self.add(files)
+            self.reset(files)
+        else:
+            self.add(files,done)
+        self.recover()
+        return set(self.todo())
+
+    def todo(self):
+        '''
+        Returns
+        -------
+        files : [str]
+            Frames that are pending or failed, in the order they were added.
+        '''
+        return [row[0] for row in self.connection.execute(
+            'SELECT file FROM frames WHERE status IN (?,?) ORDER BY rowid',
+            (PENDING,FAILED))]
+
+    def start(self,file):
+        '''
+        Marks a frame as running and counts the attempt.
+        '''
+        with self.connection:
+            self.connection.execute(
+                'UPDATE frames SET status=?,attempts=attempts+1,started=?, '
+                'finished=NULL WHERE file=?',(RUNNING,time.time(),file))
+
+    def release(self,file):
+        '''
+        Returns a frame marked as running that was never started, e.g.
+        cancelled by an interrupt, to pending without counting the attempt.
+        '''
+        with self.connection:
+            self.connection.execute(
+                'UPDATE frames SET status=?,attempts=attempts-1 WHERE file=? '
+                'AND status=?',(PENDING,file,RUNNING))
+
+    def finish(self,record):
+        '''
+        Records the result of a frame.
+
+        Parameters
+        ----------
+        record : dict
+            Record of the frame, see acweBatch.run_rotation. Frames that
+            were 'done' or 'skipped' are done; 'failed' frames are failed,
+            or quarantined after maxAttempts attempts.
+        '''
+        status = DONE if record['status'] in ['done','skipped'] else FAILED
+        with self.connection:
+            if status == FAILED:
+                attempts, = self.connection.execute(
+                    'SELECT attempts FROM frames WHERE file=?',
+                    (record['file'],)).fetchone()
+                if attempts >= self.maxAttempts:
+                    status = QUARANTINED
+            self.connection.execute(
+                'UPDATE frames SET status=?,error=?,finished=?,time=?,times=? '
+                'WHERE file=?',(status,record.get('error'),time.time(),
+                                record.get('time'),
+                                json.dumps(record.get('times',{})),
+                                record['file']))
+        return status
+
+    @contextlib.contextmanager
+    def frame(self,file,telemetry=None,verbose=True):
+        '''
+        Context in which a frame is segmented, for scripts that segment
+        frames one after another:
+
+            with manifest.frame(file):
+                ...
+
+        The frame is marked as running and, at the end of the block, as done
+        or, if the block raised an exception, as failed (or quarantined).
+        The exception is recorded and not raised, so the script continues
+        with the next frame; interrupts (KeyboardInterrupt) are raised, and
+        the frame is recovered by the next run.
+
+        Parameters
+        ----------
+        file : str
+            Frame being segmented.
+        telemetry : acweTelemetry.Telemetry, optional
+            Telemetry of the frame, whose stage times are recorded.
+
+            Default Value: None
+        verbose : bool, optional
+            Print the error of a failed frame.
+
+            Default Value: True
+        '''
+        start = time.perf_counter()
+        record = {'file':file,'status':'done','error':None}
+        self.start(file)
+        try:
+            yield
+        except Exception:
+            record['status'] = 'failed'
+            record['error'] = traceback.format_exc()
+        record['time'] = time.perf_counter()-start
+        if telemetry is not None:
+            record['times'] = dict(telemetry.times)
+        status = self.finish(record)
+        if verbose and record['error'] is not None:
+            print('    Failed (' + status + '):\n' + record['error'])
+
+    def summary(self):
+        '''
+        Returns
+        -------
+        counts : dict
+            Number of frames with each status.
+        '''
+        counts = dict.fromkeys(STATUS,0)
+        counts.update(self.connection.execute(
+            'SELECT status,COUNT(*) FROM frames GROUP BY status'))
+        return counts
+
+    def frames(self,status=None):
+        '''
+        Returns
+        -------
+        frames : [dict]
+            Every frame, or those with status, with its status, attempts,
+            error, start and finish times (time.time()), total time and
+            stage times in seconds.
+        '''
+        query = 'SELECT file,status,attempts,error,started,finished,time,' + \
+                'times FROM frames'
+        args = ()
+        if status is not None:
+            query += ' WHERE status=?'
+            args = (status,)
+        keys = ['file','status','attempts','error','started','finished',
+                'time','times']
+        frames = []
+        for row in self.connection.execute(query + ' ORDER BY rowid',args):
+            frame = dict(zip(keys,row))
+            frame['times'] = json.loads(frame['times']) \
+                             if frame['times'] else {}
+            frames.append(frame)
+        return frames
+
+def manifest_file(crSaveFolder,prefix):
+    '''
+    Returns
+    -------
+    filename : str
+        Manifest of the results with prefix in crSaveFolder, e.g.
+        crSaveFolder + 'acweManifest.ACWE.sqlite'
+    '''
+    return crSaveFolder + 'acweManifest.' + prefix + 'sqlite'
+
+def as_manifest(manifest,maxAttempts=3):
+    '''
+    Returns manifest if it is a Manifest, opens it if it is a filename, and
+    None if it is None.
+    '''
+    if manifest is None or isinstance(manifest,Manifest):
+        return manifest
+    return Manifest(manifest,maxAttempts)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Prefetching pipeline that overlaps the I/O of a run with ACWE. While a
+    frame is segmented, loader threads open (and, if needed, register) the
+    next frames and a writer thread saves the results of the previous ones.
+    Both are bounded: at most depth frames are opened ahead, and a save
+    waits while writeDepth saves are pending, so memory stays bounded when
+    the reads or writes are slower than ACWE. The run scripts and
+    acweBatch.run_rotation use it to hide the latency of reading .fits files
+    from a network file system and of compressing results.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import copy
+import time
+import traceback
+import contextlib
+import collections
+import concurrent.futures
+from . import acweTelemetry
+
+# In[2]
+# Loader
+class Prefetcher:
+    '''
+    Opens frames ahead of their use in loader threads.
+
+    Parameters
+    ----------
+    load : function
+        load(file) opens a frame, e.g. returns its level 1.5 image and
+        header. It is called in the loader threads, so it must not use
+        objects that the main thread changes, e.g. a shared
+        acweDiskGeometry.DiskGeometryCache.
+    files : [str]
+        Frames, in the order in which they will be requested with get.
+    depth : int, optional
+        Number of frames opened ahead, i.e. kept in memory before they are
+        requested. 0 opens each frame when requested, in the calling thread.
+
+        Default Value: 2
+    loaders : int, optional
+        Number of loader threads.
+
+        Default Value: 1
+    '''
+
+    def __init__(self,load,files,depth=2,loaders=1):
+        self.load = load
+        self.files = collections.deque(files)
+        self.depth = depth
+        self._executor = concurrent.futures.ThreadPoolExecutor(loaders) \
+                         if depth > 0 else None
+        self._pending = collections.OrderedDict() # file: future
+        self._fill()
+
+    def _fill(self):
+        # Keep depth frames being opened or waiting
+        while self._executor is not None and self.files and \
+              len(self._pending) < self.depth:
+            file = self.files.popleft()
+            self._pending[file] = self._executor.submit(self.load,file)
+
+    def get(self,file):
+        '''
+        Returns load(file), waiting for it if it is still being opened, and
+        starts opening the next frame. Frames before file that were never
+        requested are dropped. Exceptions of load are raised here.
+        '''
+        if file in self._pending:
+            while True:
+                pendingFile,future = self._pending.popitem(last=False)
+                if pendingFile == file:
+                    break
+                future.cancel()
+        elif file in self.files:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            while self.files.popleft() != file:
+                pass
+            future = None
+        else:
+            future = None
+        self._fill()
+        if future is None:
+            return self.load(file)
+        return future.result()
+
+    def close(self):
+        '''
+        Cancels the frames not yet being opened, and waits for the others.
+        '''
+        self.files.clear()
+        for future in self._pending.values():
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self._pending.clear()
+
+# In[3]
+# Writer
+def _timed(function,args,kwargs):
+    # Run in the writer thread; returns the result and the time taken
+    start = time.perf_counter()
+    result = function(*args,**kwargs)
+    return result,time.perf_counter()-start
+
+class Writer:
+    '''
+    Saves results in a writer thread, in the order in which they are
+    submitted.
+
+    Parameters
+    ----------
+    depth : int, optional
+        Number of saves that may be pending; submit waits while there are
+        more. 0 saves in the calling thread.
+
+        Default Value: 2
+    '''
+
+    def __init__(self,depth=2):
+        self.depth = depth
+        self._executor = concurrent.futures.ThreadPoolExecutor(1) \
+                         if depth > 0 else None
+        self._pending = set()
+
+    def submit(self,function,*args,**kwargs):
+        '''
+        Runs function(*args,**kwargs) in the writer thread, e.g.
+        submit(acweSaveSeg_v5.saveSeg,filename,seg,H,...). The arguments must
+        not be changed afterwards, except acweTelemetry.Telemetry objects,
+        which are copied.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            Its result is that of function and the time it took in seconds.
+        '''
+        args = [copy.deepcopy(a) if isinstance(a,acweTelemetry.Telemetry)
+                else a for a in args]
+        kwargs = {k:copy.deepcopy(v) if isinstance(v,acweTelemetry.Telemetry)
+                  else v for k,v in kwargs.items()}
+
+        # Save now, in this thread
+        if self._executor is None:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(_timed(function,args,kwargs))
+            except Exception as error:
+                future.set_exception(error)
+            return future
+
+        # Wait for room
+        while len(self._pending) >= self.depth:
+            done,self._pending = concurrent.futures.wait(
+                self._pending,return_when=concurrent.futures.FIRST_COMPLETED)
+        future = self._executor.submit(_timed,function,args,kwargs)
+        self._pending.add(future)
+        return future
+
+    def wait(self):
+        '''
+        Waits for every pending save.
+        '''
+        concurrent.futures.wait(self._pending)
+        self._pending.clear()
+
+    def close(self):
+        '''
+        Waits for every pending save and stops the writer thread.
+        '''
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+# In[4]
+# Pipeline
+class Pipeline:
+    '''
+    Prefetcher and Writer for the frames of a run, which completes each
+    frame, e.g. in a job manifest, once its results are saved:
+
+        pipeline = Pipeline(load,files,depth,manifest=manifest)
+        for file in files:
+            with pipeline.frame(file,telemetry):
+                I,H = pipeline.load(file,telemetry)
+                ...
+                pipeline.submit(acweSaveSeg_v5.saveSeg,filename,seg,H,...)
+        pipeline.close()
+
+    As with acweManifest.Manifest.frame, an exception in the block fails the
+    frame and is not raised, except interrupts (KeyboardInterrupt); a frame
+    also fails if one of its saves fails.
+
+    Parameters
+    ----------
+    load : function
+        Opens a frame, see Prefetcher.
+    files : [str]
+        Frames to segment, in order, see Prefetcher.
+    depth : int, optional
+        Frames opened ahead, see Prefetcher; 0 opens each frame when needed.
+
+        Default Value: 2
+    loaders : int, optional
+        Number of loader threads.
+
+        Default Value: 1
+    writeDepth : int, optional
+        Pending saves, see Writer; 0 saves in the calling thread.
+
+        Default Value: 2
+    manifest : acweManifest.Manifest, optional
+        Manifest in which frames are started and finished. Only used from
+        the calling thread.
+
+        Default Value: None
+    verbose : bool, optional
+        Print the error of a failed frame.
+
+        Default Value: True
+    report : function, optional
+        If given, report(record) is called with the record of each frame
+        (see acweBatch.run_rotation) once its saves are done, in the order
+        of the frames, instead of finishing it in manifest and printing its
+        error.
+
+        Default Value: None
+    '''
+
+    def __init__(self,load,files,depth=2,loaders=1,writeDepth=2,
+                 manifest=None,verbose=True,report=None):
+        self.prefetcher = Prefetcher(load,files,depth,loaders)
+        self.writer = Writer(writeDepth)
+        self.manifest = manifest
+        self.verbose = verbose
+        self.report = report
+        self._frames = collections.deque() # frames with pending saves
+        self._current = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def load(self,file,telemetry=None):
+        '''
+        Returns the opened frame file, see Prefetcher.get. The time spent
+        waiting for it is recorded in telemetry as 'load'.
+        '''
+        with acweTelemetry.stage(telemetry,'load'):
+            return self.prefetcher.get(file)
+
+    def submit(self,function,*args,**kwargs):
+        '''
+        Saves a result of the current frame in the writer thread, see
+        Writer.submit.
+        '''
+        future = self.writer.submit(function,*args,**kwargs)
+        if self._current is not None:
+            self._current['futures'].append(future)
+        return future
+
+    @contextlib.contextmanager
+    def frame(self,file,telemetry=None):
+        '''
+        Context in which a frame is segmented, see Pipeline. It yields the
+        record of the frame, whose 'status' may be set to 'skipped'.
+        '''
+        self.poll()
+        if self.manifest is not None:
+            self.manifest.start(file)
+        record = {'file':file,'status':'done','error':None,'time':0.,
+                  'times':{}}
+        self._current = {'record':record,'futures':[],'telemetry':telemetry,
+                         'start':time.perf_counter()}
+        try:
+            yield record
+        except Exception:
+            record['status'] = 'failed'
+            record['error'] = traceback.format_exc()
+        finally:
+            current,self._current = self._current,None
+        current['time'] = time.perf_counter()-current['start']
+        self._frames.append(current)
+        self.poll()
+
+    def poll(self,wait=False):
+        '''
+        Completes the frames whose saves are done, in order; with wait, waits
+        for the saves of every frame.
+        '''
+        while self._frames and (wait or all(future.done() for future in
+                                            self._frames[0]['futures'])):
+            current = self._frames.popleft()
+            record = current['record']
+            record['time'] = current['time']
+            if current['telemetry'] is not None:
+                record['times'] = dict(current['telemetry'].times)
+            for future in current['futures']:
+                try:
+                    result,seconds = future.result()
+                    record['time'] += seconds
+                    record['times']['write'] = \
+                        record['times'].get('write',0.) + seconds
+                except Exception as error:
+                    record['status'] = 'failed'
+                    record['error'] = ''.join(traceback.format_exception(
+                        type(error),error,error.__traceback__))
+            self._finish(record)
+
+    def _finish(self,record):
+        if self.report is not None:
+            self.report(record)
+            return
+        status = record['status']
+        if self.manifest is not None:
+            status = self.manifest.finish(record)
+        if self.verbose and record['error'] is not None:
+            print('    Failed (' + status + '):\n' + record['error'])
+
+    def close(self):
+        '''
+        Stops opening frames, waits for every save and completes the frames.
+        '''
+        self.prefetcher.close()
+        self.writer.wait()
+        self.poll(wait=True)
+        self.writer.close()
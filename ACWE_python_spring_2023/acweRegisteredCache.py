@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Cache of registered (level 1.5) solar EUV images and their headers,
+    shared by all run scripts and analyses. Opening a level 1 .fits file
+    requires update_pointing and register, one of the costliest steps per
+    image, and the same images are segmented by the Standard, Scaled,
+    Intensity and ConfidenceMapping scripts. Each image is registered once
+    and saved in the cache as an uncompressed .npy file, which is memory
+    mapped when read. Entries are keyed by the path, modification time and
+    size of the source file and by the calibration version (aiapy and sunpy
+    versions), so an updated file or calibration is registered again. The
+    least recently used entries are removed when the cache exceeds its size.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import pickle
+import hashlib
+import numpy as np
+from . import acweTelemetry
+
+# In[2]
+# Key Values
+
+# Version of the cache format; entries of other versions are not read
+CACHE_VERSION = 1
+
+def calibration_version():
+    '''
+    Returns
+    -------
+    version : str
+        Versions of the packages used to register images, e.g.
+        'aiapy 0.6.4, sunpy 2.1.2'
+    '''
+    versions = []
+    for package in ['aiapy','sunpy']:
+        try:
+            module = __import__(package)
+            versions.append(package + ' ' +
+                            str(getattr(module,'__version__','unknown')))
+        except ImportError:
+            versions.append(package + ' none')
+    return ', '.join(versions)
+
+def source_key(filename,calibration=None):
+    '''
+    Returns
+    -------
+    key : str
+        Key of the registered version of the .fits file filename, from its
+        absolute path, modification time and size and the calibration
+        version (calibration_version() if None), which changes when the file
+        is downloaded again or the calibration is updated.
+    '''
+    calibration = calibration_version() if calibration is None \
+                  else calibration
+    stat = os.stat(filename)
+    source = '\n'.join([os.path.abspath(filename),str(stat.st_mtime_ns),
+                        str(stat.st_size),calibration,str(CACHE_VERSION)])
+    return hashlib.sha1(source.encode()).hexdigest()
+
+# In[3]
+# Cache
+class RegisteredCache:
+    '''
+    Cache of registered images in a folder.
+
+    Parameters
+    ----------
+    folder : str
+        Folder of the cache, created if needed. Any number of processes,
+        scripts and analyses can share it.
+    maxBytes : float, optional
+        Size of the cache; the least recently used entries are removed when
+        it is exceeded. A registered 4096x4096 AIA image uses 128 MB.
+
+        Default Value: 100e9
+    calibration : str, optional
+        Calibration version of the entries. If None, calibration_version().
+        Entries of other versions are not used, and are eventually evicted.
+
+        Default Value: None
+    mmap : bool, optional
+        Memory map the images, rather than reading them into memory. Memory
+        mapped images are read only.
+
+        Default Value: True
+    scanEvery : int, optional
+        Number of puts after which the size of the cache is measured again
+        by listing every entry. In between, the size is estimated from the
+        last measure and the entries put since, so a put costs no listing of
+        the cache; entries put by other processes are counted at the next
+        measure, so with P processes the cache may exceed maxBytes by up to
+        about P*scanEvery entries between measures.
+
+        Default Value: 64
+    '''
+
+    def __init__(self,folder,maxBytes=100e9,calibration=None,mmap=True,
+                 scanEvery=64):
+        self.folder = folder
+        self.maxBytes = maxBytes
+        self.calibration = calibration_version() if calibration is None \
+                           else calibration
+        self.mmap = mmap
+        self.scanEvery = scanEvery
+        self.hits = 0
+        self.misses = 0
+        self._size = None # estimated size in bytes, None until measured
+        self._puts = 0    # puts since the size was measured
+        os.makedirs(folder,exist_ok=True)
+
+    def key(self,filename):
+        '''
+        Returns
+        -------
+        key : str
+            Key of the registered version of the .fits file filename, see
+            source_key.
+        '''
+        return source_key(filename,self.calibration)
+
+    def _paths(self,key):
+        base = os.path.join(self.folder,key[:2],key)
+        return base + '.npy', base + '.header.pkl'
+
+    def get(self,filename):
+        '''
+        Returns
+        -------
+        I, H : [float], dict
+            Registered image and header of filename, or (None, None) if they
+            are not in the cache.
+        '''
+        imageFile,headerFile = self._paths(self.key(filename))
+        try:
+            with open(headerFile,'rb') as f:
+                H = pickle.load(f)
+            I = np.load(imageFile,mmap_mode='r' if self.mmap else None)
+            os.utime(imageFile) # most recently used
+        except (OSError,EOFError,ValueError,pickle.UnpicklingError):
+            self.misses += 1
+            return None,None
+        self.hits += 1
+        return I,H
+
+    def put(self,filename,I,H):
+        '''
+        Adds the registered image I and header H of filename to the cache,
+        then removes the least recently used entries if the cache is full
+        (see scanEvery).
+        '''
+        imageFile,headerFile = self._paths(self.key(filename))
+        os.makedirs(os.path.dirname(imageFile),exist_ok=True)
+        tmp = '.tmp.' + str(os.getpid())
+        # Header first, so that an image is never found without its header
+        with open(headerFile + tmp,'wb') as f:
+            pickle.dump(dict(H),f)
+            size = f.tell()
+        os.replace(headerFile + tmp,headerFile)
+        with open(imageFile + tmp,'wb') as f:
+            np.save(f,np.asarray(I))
+            size += f.tell()
+        os.replace(imageFile + tmp,imageFile)
+
+        # Measure the size, and evict, only when the estimate is full or
+        # stale
+        self._puts += 1
+        if self._size is not None and self._puts < self.scanEvery:
+            self._size += size
+            if self._size <= self.maxBytes:
+                return
+        self.evict()
+
+    def entries(self):
+        '''
+        Returns
+        -------
+        entries : [(float, int, str)]
+            Last use, size in bytes (image and header) and image file of
+            each entry, least recently used first.
+        '''
+        entries = []
+        for sub in os.listdir(self.folder):
+            sub = os.path.join(self.folder,sub)
+            if not os.path.isdir(sub):
+                continue
+            for name in os.listdir(sub):
+                if not name.endswith('.npy'):
+                    continue
+                imageFile = os.path.join(sub,name)
+                headerFile = imageFile[:-4] + '.header.pkl'
+                try:
+                    stat = os.stat(imageFile)
+                    size = stat.st_size + os.path.getsize(headerFile)
+                except OSError: # removed by another process
+                    continue
+                entries.append((stat.st_mtime,size,imageFile))
+        return sorted(entries)
+
+    def size(self):
+        '''
+        Returns
+        -------
+        size : int
+            Size of the cache in bytes.
+        '''
+        return sum(entry[1] for entry in self.entries())
+
+    def evict(self,maxBytes=None):
+        '''
+        Removes the least recently used entries until the cache is no larger
+        than maxBytes (self.maxBytes if None). Images already memory mapped
+        by other processes remain readable.
+        '''
+        maxBytes = self.maxBytes if maxBytes is None else maxBytes
+        entries = self.entries()
+        size = sum(entry[1] for entry in entries)
+        for lastUse,entrySize,imageFile in entries:
+            if size <= maxBytes:
+                break
+            for f in [imageFile,imageFile[:-4] + '.header.pkl']:
+                try:
+                    os.remove(f)
+                except OSError:
+                    pass
+            size -= entrySize
+        self._size = size
+        self._puts = 0
+
+    def clear(self):
+        '''
+        Removes every entry.
+        '''
+        self.evict(0)
+
+    def load(self,filename,retries=5,wait=30.,telemetry=None):
+        '''
+        Opens a solar EUV image as a level 1.5 data product, from the cache
+        if possible; otherwise it is opened and registered with
+        acweBatch.load_image and added to the cache.
+
+        Parameters
+        ----------
+        filename : str
+            Full path of the .fits file.
+        retries, wait, telemetry : optional
+            See acweBatch.load_image. On a cache hit the time spent reading
+            the cache is recorded as 'load'.
+        Returns
+        -------
+        I : [float]
+            Level 1.5 solar EUV image
+        H : dict
+            .fits header of I
+        '''
+        with acweTelemetry.stage(telemetry,'load'):
+            I,H = self.get(filename)
+        if I is None:
+            from .acweBatch import load_image
+            I,H = load_image(filename,retries,wait,telemetry)
+            self.put(filename,I,H)
+        return I,H
+
+def as_cache(cache,maxBytes=100e9):
+    '''
+    Returns cache if it is a RegisteredCache, a RegisteredCache in cache if
+    it is a folder, and None if it is None.
+    '''
+    if cache is None or isinstance(cache,RegisteredCache):
+        return cache
+    return RegisteredCache(cache,maxBytes)
+
+def load(filename,cache=None,retries=5,wait=30.,telemetry=None):
+    '''
+    Opens a solar EUV image as a level 1.5 data product, through cache if it
+    is given (a RegisteredCache or its folder), see RegisteredCache.load;
+    otherwise with acweBatch.load_image.
+    '''
+    cache = as_cache(cache)
+    if cache is None:
+        from .acweBatch import load_image
+        return load_image(filename,retries,wait,telemetry)
+    return cache.load(filename,retries,wait,telemetry)
@@ -15,7 +15,7 @@ import skimage.transform
 
 # Define upscale function
 def upscaleConMap(SEG,ACWEHEADER,interpolation='Bi-linear',split=0.5,
-                  returnInitMask=False):
+                  returnInitMask=False,dtype=np.float64):
     '''
     Function takes in the unaltered confidence map and the 
     ACWE header and uses this information to upscale all
@@ -43,6 +43,12 @@ def upscaleConMap(SEG,ACWEHEADER,interpolation='Bi-linear',split=0.5,
         identify cases where ACWE has changed target from CH to QS
         
         Default Value: False
+    dtype : numpy dtype
+        Floating point type of the upscaled segmentations and of the 
+        interpolation, e.g. np.float32 to halve the memory of full resolution
+        stacks.
+        
+        Default Value: np.float64
     Returns
     -------
     seg : [float]
@@ -64,7 +70,7 @@ def upscaleConMap(SEG,ACWEHEADER,interpolation='Bi-linear',split=0.5,
             break
         
     # Generate placeholder Segmentation
-    seg = np.empty(shape); seg[:,:,:] = np.nan
+    seg = np.empty(shape,dtype=dtype); seg[:,:,:] = np.nan
     
     # Populate
     for i in range(shape[0]):
@@ -73,7 +79,8 @@ def upscaleConMap(SEG,ACWEHEADER,interpolation='Bi-linear',split=0.5,
         if np.sum(np.isnan(SEG[i]).astype(int)) == 0:
             
             # upscale
-            s = skimage.transform.resize(SEG[i].astype(int),shape[1:],order=m,
+            s = skimage.transform.resize(SEG[i].astype(dtype),shape[1:],
+                                         order=m,
                                          preserve_range=True,
                                          anti_aliasing=True)
             
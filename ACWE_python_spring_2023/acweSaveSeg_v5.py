@@ -16,7 +16,7 @@ import numpy as np
 def saveSeg(filename,seg,h,correct_limb_brightening,resize_param,
             foreground_weight,background_weight,init_mask,init_mask_method,
             fill_init_holes,init_alpha,alpha,narrowband,N,
-            image_preprocess=None):
+            image_preprocess=None,telemetry=None,compressed=True):
     '''
     Save Function for use in collaboration with ACWE output generated using 
     acweFunctions_v4 or greater.
@@ -96,9 +96,22 @@ def saveSeg(filename,seg,h,correct_limb_brightening,resize_param,
         solar EUV image prior to performing ACWE.
         
         Default Value: None
+    telemetry : dict or acweTelemetry.Telemetry, optional
+        Stage times and convergence of the segmentation, as returned by the
+        run functions of acweFunctions_v6 when telemetry is requested. If 
+        provided, it is stored as a dictionary under 'TELEMETRY' in the ACWE 
+        header, and can be gathered across a dataset with 
+        acweTelemetry.collect.
+        
+        Default Value: None
+    compressed : bool, optional
+        Save a compressed .npz file. An uncompressed file is larger but
+        faster to save and open; both are read by openSeg.
+        
+        Default Value: True
     Outputs
     -------
-    At the specified file path there will be a compressed .npz file
+    At the specified file path there will be a .npz file
     containing, in order the original header h, as a dictionary, a header
     AH outlining the ACWE Process, and the ACWE segmentation(s) seg. 
     Since two of the outputs are headers, reopening the files requires
@@ -135,9 +148,16 @@ def saveSeg(filename,seg,h,correct_limb_brightening,resize_param,
                 'NARROWBAND'               : narrowband,
                 'ITTER_BETWEEN_CHK'        : N
                 }
+    if telemetry is not None:
+        if hasattr(telemetry,'to_dict'):
+            telemetry = telemetry.to_dict()
+        segHeader['TELEMETRY'] = telemetry
     
     # save as .npz file
-    np.savez_compressed(filename,H,segHeader,seg)
+    if compressed:
+        np.savez_compressed(filename,H,segHeader,seg)
+    else:
+        np.savez(filename,H,segHeader,seg)
 
 # In[3]:
 # Define open function 
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Store of preprocessed solar EUV images for experiments over the resize
+    parameter, such as Scaled/runACWEscaledDefault.py. For each frame, the
+    resized and limb brightening corrected image at every requested
+    resize_param is built in one pass over the registered image, and saved
+    with its solar disk geometry (image size, solar radius and center) and
+    the .fits header. Each scale is a separate .npy file, memory mapped when
+    read, so a run or an analysis only reads the scales it uses, and ACWE at
+    any stored scale needs no loading, registration, resizing or limb
+    brightening correction. Frames record the key of their source file (see
+    acweRegisteredCache.source_key), so a file downloaded again or a new
+    calibration is preprocessed again.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import json
+import pickle
+import numpy as np
+from . import acweFunctions_v6, acweSweep, acweTelemetry
+from . import acweRegisteredCache
+from .ACWE_python_v3 import acwe
+from .ACWE_python_v3 import correct_limb_brightening
+
+# In[2]
+# Key Values
+
+# Version of the store format; frames of other versions are built again
+STORE_VERSION = 2
+
+# In[3]
+# Stored Frame
+class ScaleFrame:
+    '''
+    Preprocessed scales of a frame in a ScaleStore, read lazily.
+
+    Parameters
+    ----------
+    folder : str
+        Folder of the frame in the store.
+    meta : dict
+        Contents of its meta.json.
+    mmap : bool, optional
+        Memory map the images, see ScaleStore.
+
+        Default Value: True
+    '''
+
+    def __init__(self,folder,meta,mmap=True):
+        self.folder = folder
+        self.meta = meta
+        self.mmap = mmap
+        self._header = None
+
+    @property
+    def resize_params(self):
+        '''
+        Stored values of resize_param, in increasing order.
+        '''
+        return sorted(scale['resize_param']
+                      for scale in self.meta['scales'].values())
+
+    def has(self,resize_params):
+        '''
+        Returns
+        -------
+        has : bool
+            True if every value of resize_params is stored.
+        '''
+        return all(str(r) in self.meta['scales']
+                   for r in np.atleast_1d(resize_params).tolist())
+
+    @property
+    def header(self):
+        '''
+        .fits header of the registered image, read when first used.
+        '''
+        if self._header is None:
+            with open(os.path.join(self.folder,'header.pkl'),'rb') as f:
+                self._header = pickle.load(f)
+        return self._header
+
+    def geometry(self,resize_param):
+        '''
+        Returns
+        -------
+        im_size : [int]
+            Dimensions of the image at resize_param.
+        sun_radius : float
+            Radius of the Sun in the image.
+        sun_center : [float]
+            Coordinates of the center of the sun in the image.
+        '''
+        scale = self.meta['scales'][str(resize_param)]
+        return (np.asarray(scale['im_size']),scale['sun_radius'],
+                np.asarray(scale['sun_center']))
+
+    def image(self,resize_param):
+        '''
+        Returns
+        -------
+        I : [float]
+            Resized and, if the store corrects it, limb brightening corrected
+            image at resize_param. Memory mapped images are read only.
+        '''
+        return np.load(os.path.join(self.folder,self.meta['scales'][
+                       str(resize_param)]['file']),
+                       mmap_mode='r' if self.mmap else None)
+
+    def prepared(self,resize_param,geometryCache=None):
+        '''
+        Returns
+        -------
+        prepared : acweSweep.PreparedImage
+            The image at resize_param, prepared for ACWE with any parameters
+            (see PreparedImage.segment); segmentations are the same as those
+            of run_acwe on the registered image.
+        '''
+        im_size,sun_radius,sun_center = self.geometry(resize_param)
+        return acweSweep.PreparedImage.from_image(self.image(resize_param),
+                                                  im_size,sun_radius,
+                                                  sun_center,resize_param,
+                                                  geometryCache)
+
+# In[4]
+# Store
+class ScaleStore:
+    '''
+    Store of preprocessed frames in a folder, in the folder layout of the
+    frames in the CR*.csv lists.
+
+    Parameters
+    ----------
+    folder : str
+        Folder of the store, created if needed.
+    correctLimbBrightening, dtype, interpolation : optional
+        See acweFunctions_v6.run_acwe. Frames stored with other values are
+        built again.
+    mmap : bool, optional
+        Memory map the images, rather than reading them into memory.
+
+        Default Value: True
+    calibration : str, optional
+        Calibration version of the frames, see acweRegisteredCache. If None,
+        acweRegisteredCache.calibration_version().
+
+        Default Value: None
+    '''
+
+    def __init__(self,folder,correctLimbBrightening=True,dtype=np.float64,
+                 interpolation='Bi-cubic',mmap=True,calibration=None):
+        self.folder = folder
+        self.calibration = acweRegisteredCache.calibration_version() \
+                           if calibration is None else calibration
+        self.correctLimbBrightening = correctLimbBrightening
+        self.dtype = np.dtype(dtype)
+        self.interpolation = interpolation
+        self.mmap = mmap
+        os.makedirs(folder,exist_ok=True)
+
+    def _settings(self):
+        return {'version':STORE_VERSION,
+                'correctLimbBrightening':bool(self.correctLimbBrightening),
+                'dtype':self.dtype.name,'interpolation':self.interpolation}
+
+    def frame_folder(self,file):
+        '''
+        Returns
+        -------
+        folder : str
+            Folder of the frame file, an entry of a CR*.csv list.
+        '''
+        return os.path.join(self.folder,file + '.scales')
+
+    def _source(self,source):
+        # Key of the source file, if given
+        if source is None:
+            return None
+        return acweRegisteredCache.source_key(source,self.calibration)
+
+    def open(self,file,resize_params=None,source=None):
+        '''
+        Returns
+        -------
+        frame : ScaleFrame
+            The stored frame file, or None if it is not stored with the
+            settings of the store or, if given, without every value of
+            resize_params or from another version of the .fits file source
+            (its full path) or another calibration.
+        '''
+        folder = self.frame_folder(file)
+        try:
+            with open(os.path.join(folder,'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError,ValueError):
+            return None
+        if meta['settings'] != self._settings():
+            return None
+        if source is not None and meta['source'] != self._source(source):
+            return None
+        frame = ScaleFrame(folder,meta,self.mmap)
+        if resize_params is not None and not frame.has(resize_params):
+            return None
+        return frame
+
+    def build(self,file,J,h,resize_params,geometryCache=None,
+              telemetry=None,source=None):
+        '''
+        Preprocesses the registered image of a frame at every value of
+        resize_params and adds them to the store. Scales already stored are
+        kept.
+
+        Parameters
+        ----------
+        file : str
+            Frame, as listed in a CR*.csv file.
+        J : [float]
+            Level 1.5 solar EUV image
+        h : dict
+            .fits header of J
+        resize_params : [int]
+            Values of resize_param to store.
+        geometryCache : acweDiskGeometry.DiskGeometryCache, optional
+            See acweFunctions_v6.run_acwe.
+
+            Default Value: None
+        telemetry : acweTelemetry.Telemetry, optional
+            Records the time spent resizing ('resize'), correcting limb
+            brightening ('limb') and saving ('store').
+
+            Default Value: None
+        source : str, optional
+            Full path of the .fits file of J, whose key is stored with the
+            frame. Scales stored from another version of it are replaced.
+
+            Default Value: None
+        Returns
+        -------
+        frame : ScaleFrame
+            The stored frame.
+        '''
+        folder = self.frame_folder(file)
+        os.makedirs(folder,exist_ok=True)
+        tmp = '.tmp.' + str(os.getpid())
+        frame = self.open(file,source=source)
+        scales = {} if frame is None else dict(frame.meta['scales'])
+
+        # Header first, so that a scale is never found without it
+        with acweTelemetry.stage(telemetry,'store'):
+            with open(os.path.join(folder,'header.pkl') + tmp,'wb') as f:
+                pickle.dump(dict(h),f)
+            os.replace(os.path.join(folder,'header.pkl') + tmp,
+                       os.path.join(folder,'header.pkl'))
+
+        for r in np.atleast_1d(resize_params).tolist():
+            if str(r) in scales:
+                continue
+
+            # Resize image, and correct limb brightening, as in run_acwe
+            with acweTelemetry.stage(telemetry,'resize'):
+                I,im_size,sun_radius,sun_center = acweFunctions_v6.resize_EUV(
+                    J,h,r,self.interpolation,self.dtype)
+            if self.correctLimbBrightening:
+                with acweTelemetry.stage(telemetry,'limb'):
+                    geometry = acweFunctions_v6.disk_geometry(
+                        im_size,sun_center,sun_radius,geometryCache)
+                    I = correct_limb_brightening.correct_limb_brightening(
+                        I,sun_center,sun_radius,acwe.float_type(I),
+                        geometry=geometry)
+
+            # Save image
+            with acweTelemetry.stage(telemetry,'store'):
+                name = 'resize_param' + str(r) + '.npy'
+                with open(os.path.join(folder,name) + tmp,'wb') as f:
+                    np.save(f,I)
+                os.replace(os.path.join(folder,name) + tmp,
+                           os.path.join(folder,name))
+                scales[str(r)] = {'resize_param':r,'file':name,
+                                  'im_size':[int(n) for n in im_size],
+                                  'sun_radius':float(sun_radius),
+                                  'sun_center':[float(c) for c in sun_center]}
+
+        # Scales are listed once saved
+        meta = {'settings':self._settings(),'source':self._source(source),
+                'scales':scales}
+        with acweTelemetry.stage(telemetry,'store'):
+            with open(os.path.join(folder,'meta.json') + tmp,'w') as f:
+                json.dump(meta,f,indent=1)
+            os.replace(os.path.join(folder,'meta.json') + tmp,
+                       os.path.join(folder,'meta.json'))
+        return ScaleFrame(folder,meta,self.mmap)
+
+    def get(self,file,resize_params,load,geometryCache=None,telemetry=None,
+            source=None):
+        '''
+        Returns the stored frame file with every value of resize_params,
+        building it if needed.
+
+        Parameters
+        ----------
+        file : str
+            Frame, as listed in a CR*.csv file.
+        resize_params : [int]
+            Values of resize_param needed.
+        load : function
+            load() returns the level 1.5 image and header of the frame, e.g.
+            lambda: acweRegisteredCache.load(filename,cache); only called if
+            the frame must be built.
+        geometryCache, telemetry, source : optional
+            See build. With source, the frame is built again if the .fits
+            file or calibration changed since it was stored.
+        Returns
+        -------
+        frame : ScaleFrame
+            The stored frame.
+        '''
+        frame = self.open(file,resize_params,source)
+        if frame is None:
+            J,h = load()
+            frame = self.build(file,J,h,resize_params,geometryCache,
+                               telemetry,source)
+        return frame
+
+def as_store(store,correctLimbBrightening=True,dtype=np.float64,
+             interpolation='Bi-cubic'):
+    '''
+    Returns store if it is a ScaleStore, a ScaleStore in store if it is a
+    folder, and None if it is None.
+    '''
+    if store is None or isinstance(store,ScaleStore):
+        return store
+    return ScaleStore(store,correctLimbBrightening,dtype,interpolation)
+
+# In[5]
+# Batch Task
+class ScaleStoreTask:
+    '''
+    Runs ACWE tasks at several values of resize_param on the frames of a
+    ScaleStore, with acweBatch.run_rotation. A frame is only loaded and
+    registered if it is not yet stored at every scale of the tasks (and of
+    scales), in which case all of them are built from one load.
+
+    Parameters
+    ----------
+    tasks : [acweBatch.ACWETask]
+        Tasks performed on each frame, in order, with the correction of limb
+        brightening, dtype and interpolation of the store. Confidence maps
+        and pyramid seeding are not supported.
+    store : ScaleStore or str
+        Store, or its folder.
+    scales : [int], optional
+        Further values of resize_param stored with each frame, e.g. for
+        later runs.
+
+        Default Value: []
+    overwrite : bool, optional
+        See acweBatch.MultiTask.
+
+        Default Value: False
+    '''
+
+    def __init__(self,tasks,store,scales=[],overwrite=False):
+        self.tasks = list(tasks)
+        self.store = as_store(store)
+        self.scales = sorted(set(list(scales) + [task.resize_param
+                                                 for task in self.tasks]))
+        self.overwrite = overwrite
+        self.prefix = ''.join(task.prefix for task in self.tasks)
+
+    def outputs(self,file):
+        return [f for task in self.tasks for f in task.outputs(file)]
+
+    def load(self,filename,file,state,retries=5,wait=30.,telemetry=None):
+        '''
+        Returns the stored frame file, built from the image filename if
+        needed, and its header; see acweBatch._process. The geometry cache
+        of state is not used, as this may run in a loader thread (see
+        acwePrefetch.py).
+        '''
+        frame = self.store.get(file,self.scales,
+                               lambda: acweRegisteredCache.load(
+                                   filename,state.cache,retries,wait,
+                                   telemetry),
+                               telemetry=telemetry,source=filename)
+        return frame,frame.header
+
+    def __call__(self,frame,H,file,crSaveFolder,state,telemetry=None):
+        for task in self.tasks:
+            if self.overwrite or not all(os.path.exists(crSaveFolder + f)
+                                         for f in task.outputs(file)):
+                prepared = frame.prepared(task.resize_param,
+                                          state.geometryCache)
+                seg,alphar,m = task.segment_prepared(prepared,state,
+                                                     telemetry)
+                task.save(crSaveFolder + task.outputs(file)[0],seg,H,alphar,
+                          m,telemetry,writer=state.writer)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Shared preprocessing for parameter sweeps. A PreparedImage resizes an EUV
+    image, corrects limb brightening and builds the solar disk mask once; the
+    initial masks for each alpha are cached, and any number of ACWE runs can
+    then be performed from that single preparation, either directly or over
+    a grid of parameters with sweep.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import itertools
+import concurrent.futures
+import numpy as np
+from . import acweFunctions_v6, acweTelemetry
+from .ACWE_python_v3 import acwe
+from .ACWE_python_v3 import correct_limb_brightening
+
+# In[2]
+# Prepared Image
+class PreparedImage:
+    '''
+    Solar EUV image prepared for ACWE, as in run_acwe, so that many ACWE runs
+    can share one resize, limb brightening correction and solar disk mask.
+
+    Parameters
+    ----------
+    J : [float]
+        Solar EUV image stored as a numpy array
+    h : dict
+        .fits header for Solar EUV image J
+    resize_param, correctLimbBrightening, dtype, geometryCache,
+    interpolation : optional
+        See acweFunctions_v6.run_acwe.
+    '''
+
+    def __init__(self,J,h,resize_param=8,correctLimbBrightening=True,
+                 dtype=np.float64,geometryCache=None,
+                 interpolation='Bi-cubic'):
+
+        # Resize image
+        I,im_size,sun_radius,sun_center = acweFunctions_v6.resize_EUV(
+            J,h,resize_param,interpolation,dtype)
+        geometry = acweFunctions_v6.disk_geometry(im_size,sun_center,
+                                                  sun_radius,geometryCache)
+
+        # Correct limb brightening per Verbeeck et al. 2014
+        if correctLimbBrightening:
+            I = correct_limb_brightening.correct_limb_brightening(I,sun_center,
+                                                                  sun_radius,
+                                                        acwe.float_type(I),
+                                                        geometry=geometry)
+
+        self.I = I
+        self.im_size = im_size
+        self.sun_radius = sun_radius
+        self.sun_center = sun_center
+        self.geometry = geometry
+        self.resize_param = resize_param
+        self._masks = {}
+
+    @classmethod
+    def from_image(cls,I,im_size,sun_radius,sun_center,resize_param=8,
+                   geometryCache=None):
+        '''
+        Returns a PreparedImage of an image that is already resized and, if
+        needed, limb brightening corrected, e.g. from acweScaleStore.
+
+        Parameters
+        ----------
+        I : [float]
+            Prepared solar EUV image
+        im_size, sun_radius, sun_center :
+            As returned by acweFunctions_v6.resize_EUV for I.
+        resize_param, geometryCache : optional
+            See acweFunctions_v6.run_acwe.
+        '''
+        prepared = cls.__new__(cls)
+        prepared.I = I
+        prepared.im_size = im_size
+        prepared.sun_radius = sun_radius
+        prepared.sun_center = sun_center
+        prepared.geometry = acweFunctions_v6.disk_geometry(im_size,sun_center,
+                                                           sun_radius,
+                                                           geometryCache)
+        prepared.resize_param = resize_param
+        prepared._masks = {}
+        return prepared
+
+    def initial_mask(self,alpha=0.3,rollingAlpha=0):
+        '''
+        Parameters
+        ----------
+        alpha, rollingAlpha : float, optional
+            See acweFunctions_v6.inital_masks.
+        Returns
+        -------
+        sd_mask : [bool]
+            Mask that separates on-disk and off-disk areas
+        m : [bool]
+            Initial mask, note holes are not filled prior to returning mask.
+        alphar : float
+            The alpha parameter that was actually used to generate the mask
+        '''
+        key = (alpha,rollingAlpha != 0)
+        if key not in self._masks:
+            masks = acweFunctions_v6.inital_masks(self.I,self.im_size,
+                                                  self.sun_radius,
+                                                  self.sun_center,alpha,
+                                                  rollingAlpha,self.geometry)
+            if rollingAlpha == 0:
+                masks = masks+(alpha,)
+            masks[1].setflags(write=False) # shared by every run
+            self._masks[key] = masks
+        return self._masks[key]
+
+    def segment(self,foreground_weight=1,background_weight=1/50.,alpha=0.3,
+                narrowband=2,N=10,verbose=False,rollingAlpha=0,
+                fillInitHoles=True,engine='dense',reinit=None,
+                incrementalMeans=False,workspace=None,cropToSeed=False,
+                cropMargin=None,telemetry=None):
+        '''
+        Performs ACWE on the prepared image.
+
+        Parameters
+        ----------
+        foreground_weight, background_weight, alpha, narrowband, N, verbose,
+        rollingAlpha, fillInitHoles, engine, reinit, incrementalMeans,
+        workspace, cropToSeed, cropMargin : optional
+            See acweFunctions_v6.run_acwe.
+        telemetry : acweTelemetry.Telemetry, optional
+            Records the time spent on the initial mask ('seed') and ACWE
+            ('evolve'), and the iterations of the run.
+
+            Default Value: None
+        Returns
+        -------
+        seg, alphar, m :
+            As returned by acweFunctions_v6.run_acwe with the same parameters;
+            alphar is only returned if rollingAlpha != 0.
+        '''
+        with acweTelemetry.stage(telemetry,'seed'):
+            sd_mask,m,alphar = self.initial_mask(alpha,rollingAlpha)
+        with acweTelemetry.stage(telemetry,'evolve'):
+            # ACWE sets the off-disk pixels in place, which a memory mapped
+            # image does not allow
+            if not self.I.flags.writeable:
+                self.I = np.array(self.I)
+            seg = acweFunctions_v6.itterate_acwe(self.I,self.im_size,sd_mask,
+                                                 m,foreground_weight,
+                                                 background_weight,narrowband,
+                                                 N,fillInitHoles,verbose,
+                                                 engine,reinit,
+                                                 incrementalMeans,workspace,
+                                                 cropToSeed,cropMargin,
+                                                 telemetry=telemetry)
+        if rollingAlpha != 0:
+            return seg,alphar,m
+        return seg,m
+
+# In[3]
+# Parameter Sweep
+_prepared = None
+def _initialize(prepared):
+    # Worker process initializer; the prepared image is sent once per process
+    global _prepared
+    _prepared = prepared
+
+def _segment(prepared,key,kwargs):
+    # Worker for sweep; module level so that it can be pickled
+    if prepared is None:
+        prepared = _prepared
+    background_weight,alpha,narrowband,N = key
+    return key,prepared.segment(background_weight=background_weight,
+                                alpha=alpha,narrowband=narrowband,N=N,
+                                **kwargs)
+
+def sweep(prepared,background_weights=[1/50.],alphas=[0.3],narrowbands=[2],
+          Ns=[10],processes=None,**kwargs):
+    '''
+    Performs ACWE on a prepared image for every combination of the given
+    parameters.
+
+    Parameters
+    ----------
+    prepared : PreparedImage
+        Image prepared for ACWE.
+    background_weights, alphas, narrowbands, Ns : list, optional
+        Values of background_weight, alpha, narrowband and N to combine, see
+        acweFunctions_v6.run_acwe.
+
+        Default Value: [1/50.], [0.3], [2], [10]
+    processes : int, optional
+        Number of worker processes. If None, the runs are performed one after
+        another in this process, reusing one acwe.ACWEWorkspace. Otherwise 
+        the prepared image is copied to each process once and any workspace
+        in kwargs is ignored.
+
+        Default Value: None
+    **kwargs : optional
+        Any other parameters of PreparedImage.segment, used for every run.
+    Returns
+    -------
+    results : dict
+        Output of PreparedImage.segment for each parameter combination, keyed
+        by (background_weight, alpha, narrowband, N).
+    '''
+    keys = list(itertools.product(background_weights,alphas,narrowbands,Ns))
+
+    # One after another, sharing the workspace
+    if processes is None:
+        if kwargs.get('workspace') is None:
+            kwargs['workspace'] = acwe.ACWEWorkspace(
+                prepared.im_size,acwe.float_type(prepared.I))
+        return dict(_segment(prepared,key,kwargs) for key in keys)
+
+    # In parallel; initial masks are cached before the image is sent to the
+    # workers, so they are not regenerated for every run
+    for alpha in alphas:
+        prepared.initial_mask(alpha,kwargs.get('rollingAlpha',0))
+    kwargs.pop('workspace',None)
+    with concurrent.futures.ProcessPoolExecutor(processes,
+                                                initializer=_initialize,
+                                                initargs=(prepared,)) \
+                                                as executor:
+        futures = [executor.submit(_segment,None,key,kwargs)
+                   for key in keys]
+        return dict(future.result() for future in futures)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Synthetic solar EUV images for benchmarking and for testing pipelines
+    without real data. Each image is a limb brightened disk with a faint
+    corona, dark coronal holes (CHs) and bright active regions placed at
+    heliographic coordinates, and Gaussian noise, together with a header that
+    carries the keywords read by resize_EUV and the dataset scripts and the
+    true CH mask. Features rotate with solar differential rotation, so a
+    series of images can be generated for a time series or a Carrington
+    rotation.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import numpy as np
+from . import acweTimeSeries
+
+# In[2]
+# Key Values
+
+# Default features; (longitude, latitude, radius) in degrees, longitude
+# measured from the central meridian at days = 0
+HOLES   = [(-20.,15.,12.),(30.,-25.,8.),(5.,65.,15.)]
+REGIONS = [(-35.,-15.,5.),(45.,20.,4.)]
+
+# AIA 193 at full resolution, used to scale the synthetic headers
+AIA_SIZE   = 4096
+AIA_R_SUN  = 1600. # pixels
+AIA_CDELT  = 0.6   # arcsec per pixel
+DSUN       = 1.496e11 # meters
+
+# Rough quiet Sun intensity (DN/s), and CH and active region contrast, of each
+# AIA channel; close enough for pipeline tests, not for science
+CHANNELS = {94  : (2.,   0.5,  5.),
+            131 : (10.,  0.5,  5.),
+            171 : (400., 0.7,  2.),
+            193 : (1000.,0.15, 3.),
+            211 : (300., 0.15, 4.),
+            304 : (150., 0.6,  2.),
+            335 : (10.,  0.2,  4.)}
+
+# In[3]
+# Synthetic Header
+def synthetic_header(size=4096,wavelength=193,time='2010-09-16T07:00:02',
+                     level=1.5,instrument='AIA'):
+    '''
+    Generates a header for a synthetic image, scaled from AIA.
+
+    Parameters
+    ----------
+    size : int, optional
+        Dimensions of the (square) image.
+
+        Default Value: 4096
+    wavelength : int, optional
+        Wavelength of the image, in angstroms. Ignored for HMI.
+
+        Default Value: 193
+    time : str, optional
+        Observation time, in ISO format.
+
+        Default Value: '2010-09-16T07:00:02'
+    level : float, optional
+        Data level, LVL_NUM. Level 1.5 images are centered; the disk of level
+        1 images is offset by a few pixels, as before registration.
+
+        Default Value: 1.5
+    instrument : str, optional
+        'AIA' for an EUV image or 'HMI' for a magnetogram. Both use the 
+        geometry of AIA.
+
+        Default Value: 'AIA'
+    Returns
+    -------
+    h : dict
+        Header including R_SUN, RSUN_OBS, CDELT1/2, CRPIX1/2, NAXIS1/2,
+        LVL_NUM, QUALITY, WAVELNTH, CROTA2, CRLT_OBS, DATE-OBS, T_OBS and
+        T_REC, and the observer and coordinate keywords needed to open the
+        image with sunpy.map.Map.
+    '''
+    scale = AIA_SIZE/float(size)
+    R_SUN = AIA_R_SUN/scale
+    CDELT = AIA_CDELT*scale
+    CRPIX = (size+1)/2. # FITS pixels start at 1
+    if level < 1.5: # as observed, before registration
+        CRPIX = CRPIX+2.5/scale
+    time = str(time).rstrip('Z')
+    if instrument == 'HMI':
+        instrument = {'TELESCOP':'SDO/HMI','INSTRUME':'HMI_FRONT2',
+                      'CONTENT':'MAGNETOGRAM','BUNIT':'Mx/cm^2',
+                      'WAVELNTH':6173,'WAVEUNIT':'angstrom'}
+    else:
+        instrument = {'TELESCOP':'SDO/AIA','INSTRUME':'AIA_4',
+                      'BUNIT':'DN/s','EXPTIME':1.,'WAVELNTH':int(wavelength),
+                      'WAVEUNIT':'angstrom'}
+    return {'NAXIS'    : 2,
+            'NAXIS1'   : int(size),
+            'NAXIS2'   : int(size),
+            'R_SUN'    : R_SUN,
+            'RSUN_OBS' : R_SUN*CDELT,
+            'RSUN'     : R_SUN*CDELT,
+            'CDELT1'   : CDELT,
+            'CDELT2'   : CDELT,
+            'CRPIX1'   : CRPIX,
+            'CRPIX2'   : CRPIX,
+            'CRVAL1'   : 0.,
+            'CRVAL2'   : 0.,
+            'CTYPE1'   : 'HPLN-TAN',
+            'CTYPE2'   : 'HPLT-TAN',
+            'CUNIT1'   : 'arcsec',
+            'CUNIT2'   : 'arcsec',
+            'CROTA2'   : 0.,
+            'CRLT_OBS' : 0.,
+            'HGLT_OBS' : 0.,
+            'HGLN_OBS' : 0.,
+            'DSUN_OBS' : DSUN,
+            'LVL_NUM'  : level,
+            'QUALITY'  : 0,
+            'DATE-OBS' : time,
+            'T_OBS'    : time+'Z',
+            'T_REC'    : time+'Z',
+            **instrument}
+
+# In[4]
+# Heliographic coordinates
+def heliographic(h,shape=None):
+    '''
+    Parameters
+    ----------
+    h : dict
+        Header of the image, see synthetic_header.
+    shape : [int], optional
+        Dimensions of the image. If None, NAXIS2 x NAXIS1.
+
+        Default Value: None
+    Returns
+    -------
+    r : [float]
+        Distance of every pixel from the solar center, in solar radii.
+    lat, lon : [float]
+        Heliographic latitude and longitude (from the central meridian) of
+        every pixel, in radians; NaN off disk.
+    '''
+    if shape is None:
+        shape = (h['NAXIS2'],h['NAXIS1'])
+    y,x = np.indices(shape,dtype=float)
+    X = (x-(h['CRPIX1']-1))/h['R_SUN']
+    Y = (y-(h['CRPIX2']-1))/h['R_SUN']
+    r = np.hypot(X,Y)
+    with np.errstate(invalid='ignore'):
+        Z = np.sqrt(1-r**2) # NaN off disk
+        lat = np.arcsin(Y)+Z*0
+    return r,lat,np.arctan2(X,Z)
+
+def feature_mask(lat,lon,features,days=0.):
+    '''
+    Parameters
+    ----------
+    lat, lon : [float]
+        Heliographic coordinates of every pixel, see heliographic.
+    features : [(float, float, float)]
+        (longitude, latitude, radius) of each feature, in degrees, at
+        days = 0.
+    days : float, optional
+        Time since days = 0; every feature is moved by the differential
+        rotation rate at its latitude (see acweTimeSeries.rotation_rate).
+
+        Default Value: 0.0
+    Returns
+    -------
+    mask : [bool]
+        Pixels within the radius (great circle distance) of any feature.
+    '''
+    mask = np.zeros(lat.shape,dtype=bool)
+    if len(features) == 0:
+        return mask
+    
+    # On disk pixels only
+    on_disk = np.isfinite(lat)
+    lat = lat[on_disk]; lon = lon[on_disk]
+    sin_lat = np.sin(lat); cos_lat = np.cos(lat)
+    
+    found = np.zeros(lat.shape,dtype=bool)
+    for lon0,lat0,radius in features:
+        lat0 = np.deg2rad(lat0)
+        lon0 = np.deg2rad(lon0)+acweTimeSeries.rotation_rate(lat0)*days
+        cosd = sin_lat*np.sin(lat0) + cos_lat*np.cos(lat0)*np.cos(lon-lon0)
+        found |= cosd >= np.cos(np.deg2rad(radius))
+    mask[on_disk] = found
+    return mask
+
+# In[5]
+# Synthetic Image
+def synthetic_disk(size=1024,holes=HOLES,regions=REGIONS,days=0.,seed=0,
+                   quietSun=1000.,limb=0.3,holeContrast=0.15,
+                   regionContrast=3.,noise=0.03,h=None,dtype=np.float64,
+                   coordinates=None):
+    '''
+    Generates a synthetic solar EUV image.
+
+    Parameters
+    ----------
+    size : int, optional
+        Dimensions of the (square) image, used if h is None.
+
+        Default Value: 1024
+    holes, regions : [(float, float, float)], optional
+        (longitude, latitude, radius) of each CH and active region, in
+        degrees, see feature_mask.
+
+        Default Value: HOLES, REGIONS
+    days : float, optional
+        Time since days = 0, by which the features have rotated.
+
+        Default Value: 0.0
+    seed : int, optional
+        Seed of the noise.
+
+        Default Value: 0
+    quietSun : float, optional
+        Quiet Sun intensity at disk center.
+
+        Default Value: 1000.0
+    limb : float, optional
+        Limb brightening; the quiet Sun intensity at the limb is
+        quietSun*(1+limb).
+
+        Default Value: 0.3
+    holeContrast, regionContrast : float, optional
+        Intensity of CHs and active regions relative to the quiet Sun.
+
+        Default Value: 0.15, 3.0
+    noise : float, optional
+        Standard deviation of the Gaussian noise, relative to quietSun.
+
+        Default Value: 0.03
+    h : dict, optional
+        Header of the image. If None, synthetic_header(size) is used.
+
+        Default Value: None
+    dtype : numpy dtype, optional
+        Floating point type of the image.
+
+        Default Value: np.float64
+    coordinates : ([float], [float], [float]), optional
+        Output of heliographic(h), to reuse it across images with the same
+        header. If None, it is computed.
+
+        Default Value: None
+    Returns
+    -------
+    J : [float]
+        Synthetic solar EUV image
+    h : dict
+        .fits header for J
+    truth : [bool]
+        True CH mask
+    '''
+    if h is None:
+        h = synthetic_header(size)
+    if coordinates is None:
+        coordinates = heliographic(h)
+    r,lat,lon = coordinates
+    on_disk = r <= 1
+
+    # Quiet Sun with limb brightening, and a faint corona off disk
+    J = np.where(on_disk,quietSun*(1+limb*r**4),
+                 0.2*quietSun*np.exp(-(r-1)*10))
+
+    # Features
+    truth = feature_mask(lat,lon,holes,days) & on_disk
+    J[truth] *= holeContrast
+    J[feature_mask(lat,lon,regions,days) & on_disk] *= regionContrast
+
+    # Noise
+    rng = np.random.default_rng(seed)
+    J += rng.normal(0,noise*quietSun,J.shape)
+    J = np.clip(J,1,None).astype(dtype,copy=False)
+
+    return J,h,truth
+
+def synthetic_magnetogram(size=1024,holes=HOLES,regions=REGIONS,days=0.,
+                          seed=0,noise=10.,holeField=20.,regionField=500.,
+                          h=None,coordinates=None):
+    '''
+    Generates a synthetic line of sight magnetogram, with the same features
+    as synthetic_disk: unipolar CHs (positive in the north, negative in the
+    south) and bipolar active regions.
+
+    Parameters
+    ----------
+    size, holes, regions, days, seed, coordinates : optional
+        See synthetic_disk.
+    noise : float, optional
+        Standard deviation of the Gaussian noise, in Gauss.
+
+        Default Value: 10.0
+    holeField, regionField : float, optional
+        Field strength of CHs and of each polarity of active regions, in
+        Gauss.
+
+        Default Value: 20.0, 500.0
+    h : dict, optional
+        Header of the image. If None, synthetic_header(size,instrument='HMI')
+        is used.
+
+        Default Value: None
+    Returns
+    -------
+    B : [float]
+        Synthetic magnetogram, NaN off disk as for HMI
+    h : dict
+        .fits header for B
+    '''
+    if h is None:
+        h = synthetic_header(size,instrument='HMI')
+    if coordinates is None:
+        coordinates = heliographic(h)
+    r,lat,lon = coordinates
+    
+    rng = np.random.default_rng(seed)
+    B = rng.normal(0,noise,r.shape)
+    for feature in holes:
+        B[feature_mask(lat,lon,[feature],days)] += np.sign(feature[1])* \
+                                                   holeField
+    for feature in regions: # leading and trailing polarity
+        lat0 = np.deg2rad(feature[1])
+        lon0 = np.deg2rad(feature[0])+acweTimeSeries.rotation_rate(lat0)*days
+        mask = feature_mask(lat,lon,[feature],days)
+        B[mask] += np.where(lon[mask]>lon0,1,-1)*np.sign(feature[1])* \
+                   regionField
+    B[~(r <= 1)] = np.nan
+    
+    return B,h
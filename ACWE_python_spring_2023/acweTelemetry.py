@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Timing and iteration telemetry for ACWE. A Telemetry object records the
+    wall time of each processing stage (e.g. FITS load, registration,
+    resize, limb brightening correction, seeding, evolution and save) and,
+    for each ACWE run, the number of checks for convergence and the
+    convergence trace. The run functions of acweFunctions_v6 fill it in when
+    given one, drivers can add their own stages, and saveSeg can store it in
+    the ACWE header so that telemetry can be collected over a whole dataset.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import time
+import contextlib
+import numpy as np
+from . import acweSaveSeg_v5
+
+# In[2]
+# Telemetry
+class Telemetry:
+    '''
+    Record of the wall time of each processing stage and of the convergence
+    of each ACWE run.
+
+    Attributes
+    ----------
+    times : dict
+        Wall time of each stage, in seconds, accumulated over all uses of the
+        stage.
+    runs : [dict]
+        One entry per ACWE run (e.g. per background weight of a confidence
+        map), with the background weight, N, the number of checks for
+        convergence, the number of ACWE iterations (checks*N), and the
+        percentage of pixels that changed ('percentDiff') and that changed
+        for the first time ('percentNewDiff') at each check.
+    '''
+
+    def __init__(self):
+        self.times = {}
+        self.runs = []
+
+    @contextlib.contextmanager
+    def stage(self,name):
+        '''
+        Context manager that adds the wall time of its block to stage name.
+        '''
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.times[name] = self.times.get(name,0.) + \
+                               time.perf_counter()-start
+
+    def start_run(self,background_weight,N):
+        '''
+        Begin the record of an ACWE run.
+        '''
+        self.runs.append({'background_weight':float(background_weight),
+                          'N':int(N),'checks':0,'iterations':0,
+                          'percentDiff':[],'percentNewDiff':[]})
+
+    def check(self,percent_diff,percent_new_diff):
+        '''
+        Record a check for convergence of the current ACWE run.
+        '''
+        run = self.runs[-1]
+        run['checks'] += 1
+        run['iterations'] += run['N']
+        run['percentDiff'].append(float(percent_diff))
+        run['percentNewDiff'].append(float(percent_new_diff))
+
+    def to_dict(self):
+        '''
+        Returns
+        -------
+        telemetry : dict
+            Plain dictionary of the telemetry, suitable for saveSeg, with the
+            stage times ('times'), the runs ('runs'), and the total number of
+            checks ('checks') and iterations ('iterations') over all runs.
+        '''
+        return {'times':dict(self.times),
+                'runs':[dict(run) for run in self.runs],
+                'checks':sum(run['checks'] for run in self.runs),
+                'iterations':sum(run['iterations'] for run in self.runs)}
+
+def as_telemetry(telemetry):
+    '''
+    Telemetry argument of the run functions: None or False disables 
+    telemetry, True creates a new Telemetry, and a Telemetry is used as is.
+    '''
+    if telemetry is True:
+        return Telemetry()
+    if telemetry is False:
+        return None
+    return telemetry
+
+def stage(telemetry,name):
+    '''
+    Telemetry.stage of telemetry, or a context manager that does nothing if 
+    telemetry is None.
+    '''
+    if telemetry is None:
+        return contextlib.nullcontext()
+    return telemetry.stage(name)
+
+# In[3]
+# Dataset Summary
+def collect(filenames):
+    '''
+    Collects the telemetry saved with segmentations (see saveSeg).
+
+    Parameters
+    ----------
+    filenames : [str]
+        Segmentation files saved by acweSaveSeg_v5.saveSeg. Files without
+        telemetry are skipped.
+    Returns
+    -------
+    stages : dict
+        For each stage, an array of its wall time in each file (NaN where the
+        stage was not recorded).
+    iterations : [int]
+        Total ACWE iterations of each file.
+    checks : [int]
+        Checks for convergence of every ACWE run of every file, e.g. for a
+        histogram when tuning N.
+    files : [str]
+        Files with telemetry, in the order of the arrays.
+    '''
+    records = []; files = []
+    for filename in filenames:
+        ACWEHEADER = acweSaveSeg_v5.openSeg(filename)[1]
+        if ACWEHEADER.get('TELEMETRY') is not None:
+            records.append(ACWEHEADER['TELEMETRY']); files.append(filename)
+
+    names = sorted(set(k for r in records for k in r['times']))
+    stages = {k:np.array([r['times'].get(k,np.nan) for r in records])
+              for k in names}
+    iterations = np.array([r['iterations'] for r in records],dtype=int)
+    checks = np.array([run['checks'] for r in records for run in r['runs']],
+                      dtype=int)
+    return stages,iterations,checks,files
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Warm started ACWE for time series of EUV images, such as the hourly
+    images of a Carrington rotation. Each image is seeded with the
+    segmentation of the previous image, rotated to the new observation time
+    using solar differential rotation, rather than with the alpha threshold
+    of the quiet Sun. Since coronal holes change little over an hour, the
+    seed is already close to convergence and ACWE needs far fewer
+    iterations. Images that are too far apart in time, or too different from
+    the previous segmentation, fall back to the usual initial mask.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import numpy as np
+import scipy as sp
+import scipy.ndimage
+from . import acweFunctions_v6
+from . import acweSweep
+from .ACWE_python_v3 import acwe
+
+# In[2]
+# Differential Rotation
+
+# Sidereal rotation rate coefficients of Howard et al. 1990 [1], in degrees
+# per day, of omega = A + B*sin(lat)**2 + C*sin(lat)**4 (2.894, -0.428 and
+# -0.370 microradians per second), as used by sunpy.physics.differential_rotation
+HOWARD = (14.3267,-2.1189,-1.8317)
+EARTH_RATE = 0.9856 # mean orbital motion of the Earth, degrees per day
+
+def observation_time(h):
+    '''
+    Parameters
+    ----------
+    h : dict
+        .fits header of a Solar EUV image
+    Returns
+    -------
+    t : numpy.datetime64
+        Observation time, from DATE-OBS, or T_OBS if DATE-OBS is missing.
+    '''
+    key = 'DATE-OBS' if 'DATE-OBS' in h else 'T_OBS'
+    return np.datetime64(str(h[key]).strip().rstrip('Z').replace('_','T'))
+
+def rotation_rate(lat,coefficients=HOWARD):
+    '''
+    Parameters
+    ----------
+    lat : [float]
+        Heliographic latitude, radians
+    coefficients : (float, float, float), optional
+        Sidereal rotation rate coefficients A, B, C in degrees per day.
+
+        Default Value: HOWARD
+    Returns
+    -------
+    omega : [float]
+        Synodic rotation rate as seen from the Earth, radians per day
+    '''
+    A,B,C = coefficients
+    s2 = np.sin(lat)**2
+    return np.deg2rad(A+B*s2+C*s2**2-EARTH_RATE)
+
+def rotate_segmentation(seg,sun_center,sun_radius,days,new_center=None,
+                        new_radius=None,B0=0.,coefficients=HOWARD):
+    '''
+    Rotates a segmentation forward in time by solar differential rotation.
+    Every on-disk pixel of the new image is traced back to its position
+    in the segmentation, assuming the images are registered with solar north
+    up, and takes the value of the nearest pixel there. Pixels that were
+    behind the limb are not segmented.
+
+    Parameters
+    ----------
+    seg : [bool]
+        Segmentation, in the dimensions of the new image.
+    sun_center : [float]
+        Coordinates of the center of the sun in seg, as returned by
+        resize_EUV.
+    sun_radius : float
+        Radius of the Sun in seg.
+    days : float
+        Time from seg to the new image, in days.
+    new_center, new_radius : optional
+        Center and radius of the sun in the new image. If None, those of seg
+        are used.
+
+        Default Value: None
+    B0 : float, optional
+        Heliographic latitude of the observer (e.g. CRLT_OBS), degrees.
+
+        Default Value: 0.0
+    coefficients : (float, float, float), optional
+        See rotation_rate.
+
+        Default Value: HOWARD
+    Returns
+    -------
+    rotated : [bool]
+        Rotated segmentation.
+    References
+    ----------
+    [1]
+        R. Howard, J. W. Harvey, and S. Forgach, "Solar surface velocity
+        fields determined from small magnetic features," Solar Physics,
+        vol. 130, pp. 295-311, 1990.
+    '''
+    if new_center is None:
+        new_center = sun_center
+    if new_radius is None:
+        new_radius = sun_radius
+    b = np.deg2rad(B0)
+
+    # Heliographic coordinates of the on-disk pixels of the new image
+    y,x = np.indices(seg.shape,dtype=float)
+    X = (x-new_center[0])/new_radius
+    Y = (y-new_center[1])/new_radius
+    on_disk = X**2+Y**2 <= 1
+    X = X[on_disk]; Y = Y[on_disk]
+    Z = np.sqrt(1-X**2-Y**2)
+    lat = np.arcsin(Y*np.cos(b)+Z*np.sin(b))
+    lon = np.arctan2(X,Z*np.cos(b)-Y*np.sin(b))
+
+    # Longitude at the time of seg, and position in seg
+    lon = lon-rotation_rate(lat,coefficients)*days
+    Xp = np.cos(lat)*np.sin(lon)
+    Yp = np.sin(lat)*np.cos(b)-np.cos(lat)*np.cos(lon)*np.sin(b)
+    Zp = np.sin(lat)*np.sin(b)+np.cos(lat)*np.cos(lon)*np.cos(b)
+    col = np.rint(sun_center[0]+Xp*sun_radius).astype(int)
+    row = np.rint(sun_center[1]+Yp*sun_radius).astype(int)
+    visible = (Zp>0)&(row>=0)&(row<seg.shape[0])&(col>=0)&(col<seg.shape[1])
+
+    # Sample seg
+    values = np.zeros(X.shape,dtype=bool)
+    values[visible] = np.asarray(seg,dtype=bool)[row[visible],col[visible]]
+    rotated = np.zeros(seg.shape,dtype=bool)
+    rotated[on_disk] = values
+    return rotated
+
+# In[3]
+# Warm Started Time Series
+class WarmStartSeries:
+    '''
+    Segments a time series of Solar EUV images in order, seeding each image
+    with the rotated segmentation of the previous one.
+
+    The seed is the rotated previous segmentation, eroded by seedErosion 
+    pixels, plus the (hole filled) initial mask of the image itself, so that
+    coronal holes that were not present in the previous image are still 
+    found. The usual initial mask is
+    used instead for the first image, if the previous image is more than
+    maxGap hours earlier, or if more than maxChange of the initial mask lies
+    outside the rotated segmentation.
+
+    Parameters
+    ----------
+    resize_param, foreground_weight, background_weight, alpha, narrowband,
+    N, correctLimbBrightening, rollingAlpha, fillInitHoles, engine, reinit,
+    incrementalMeans, cropToSeed, cropMargin, dtype, geometryCache,
+    interpolation : optional
+        See acweFunctions_v6.run_acwe. The same values are used for all
+        images.
+    rotate : bool, optional
+        Rotate the previous segmentation to the new observation time. If
+        False, the previous segmentation is used as is.
+
+        Default Value: True
+    maxGap : float, optional
+        Largest time, in hours, between images for which the previous
+        segmentation is used.
+
+        Default Value: 6
+    maxChange : float, optional
+        Largest fraction of the initial mask of the new image that may lie
+        outside the rotated previous segmentation.
+
+        Default Value: 0.5
+    seedErosion : int, optional
+        Number of pixels by which the rotated segmentation is eroded before
+        seeding. The stopping criterion of ACWE halts the evolution before 
+        the contour stops moving, so a seed on the previous contour lets the
+        segmentation keep growing (or shrinking) slowly from image to image.
+        Eroding the seed makes ACWE converge onto the contour of each image 
+        again, at the cost of a few iterations; set to 0 for the fewest 
+        iterations.
+        
+        Default Value: 2
+    compareCold : bool, optional
+        Also segment every warm started image from its usual initial mask,
+        to record the number of iterations saved. This doubles the cost and
+        is meant for evaluation only.
+
+        Default Value: False
+    '''
+
+    def __init__(self,resize_param=8,foreground_weight=1,
+                 background_weight=1/50.,alpha=0.3,narrowband=2,N=10,
+                 correctLimbBrightening=True,rollingAlpha=0,
+                 fillInitHoles=True,engine='dense',reinit=None,
+                 incrementalMeans=False,cropToSeed=False,cropMargin=None,
+                 dtype=np.float64,geometryCache=None,
+                 interpolation='Bi-cubic',rotate=True,maxGap=6,
+                 maxChange=0.5,seedErosion=2,compareCold=False):
+        self.resize_param = resize_param
+        self.prepare = dict(correctLimbBrightening=correctLimbBrightening,
+                            dtype=dtype,geometryCache=geometryCache,
+                            interpolation=interpolation)
+        self.alpha = alpha
+        self.rollingAlpha = rollingAlpha
+        self.fillInitHoles = fillInitHoles
+        self.N = N
+        self.acwe = (foreground_weight,background_weight,narrowband,N)
+        self.options = dict(engine=engine,reinit=reinit,
+                            incrementalMeans=incrementalMeans,
+                            cropToSeed=cropToSeed,cropMargin=cropMargin)
+        self.workspace = None # reused by every image of the same size
+        self.rotate = rotate
+        self.maxGap = maxGap
+        self.maxChange = maxChange
+        self.seedErosion = seedErosion
+        self.compareCold = compareCold
+        self.previous = None
+        self.records = []
+
+    def _itterate(self,prepared,sd_mask,m,fillInitHoles):
+        # ACWE from initial mask m, returning the number of iterations
+        ftype = acwe.float_type(prepared.I)
+        if self.workspace is None or \
+           not self.workspace.fits(prepared.im_size,ftype):
+            self.workspace = acwe.ACWEWorkspace(prepared.im_size,ftype)
+        seg,counter = acweFunctions_v6.itterate_acwe(prepared.I,
+                                                     prepared.im_size,
+                                                     sd_mask,m,*self.acwe,
+                                                     fillInitHoles,
+                                                     workspace=self.workspace,
+                                                     returnCounter=True,
+                                                     **self.options)
+        return seg,counter*self.N
+
+    def segment(self,J,h):
+        '''
+        Segments the next image of the series.
+
+        Parameters
+        ----------
+        J : [float]
+            Solar EUV image stored as a numpy array
+        h : dict
+            .fits header for Solar EUV image J, including DATE-OBS or T_OBS
+        Returns
+        -------
+        seg, alphar, m :
+            As returned by acweFunctions_v6.run_acwe; alphar is only returned
+            if rollingAlpha != 0. m is the usual initial mask, whether or not
+            it was used.
+        '''
+
+        # Prepare image and usual initial mask
+        prepared = acweSweep.PreparedImage(J,h,self.resize_param,
+                                           **self.prepare)
+        sd_mask,m,alphar = prepared.initial_mask(self.alpha,self.rollingAlpha)
+        if self.fillInitHoles:
+            m_fill = sp.ndimage.binary_fill_holes(m)
+        else:
+            m_fill = np.asarray(m,dtype=bool)
+        t = observation_time(h)
+        record = {'time':t,'warm':False,'change':np.nan,'gap':np.nan}
+
+        # Seed from previous segmentation, if close enough
+        seed = None
+        if self.previous is not None:
+            seg0,t0,c0,r0 = self.previous
+            days = (t-t0)/np.timedelta64(1,'D')
+            record['gap'] = days*24
+            if 0 <= days*24 <= self.maxGap:
+                if self.rotate:
+                    seed = rotate_segmentation(seg0,c0,r0,days,
+                                               prepared.sun_center,
+                                               prepared.sun_radius,
+                                               h.get('CRLT_OBS',0.))
+                else:
+                    seed = seg0&sd_mask
+                if self.seedErosion > 0:
+                    seed = sp.ndimage.binary_erosion(
+                        seed,iterations=self.seedErosion)
+                n = np.count_nonzero(m_fill)
+                change = np.count_nonzero(m_fill&~seed)/float(max(n,1))
+                record['change'] = change
+                if not seed.any() or change > self.maxChange:
+                    seed = None
+
+        # Perform ACWE
+        if seed is not None:
+            seg,iterations = self._itterate(prepared,sd_mask,seed|m_fill,
+                                            False)
+            record['warm'] = True
+            if self.compareCold:
+                cold,record['coldIterations'] = self._itterate(
+                    prepared,sd_mask,m,self.fillInitHoles)
+                record['mismatch'] = np.count_nonzero(
+                    np.not_equal(seg,cold))/float(max(np.count_nonzero(cold),1))
+        else:
+            seg,iterations = self._itterate(prepared,sd_mask,m,
+                                            self.fillInitHoles)
+            record['coldIterations'] = iterations
+        record['iterations'] = iterations
+        self.records.append(record)
+
+        # Keep segmentation for next image
+        self.previous = (np.asarray(seg,dtype=bool),t,prepared.sun_center,
+                         prepared.sun_radius)
+
+        # Return Results
+        if self.rollingAlpha != 0:
+            return seg,alphar,m
+        return seg,m
+
+    def summary(self):
+        '''
+        Returns
+        -------
+        summary : dict
+            Number of images, number of warm started images, total ACWE
+            iterations, and, where known, the total iterations of the usual
+            initial masks and the fraction of iterations saved. Cold
+            iterations are only known for every image if compareCold is True.
+        '''
+        iterations = sum(r['iterations'] for r in self.records)
+        known = [r for r in self.records if 'coldIterations' in r]
+        summary = {'images':len(self.records),
+                   'warm':sum(r['warm'] for r in self.records),
+                   'iterations':iterations}
+        if len(known) == len(self.records) and len(known) > 0:
+            cold = sum(r['coldIterations'] for r in known)
+            summary['coldIterations'] = cold
+            summary['saved'] = 1-iterations/float(max(cold,1))
+        return summary
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Benchmark the ACWE pipeline on synthetic solar EUV images (see
+    acweSynthetic.py), so that no data needs to be downloaded. For each image
+    size and resize parameter the script times every step of the standard
+    segmentation and of a confidence map, upscaling and the metrics, for each
+    ACWE engine, with a reused workspace, cropped to the seed and on a
+    batch of frames, and appends the results to a .csv file. Each run is
+    labeled and dated so that results can be compared across versions and
+    machines to track regressions.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]:
+# Import Libraries and Tools
+import os
+import sys
+import time
+import platform
+import datetime
+import numpy as np
+import pandas as pd
+import scipy
+import skimage
+
+# Root directory of the project
+ROOT_DIR = os.path.abspath("../")
+
+# Import ACWE Tools
+sys.path.append(ROOT_DIR)
+from ACWE_python_spring_2023 import acweFunctions_v6, acweSynthetic
+from ACWE_python_spring_2023 import acweRestoreScale, acweTelemetry
+from ACWE_python_spring_2023.ACWE_python_v3 import correct_limb_brightening
+from ACWE_python_spring_2023.ACWE_python_v3 import acwe
+from Metrics import consistancyErrorMetricsIII as cem, JaccardIndexMetric as jim
+
+# In[2]:
+# Key Variables
+
+# Synthetic images
+sizes = [512,1024,2048,4096] # Image dimensions, AIA is 4096x4096
+seed  = 0                    # Seed of the image noise
+
+# Results
+resultsFile = os.path.join(ROOT_DIR,'Benchmarks/') + 'benchmarks.csv'
+label = ''   # Label of this run, e.g. a branch or commit, for comparisons
+repeats = 3  # Number of times each function is timed, the minimum is kept
+
+# Resize parameters - 'standard' performs ACWE at 512x512 pixels, as for the
+# standard segmentation, so only the preprocessing grows with size; a fixed
+# value performs ACWE at size/resize_param pixels, so ACWE grows with size
+resize_params = ['standard',2]
+
+# ACWE Parameters
+engines = ['dense','sparse']
+foreground_weight = 1
+background_weight = 1/50.
+background_weights = [1/100.,1/50.,1/25.] # Confidence map
+alpha = 0.3
+narrowband = 2
+N = 10
+rollingAlpha = 0.01
+interpolation = 'Bi-cubic'
+batchSize = 4 # Frames, one day apart, segmented together as one stack
+
+# Inform user
+verbose = True
+
+# In[3]:
+# Timing
+
+def timeFunction(function,*args,**kwargs):
+    # Time function repeats times, returning the times and the last output
+    times = []
+    for r in range(repeats):
+        start = time.perf_counter()
+        output = function(*args,**kwargs)
+        times.append(time.perf_counter()-start)
+    return np.asarray(times),output
+
+rows = []
+def record(size,resize_param,function,engine,times,value=np.nan,
+           valueName=''):
+    # Add the result of one benchmark
+    rows.append({'label'        : label,
+                 'date'         : datetime.datetime.now().isoformat(
+                                                            timespec='seconds'),
+                 'machine'      : platform.node(),
+                 'python'       : platform.python_version(),
+                 'numpy'        : np.__version__,
+                 'scipy'        : scipy.__version__,
+                 'skimage'      : skimage.__version__,
+                 'size'         : size,
+                 'resize_param' : resize_param,
+                 'function'     : function,
+                 'engine'       : engine,
+                 'repeats'      : len(times),
+                 'time_min'     : np.min(times),
+                 'time_mean'    : np.mean(times),
+                 'time_std'     : np.std(times),
+                 'value'        : value,
+                 'value_name'   : valueName})
+    if verbose:
+        print('    {:<38s}{:<8s}{:10.4f} s'.format(function,engine,
+                                                   np.min(times)),
+              '' if valueName == '' else '{} = {:.4g}'.format(valueName,
+                                                              value))
+
+# In[4]:
+# Benchmark
+
+def preprocess(J,h,resize_param):
+    # Resized and corrected image and initial masks of a frame
+    I,im_size,sun_radius,sun_center = acweFunctions_v6.resize_EUV(
+        J,h,resize_param,interpolation)
+    I = correct_limb_brightening.correct_limb_brightening(I,sun_center,
+                                                          sun_radius)
+    sd_mask,m,alphar = acweFunctions_v6.inital_masks(I,im_size,sun_radius,
+                                                     sun_center,alpha,
+                                                     rollingAlpha)
+    return I,im_size,sd_mask,m
+
+for size in sizes:
+
+    # Synthetic frames, the first of which is used for single segmentations
+    frames = [acweSynthetic.synthetic_disk(size,days=float(d),seed=seed)
+              for d in range(batchSize)]
+    J,h,truth = frames[0]
+
+    for resize_param in dict.fromkeys(max(size//512,1) if r == 'standard'
+                                      else r for r in resize_params):
+        if verbose:
+            print('Size:',size,'resize_param:',resize_param)
+
+        # Resize
+        times,(I,im_size,sun_radius,sun_center) = timeFunction(
+            acweFunctions_v6.resize_EUV,J,h,resize_param,interpolation)
+        record(size,resize_param,'resize_EUV','',times)
+
+        # Limb brightening correction
+        times,I = timeFunction(
+            correct_limb_brightening.correct_limb_brightening,I,sun_center,
+            sun_radius)
+        record(size,resize_param,'correct_limb_brightening','',times)
+
+        # Initial masks
+        times,(sd_mask,m,alphar) = timeFunction(acweFunctions_v6.inital_masks,
+                                                I,im_size,sun_radius,
+                                                sun_center,alpha,rollingAlpha)
+        record(size,resize_param,'inital_masks','',times,alphar,'alpha')
+
+        for engine in engines:
+
+            # Single segmentation
+            times,(seg,counter) = timeFunction(acweFunctions_v6.itterate_acwe,
+                                               I,im_size,sd_mask,m,
+                                               foreground_weight,
+                                               background_weight,narrowband,
+                                               N,engine=engine,
+                                               returnCounter=True)
+            record(size,resize_param,'itterate_acwe',engine,times,counter*N,
+                   'iterations')
+            if engine == engines[0]:
+                reference = seg
+
+            # Single segmentation, with buffers reused across repeats
+            workspace = acwe.ACWEWorkspace(im_size,acwe.float_type(I))
+            times,seg = timeFunction(acweFunctions_v6.itterate_acwe,I,
+                                     im_size,sd_mask,m,foreground_weight,
+                                     background_weight,narrowband,N,
+                                     engine=engine,workspace=workspace)
+            record(size,resize_param,'itterate_acwe(workspace)',engine,times,
+                   float(np.array_equal(seg,reference)),'same')
+
+            # Single segmentation, within a crop around the seed
+            times,seg = timeFunction(acweFunctions_v6.itterate_acwe,I,
+                                     im_size,sd_mask,m,foreground_weight,
+                                     background_weight,narrowband,N,
+                                     engine=engine,cropToSeed=True)
+            record(size,resize_param,'itterate_acwe(cropToSeed)',engine,
+                   times,float(np.array_equal(seg,reference)),'same')
+
+            # Confidence map
+            telemetry = acweTelemetry.Telemetry()
+            times,Segs = timeFunction(
+                acweFunctions_v6.itterate_acwe_confidence_map,I,im_size,
+                sd_mask,m,foreground_weight,background_weights,narrowband,N,
+                engine=engine,telemetry=telemetry)
+            record(size,resize_param,'itterate_acwe_confidence_map',engine,
+                   times,telemetry.to_dict()['iterations']/float(repeats),
+                   'iterations')
+
+        # Independent confidence map, every weight evolved from the initial
+        # mask as one stack; a different product from the seeded map above
+        times,_ = timeFunction(acweFunctions_v6.itterate_acwe_confidence_map,
+                               I,im_size,sd_mask,m,foreground_weight,
+                               background_weights,narrowband,N,
+                               seeding='initial')
+        record(size,resize_param,'itterate_acwe_confidence_map(initial)','',
+               times)
+
+        # Batch of frames, one after another and as one stack
+        batch = [preprocess(Jb,hb,resize_param) for Jb,hb,_ in frames]
+        times,segs = timeFunction(lambda: [acweFunctions_v6.itterate_acwe(
+            Ib,sizeb,sdb,mb,foreground_weight,background_weight,narrowband,N)
+            for Ib,sizeb,sdb,mb in batch])
+        record(size,resize_param,'itterate_acwe(frames)','',times,
+               len(batch),'frames')
+        times,stack = timeFunction(
+            acweFunctions_v6.itterate_acwe_batch,
+            np.stack([b[0] for b in batch]),np.stack([b[2] for b in batch]),
+            np.stack([b[3] for b in batch]),foreground_weight,
+            background_weight,narrowband,N)
+        record(size,resize_param,'itterate_acwe_batch','',times,
+               float(all(np.array_equal(a,b) for a,b in zip(segs,stack))),
+               'same')
+
+        # Upscale
+        ACWEHEADER = {'RESIZE_PARAM':resize_param,'INIT_MASK':m}
+        times,SEG = timeFunction(acweRestoreScale.upscaleConMap,Segs,
+                                 ACWEHEADER)
+        record(size,resize_param,'upscaleConMap','',times)
+
+        # Metrics, against the true coronal holes
+        seg = SEG[np.where(np.asarray(background_weights)==
+                           background_weight)[0][0]]
+        times,iou = timeFunction(jim.IOU,seg,truth)
+        record(size,resize_param,'IOU','',times,iou,'IOU')
+        times,(gce,lce) = timeFunction(cem.CE,seg.astype(int),
+                                       truth.astype(int))
+        record(size,resize_param,'CE','',times,gce,'GCE')
+
+# In[5]:
+# Save Results
+
+results = pd.DataFrame(rows)
+results.to_csv(resultsFile,mode='a',index=False,
+               header=not os.path.exists(resultsFile))
+print('**Process Complete**')
@@ -16,9 +16,6 @@ import sys
 import pandas as pd
 import numpy as np
 import glob
-from astropy.io import fits
-import sunpy.map
-from aiapy.calibrate import register, update_pointing
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -29,6 +26,7 @@ ROOT_DIR = os.path.abspath("../../")
 # Import ACWE Tools
 sys.path.append(ROOT_DIR)
 from ACWE_python_spring_2023 import acweFunctions_v6 as af6, acweSaveSeg_v5
+from ACWE_python_spring_2023 import acweRegisteredCache
 from ACWE_python_spring_2023.ACWE_python_v3 import correct_limb_brightening
 
 # In[2]
@@ -45,6 +43,12 @@ conMap  = '/mnt/coronal_holes/Code Paper I Observations/ConMapStandardDefault/'
 # ACWE Parameters 
 acweChoice = '193'
 
+# Registered image cache shared with the run scripts (see 
+# acweRegisteredCache.py) - None opens and registers every image
+cacheFolder = None
+retries     = 5  # Further attempts to open an image, e.g. if update_pointing 
+sleepTime   = 30 # times out, sleepTime seconds apart
+
 # Inform User
 verbose = True
 
@@ -66,6 +70,9 @@ acweChoice = np.where(keys == acweChoice)[0][0]
 ImageFolder  = dataset + CR + '/'
 conMapFolder = conMap  + CR + '/'
 
+# Registered image cache
+cache = acweRegisteredCache.as_cache(cacheFolder)
+
 # Determin dimensions of Confidence Map
 file = data[keys[acweChoice]][0]
 conMap = glob.glob(conMapFolder + '*/*' + os.path.basename(file) + '*')[0]
@@ -129,34 +136,8 @@ for i in range(len(data[keys[acweChoice]])):
     if verbose:
         print('    Opening original Image for Evaluation')
     
-    # Open Original Image
-    success = False
-    while not success:
-        try:
-            # Extract Image and Header Data
-            hdulist = fits.open(ImageFolder+file)
-            hdulist.verify('silentfix') # no clue why this is needed for successful data read
-            h = hdulist[1].header
-            J = hdulist[1].data
-            hdulist.close()
-            
-            # Update to Level 1.5 Data Product
-            if h['LVL_NUM'] < 1.5:
-                m = sunpy.map.Map((J,h))    # Create Sunpy Map
-                m = update_pointing(m)      # Update Header based on Latest Information
-                m_registrered = register(m) # Recenter and rotate to Solar North
-                I = m_registrered.data
-                # Undo Keword Renaming
-                H = dict()
-                for k in m_registrered.meta.keys(): 
-                    H[k.upper()] = m_registrered.meta[k] 
-            # Skip if already Level 1.5
-            else:
-                I = J*1
-                H = dict(h)
-            success = True
-        except:
-            pass
+    # Open Original Image, as a Level 1.5 Data Product
+    I,H = acweRegisteredCache.load(ImageFolder+file,cache,retries,sleepTime)
     
     if verbose:
         print('    Evaluating Original Image')
@@ -28,7 +28,7 @@ ROOT_DIR = os.path.abspath("../../")
 
 # Import ACWE Tools
 sys.path.append(ROOT_DIR)
-from ACWE_python_spring_2023 import acweSaveSeg_v5
+from ACWE_python_spring_2023 import acweSaveSeg_v5, acweDiskGeometry
 from DatasetTools import DataManagmentTools as dmt
 
 # In[2]
@@ -56,18 +56,6 @@ print('Converting Skew Data to Figures:')
 # In[4]
 # Functions
 
-# Circle Mask Function
-def make_circle_mask(c,im_dims,r):
-    # defomes a binary image with image dimensions im_dims of a circle with 
-    # center c and radius r
-    cx = c[0]
-    cy = c[1]
-    ix = im_dims[0]
-    iy = im_dims[1]
-    x,y = np.meshgrid(np.arange(-(cx),(ix-cx),1),np.arange(-(cy),(iy-cy),1))
-    c_mask = (x**2+y**2)<=r**2
-    return c_mask
-
 # Open File and Prepare for ACWE
 def openAIA(filename):
     
@@ -146,8 +134,9 @@ for i in range(len(files)):
                     sun_radius = (H['RSUN']/H['CDELT1']) # solar radius from metadata
                 sun_center = np.asarray([int(round(H['CRPIX1']))-1,int(round(H['CRPIX2']))-1]) # solar center from metadata
     
-                # Make Circle Mask
-                sd_mask = make_circle_mask(sun_center,im_size,sun_radius)
+                # Make Circle Mask, shared by images with the same geometry
+                sd_mask = acweDiskGeometry.cache.get(im_size,sun_center,
+                                                     sun_radius).disk_mask()
             
                 HaveSEG = True
         
@@ -31,6 +31,7 @@ ROOT_DIR = os.path.abspath("../")
 # Import ACWE Tools
 sys.path.append(ROOT_DIR)
 from ACWE_python_spring_2023 import acweFunctions_v6, acweSaveSeg_v5
+from ACWE_python_spring_2023 import acweSweep
 
 # import time
 
@@ -152,7 +153,7 @@ for file in data[keys[acweChoice]]:#[len(data[keys[acweChoice]])-1:0:-1]:
                     m = sunpy.map.Map((J,h)) # Create Map
                     H = dict()
                     for k in m.meta.keys():
-                        h[k.upper()] = m.meta[k]
+                        H[k.upper()] = m.meta[k]
                     I = J*1 # Copy image
                 
                 # Exit Loop Last
@@ -182,16 +183,19 @@ for file in data[keys[acweChoice]]:#[len(data[keys[acweChoice]])-1:0:-1]:
         outputShape = np.hstack([len(background_weight),outputShape]).astype(int)
         SegsOld = np.empty(outputShape); SegsOld[:] = np.nan
         
+        # Resize and correct the image once for all background weights
+        prepared = acweSweep.PreparedImage(I,H,resize_param,
+                                           correctLimbBrightening)
+        results = acweSweep.sweep(prepared,background_weight,[alpha],
+                                  [narrowband],[N],
+                                  foreground_weight=foreground_weight,
+                                  verbose=acweVerbose,
+                                  rollingAlpha=rollingAlpha,
+                                  fillInitHoles=fillInitHoles)
+        
         for i in range(len(background_weight)):
             
-            seg,alphar,m = acweFunctions_v6.run_acwe(I,H,resize_param,
-                                                     foreground_weight,
-                                                     background_weight[i],
-                                                     alpha,narrowband,
-                                                     N,acweVerbose,
-                                                     correctLimbBrightening,
-                                                     rollingAlpha,
-                                                     fillInitHoles)
+            seg,alphar,m = results[(background_weight[i],alpha,narrowband,N)]
             
             SegsOld[i] = seg.astype(int) * 1
         
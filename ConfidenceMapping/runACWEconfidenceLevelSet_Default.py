@@ -16,11 +16,9 @@ Created on Mon Jul 12 09:49:32 2021
 # Import Libraries and Tools
 import os
 import sys
+import time
 import pandas as pd
 import numpy as np
-from astropy.io import fits
-import sunpy.map
-from aiapy.calibrate import register, update_pointing
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -30,8 +28,8 @@ ROOT_DIR = os.path.abspath("../")
 # Import ACWE Tools
 sys.path.append(ROOT_DIR)
 from ACWE_python_spring_2023 import acweFunctions_v6, acweSaveSeg_v5
-
-# import time
+from ACWE_python_spring_2023 import acweBatch, acweManifest
+from ACWE_python_spring_2023 import acweRegisteredCache, acwePrefetch
 
 # In[2]:
 # Key Variables
@@ -49,6 +47,21 @@ saveFolder = '/mnt/coronal_holes/Code Paper I Observations/ConMapStandardDefault
 acwePrefix = 'ACWEconMap.' # Prefix for ACWE
 overwrite = False    # If True run from beginning 
 
+# Failed Images - each image is attempted up to maxAttempts times over all
+# runs, then quarantined in the job manifest (see acweManifest.py)
+maxAttempts = 3
+retries     = 5  # Further attempts to open an image, e.g. if update_pointing 
+sleepTime   = 30 # times out, sleepTime seconds apart
+
+# Registered image cache shared by all run scripts (see acweRegisteredCache.py)
+# - None opens and registers every image
+cacheFolder = None
+
+# Prefetching (see acwePrefetch.py) - the next prefetch images are opened, and
+# results saved, in the background while ACWE runs; 0 does each in turn.
+# Only used when segmenting frames one after another
+prefetch = 2
+
 # ACWE Parameters 
 acweChoice = '193'
 noScale = True
@@ -71,6 +84,9 @@ fillInitHoles = True          # Fill holes in mask before running ACWE
 # Inform user
 verbose = True
 
+# Worker processes - more than 1 segments frames in parallel (see acweBatch.py)
+processes = 1
+
 # # Time ACWE
 # timeFile = os.path.join(ROOT_DIR,'ConfidenceMapping/') + CR + '_timeDefault.csv'
 
@@ -93,6 +109,16 @@ crSaveFolder = saveFolder + CR + '/'
 if not os.path.exists(crSaveFolder):
     os.makedirs(crSaveFolder)
 
+# Job manifest - images left to segment
+manifest = acweManifest.Manifest(
+    acweManifest.manifest_file(crSaveFolder,acwePrefix),maxAttempts)
+todo = manifest.plan(data[keys[acweChoice]],overwrite,
+                     lambda file: os.path.exists(crSaveFolder + 
+                                  acweBatch.acwe_filename(file,acwePrefix)))
+
+# Registered image cache
+cache = acweRegisteredCache.as_cache(cacheFolder)
+
 # # Prepare time file
 # if not os.path.exists(timeFile):
 #     with open(timeFile,'w+') as f:
@@ -101,100 +127,97 @@ if not os.path.exists(crSaveFolder):
 # In[5]:
 # Perform ACWE
 
-# Cycle Through Dataset
-for file in data[keys[acweChoice]]:#[len(data[keys[acweChoice]])-1:0:-1]:
+# Segment frames in a pool of worker processes
+if processes > 1:
+    task = acweBatch.ACWETask(acwePrefix,True,resize_param,foreground_weight,
+                              background_weight,alpha,narrowband,N,
+                              correctLimbBrightening,rollingAlpha,
+                              fillInitHoles)
+    acweBatch.run_rotation(data[keys[acweChoice]],dataFolder+str(CR)+'/',
+                           crSaveFolder,task,processes,overwrite,verbose,
+                           retries,sleepTime,manifest=manifest,cache=cache)
+
+# Segment frames one after another
+else:
+    
+    # Open images ahead, and save results in the background
+    pipeline = acwePrefetch.Pipeline(
+        lambda file: acweRegisteredCache.load(dataFolder+str(CR)+'/'+file,
+                                              cache,retries,sleepTime),
+        [file for file in data[keys[acweChoice]] if file in todo],prefetch,
+        writeDepth=prefetch,manifest=manifest,verbose=verbose)
+    
+    # Cycle Through Dataset
+    for file in data[keys[acweChoice]]:#[len(data[keys[acweChoice]])-1:0:-1]:
     
-    # Placement Folder
-    acweFolder = file.split('/')[0] + '/'
-    if not os.path.exists(crSaveFolder + acweFolder):
-        os.mkdir(crSaveFolder + acweFolder)
+        # Placement Folder
+        acweFolder = file.split('/')[0] + '/'
+        if not os.path.exists(crSaveFolder + acweFolder):
+            os.mkdir(crSaveFolder + acweFolder)
     
-    # ACWE Name
-    acweFile = acwePrefix + os.path.basename(file)
-    acweFile = acweFolder + acweFile + '.npz'
+        # ACWE Name
+        acweFile = acwePrefix + os.path.basename(file)
+        acweFile = acweFolder + acweFile + '.npz'
     
-    # Check for File
-    if overwrite or not os.path.exists(crSaveFolder + acweFile):
+        # Check Manifest
+        if file in todo:
         
-        # Inform User
-        if verbose:
-            print('Generating', os.path.basename(acweFile))
-            print('    Opening EUV Image')
+            # Inform User
+            if verbose:
+                print('Generating', os.path.basename(acweFile))
+                print('    Opening EUV Image')
         
-        # Account for possible timeout when updating header
-        success = False
-        while not success:
-            try:
-                # Extract Image and Header Data
-                hdulist = fits.open(dataFolder+str(CR) +'/'+file)
-                hdulist.verify('silentfix') # no clue why this is needed for successful data read
-                h = hdulist[1].header
-                J = hdulist[1].data
-                hdulist.close()
+            # Record the Outcome in the Manifest, once the Result is Saved
+            with pipeline.frame(file):
                 
-                # Update to Level 1.5 Data Product
-                if h['LVL_NUM'] < 1.5:
-                    m = sunpy.map.Map((J,h))    # Create Sunpy Map
-                    m = update_pointing(m)      # Update Header based on Latest Information
-                    m_registrered = register(m) # Recenter and rotate to Solar North
-                    I = m_registrered.data
-                    # Undo Keword Renaming
-                    H = dict()
-                    for k in m_registrered.meta.keys(): 
-                        H[k.upper()] = m_registrered.meta[k] 
-                # Skip if already Level 1.5
-                else:
-                    # Convert header to dictionary
-                    m = sunpy.map.Map((J,h)) # Create Map
-                    H = dict()
-                    for k in m.meta.keys():
-                        h[k.upper()] = m.meta[k]
-                    I = J*1 # Copy image
-                
-                success = True
-            except:
-                pass
+                # Open Level 1.5 Image, registering it if needed
+                I,H = pipeline.load(file)
         
-        # Inform user
-        if verbose:
-            print('    Running ACWE')
+                # Inform user
+                if verbose:
+                    print('    Running ACWE')
             
-        # # Time
-        # start = time.time()
+                # # Time
+                # start = time.time()
         
-        # Run ACWE
-        seg,alphar,m = acweFunctions_v6.run_acwe_confidenceMap(I,H,resize_param,
-                                                               foreground_weight,
-                                                               background_weight,
-                                                               alpha,narrowband,
-                                                               N,acweVerbose,
-                                                               correctLimbBrightening,
-                                                               rollingAlpha,
-                                                               fillInitHoles)
+                # Run ACWE
+                seg,alphar,m = acweFunctions_v6.run_acwe_confidenceMap(I,H,resize_param,
+                                                                       foreground_weight,
+                                                                       background_weight,
+                                                                       alpha,narrowband,
+                                                                       N,acweVerbose,
+                                                                       correctLimbBrightening,
+                                                                       rollingAlpha,
+                                                                       fillInitHoles)
         
-        # # Time
-        # end = time.time()
-        # timeTotal = end-start
-        # timeTotal = str(timeTotal)
+                # # Time
+                # end = time.time()
+                # timeTotal = end-start
+                # timeTotal = str(timeTotal)
         
-        # Inform User
-        if verbose:
-            print('    Saving Results\n\n')
+                # Inform User
+                if verbose:
+                    print('    Saving Results\n\n')
         
-        # Save Result
-        init_mask_method = 'alpha*mean(qs)'
-        acweSaveSeg_v5.saveSeg(crSaveFolder + acweFile,seg,H,
-                               correctLimbBrightening,resize_param,
-                               foreground_weight,background_weight,m,
-                               init_mask_method,fillInitHoles,alpha,
-                               alphar,narrowband,N)
+                # Save Result
+                init_mask_method = 'alpha*mean(qs)'
+                pipeline.submit(acweSaveSeg_v5.saveSeg,crSaveFolder + acweFile,
+                                seg,H,correctLimbBrightening,resize_param,
+                                foreground_weight,background_weight,m,
+                                init_mask_method,fillInitHoles,alpha,alphar,
+                                narrowband,N)
         
-        # # Time
-        # row = acweFile + ',' + timeTotal + '\n'
-        # with open(timeFile,'a+') as f:
-        #     f.write(row)
+                # # Time
+                # row = acweFile + ',' + timeTotal + '\n'
+                # with open(timeFile,'a+') as f:
+                #     f.write(row)
+    
+    # Wait for the Last Results
+    pipeline.close()
         
 # In[6]:
 # End Process
 
+print('Manifest:',manifest.summary())
+manifest.close()
 print('**Process Complete**')
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Generate a synthetic Carrington rotation dataset, so that the ACWE
+    pipelines can be run and timed end to end without downloading data. For
+    each hour, synthetic images for all 7 AIA EUV channels and an HMI
+    magnetogram (see acweSynthetic.py) are saved as compressed .fits files,
+    with the same names and folder structure as those downloaded by
+    DownloadByRotation.py, and the hour is added to a CR*.csv file in the
+    same layout as the lists in DownloadLists. Coronal holes and active
+    regions rotate across the disk with solar differential rotation.
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]:
+# Import Libraries and Tools
+import os
+import sys
+import datetime
+import numpy as np
+import pandas as pd
+from astropy.io import fits
+import DataManagmentTools as dmt
+
+# Root directory of the project
+ROOT_DIR = os.path.abspath("../")
+
+# Import ACWE Tools
+sys.path.append(ROOT_DIR)
+from ACWE_python_spring_2023 import acweSynthetic
+
+# In[2]:
+# Key Variables
+
+# Synthetic rotation - numbered from 9000 so that its list never replaces the
+# list of a real rotation
+Rotation  = 9099
+startDate = datetime.datetime(2010,7,13,9,0,0) # Start of CR2099
+hours     = 655 # Number of hours to generate, a rotation is ~655 hours
+cadence   = 1   # Hours between observations
+
+# Dataset folders
+dataFolder  = '/home/jgra/Coronal Holes/syntheticDataset/' # This is the folder where you want the dataset to be placed.
+traceFolder = 'DownloadLists/' # Holds the .csv files that provide a summary of the data
+
+# Images
+size  = 4096 # Dimensions of the images, 4096 for AIA
+level = 1.5  # 1.5: registered, the run scripts skip registration. 1: offset
+             # disk, the run scripts register each image with aiapy, which
+             # requires network access for update_pointing
+holes   = acweSynthetic.HOLES   # (longitude, latitude, radius) in degrees at
+regions = acweSynthetic.REGIONS # startDate, see acweSynthetic.py
+seed    = 0                     # Seed of the image noise
+saveTruth = True # Save the true CH mask with each hour, as truth.*.npz
+
+# Channels, in the order of the columns of the .csv file
+wavelengths = [94,131,171,193,211,304,335]
+offsets     = [8,9,11,6,0,2,3] # seconds from T_REC to each observation, as
+                               # in the real dataset
+
+# Inform User
+verbose = True
+
+# In[3]:
+# Save Function
+def saveFits(filename,data,h):
+    # Compressed image in the first extension, as for files from JSOC
+    header = fits.Header()
+    for k in h:
+        if not k.startswith('NAXIS'):
+            header[k] = h[k]
+    hdulist = fits.HDUList([fits.PrimaryHDU(),
+                            fits.CompImageHDU(data.astype(np.float32),
+                                              header=header)])
+    hdulist.writeto(filename,overwrite=True)
+
+# In[4]:
+# Prepare Dataset
+
+# Create Document if Needed, or Find Hours Already Generated
+traceName = traceFolder + 'CR' + str(Rotation) + '.csv'
+if not os.path.exists(traceName):
+    with open(traceName,'w+') as f:
+        f.write('T_intended,T_REC,94,131,171,193,211,304,335,Magnetogram\n')
+done = set(pd.read_csv(traceName,header=0)['T_intended'])
+
+# Create Folder for Rotation
+crFolder = dataFolder + 'CR' + str(Rotation) + '/'
+if not os.path.exists(crFolder):
+    os.makedirs(crFolder)
+
+# In[5]:
+# Generate Dataset
+
+for i in range(0,hours,cadence):
+
+    # Times
+    date = startDate + datetime.timedelta(hours=i)
+    T_intended = dmt.timeFormat(date) + 'Z'
+    if T_intended in done:
+        continue
+    record = date + datetime.timedelta(seconds=2)
+    T_REC = dmt.timeFormat(record) + 'Z'
+    days = i/24.
+
+    # Inform User
+    if verbose:
+        print(T_intended)
+
+    # Generate Save Folder for Individual Hour
+    outDir = T_REC.replace(':','')
+    if not os.path.exists(crFolder + outDir):
+        os.mkdir(crFolder + outDir)
+
+    # Heliographic coordinates, shared by all channels
+    h = acweSynthetic.synthetic_header(size,time=T_REC,level=level)
+    coordinates = acweSynthetic.heliographic(h)
+
+    # EUV Images
+    filesOrdered = []
+    for k in range(len(wavelengths)):
+        t = record + datetime.timedelta(seconds=offsets[k])
+        name = 'aia.lev1_euv_12s.' + dmt.timeFormat(t).replace(':','') + \
+               'Z.' + str(wavelengths[k]) + '.image_lev1.fits'
+        h = acweSynthetic.synthetic_header(size,wavelengths[k],
+                                           dmt.timeFormat(t),level)
+        quietSun,holeContrast,regionContrast = \
+            acweSynthetic.CHANNELS[wavelengths[k]]
+        J,h,truth = acweSynthetic.synthetic_disk(size,holes,regions,days,
+                                                 seed+9*i+k,quietSun,
+                                                 holeContrast=holeContrast,
+                                                 regionContrast=regionContrast,
+                                                 h=h,dtype=np.float32,
+                                                 coordinates=coordinates)
+        saveFits(crFolder + outDir + '/' + name,J,h)
+        filesOrdered.append(outDir + '/' + name)
+
+        # True CHs
+        if saveTruth and wavelengths[k] == 193:
+            np.savez_compressed(crFolder + outDir + '/truth.' + name + '.npz',
+                                truth=truth,days=days)
+
+    # Magnetogram
+    name = 'hmi.m_720s.' + date.strftime('%Y%m%d_%H%M%S') + \
+           '_TAI.1.magnetogram.fits'
+    h = acweSynthetic.synthetic_header(size,time=dmt.timeFormat(date),
+                                       level=level,instrument='HMI')
+    B,h = acweSynthetic.synthetic_magnetogram(size,holes,regions,days,
+                                              seed+9*i+7,h=h,
+                                              coordinates=coordinates)
+    saveFits(crFolder + outDir + '/' + name,B,h)
+    filesOrdered.append(outDir + '/' + name)
+
+    # Update Document
+    with open(traceName,'a+') as f:
+        f.write(','.join([T_intended,T_REC]+filesOrdered) + '\n')
+
+# In[6]:
+# End Process
+
+print('**Process Complete**')
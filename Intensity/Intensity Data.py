@@ -94,7 +94,7 @@ for file in data[keys[acweChoice]]:
                 m = sunpy.map.Map((J,h)) # Create Map
                 H = dict()
                 for k in m.meta.keys():
-                    h[k.upper()] = m.meta[k]
+                    H[k.upper()] = m.meta[k]
                 I = J*1 # Copy image
             success = True
         except:
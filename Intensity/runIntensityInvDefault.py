@@ -18,10 +18,6 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import time as sleep
-from astropy.io import fits
-import sunpy.map
-from aiapy.calibrate import register, update_pointing
 import warnings
 warnings.filterwarnings("ignore")
 import pngScale2
@@ -32,6 +28,9 @@ ROOT_DIR = os.path.abspath("../")
 # Import ACWE Tools
 sys.path.append(ROOT_DIR)
 from ACWE_python_spring_2023 import acweFunctions_v6, acweSaveSeg_v5
+from ACWE_python_spring_2023 import acweDiskGeometry
+from ACWE_python_spring_2023 import acweManifest, acweBatch
+from ACWE_python_spring_2023 import acweRegisteredCache, acwePrefetch
 
 # In[2]:
 # Key Varibles
@@ -72,6 +71,19 @@ verbose = True
 
 # Pause between failed request
 sleepTime = 30
+retries   = 5  # Further attempts to open an image
+
+# Failed Images - each image is attempted up to maxAttempts times over all
+# runs, then quarantined in the job manifest (see acweManifest.py)
+maxAttempts = 3
+
+# Registered image cache shared by all run scripts (see acweRegisteredCache.py)
+# - None opens and registers every image
+cacheFolder = None
+
+# Prefetching (see acwePrefetch.py) - the next prefetch images are opened, and
+# results saved, in the background while ACWE runs; 0 does each in turn
+prefetch = 2
 
 # Intensity Scaling Parameters
 # scale types = [[min,max,scaletype,"restore"forAcWE,scaleName]]
@@ -93,61 +105,12 @@ scaleTypes = [["Imin","Imax","linear",False,"LinearCompressFull."],
               [20.0  ,2500.0,"log10" ,True ,"Log10CompressDefaultRestored."]]
 
 # In[3]:
-def make_circle_mask(c,im_dims,r):
-    # defomes a binary image with image dimensions im_dims of a circle with 
-    # center c and radius r
-    cx = c[0]
-    cy = c[1]
-    ix = im_dims[0]
-    iy = im_dims[1]
-    x,y = np.meshgrid(np.arange(-(cx),(ix-cx),1),np.arange(-(cy),(iy-cy),1))
-    c_mask = (x**2+y**2)<=r**2
-    return c_mask
-
 def loadfits(dataFolder,CR,file,loaded):
-    while not loaded:
-        
-        try:
-            # Extract Image and Header Data
-            hdulist = fits.open(dataFolder+str(CR) +'/'+file)
-            hdulist.verify('silentfix') # no clue why this is needed for successful data read
-            h = hdulist[1].header
-            J = hdulist[1].data
-            hdulist.close()
-            
-            # Update to Level 1.5 Data Product
-            if h['LVL_NUM'] < 1.5:
-                m = sunpy.map.Map((J,h))    # Create Sunpy Map
-                m = update_pointing(m)      # Update Header based on Latest Information
-                m_registrered = register(m) # Recenter and rotate to Solar North
-                I = m_registrered.data
-                # Undo Keword Renaming
-                H = dict()
-                for k in m_registrered.meta.keys(): 
-                    H[k.upper()] = m_registrered.meta[k] 
-            # Skip if already Level 1.5
-            else:
-                # Convert header to dictionary
-                m = sunpy.map.Map((J,h)) # Create Map
-                H = dict()
-                for k in m.meta.keys():
-                    h[k.upper()] = m.meta[k]
-                I = J*1 # Copy image
-            
-            # Exit Loop Last
-            loaded = True
-            
-        except:
-            # Inform User
-            if verbose:
-                print('    Error Sleeping',sleepTime,'Seconds...')
-            
-            # Wait Then Try Again
-            sleep.sleep(sleepTime)
-            
-            # Inform User
-            if verbose:
-                print('    Opening EUV Image')
+    # Open Level 1.5 Image, registering it if needed - through the registered
+    # image cache if cacheFolder is set, retrying up to retries times, opened
+    # ahead by the pipeline if prefetch is set
+    I,H = pipeline.load(file)
+    loaded = True
     return I,H,loaded
 
 # In[4]:
@@ -169,6 +132,24 @@ crSaveFolder = saveFolder + CR + '/'
 if not os.path.exists(crSaveFolder):
     os.makedirs(crSaveFolder)
 
+# Job manifest - images left to segment, with every scaling
+manifest = acweManifest.Manifest(
+    acweManifest.manifest_file(crSaveFolder,acwePrefix),maxAttempts)
+todo = manifest.plan(data[keys[acweChoice]],overwrite,
+                     lambda file: all(os.path.exists(crSaveFolder + 
+                         acweBatch.acwe_filename(file,acwePrefix+scaleType[-1]))
+                         for scaleType in scaleTypes))
+
+# Registered image cache
+cache = acweRegisteredCache.as_cache(cacheFolder)
+
+# Open images ahead, and save results in the background
+pipeline = acwePrefetch.Pipeline(
+    lambda file: acweRegisteredCache.load(dataFolder+str(CR)+'/'+file,cache,
+                                          retries,sleepTime),
+    [file for file in data[keys[acweChoice]] if file in todo],prefetch,
+    writeDepth=prefetch,manifest=manifest,verbose=verbose)
+
 # In[6]:
 # Perform ACWE
 
@@ -180,106 +161,117 @@ for file in data[keys[acweChoice]]:#[len(data[keys[acweChoice]])-1:0:-1]:
     if not os.path.exists(crSaveFolder + acweFolder):
         os.mkdir(crSaveFolder + acweFolder)
         
+    # Check Manifest
+    if file not in todo:
+        continue
+        
     # Account for possible timeout when updating header
     loaded = False
     
+    # Record the Outcome in the Manifest, once the Results are Saved
+    with pipeline.frame(file):
     
-    # Cycle Through Defined Scales
-    for scaleType in scaleTypes:
+        # Cycle Through Defined Scales
+        for scaleType in scaleTypes:
         
-        # ACWE Name
-        acweFile = acwePrefix + scaleType[-1] + os.path.basename(file)
-        acweFile = acweFolder + acweFile + '.npz'
+            # ACWE Name
+            acweFile = acwePrefix + scaleType[-1] + os.path.basename(file)
+            acweFile = acweFolder + acweFile + '.npz'
         
-        # Run ACWE if Needed
-        if overwrite or not os.path.exists(crSaveFolder + acweFile):
+            # Run ACWE if Needed
+            if overwrite or not os.path.exists(crSaveFolder + acweFile):
             
-            # Load Data
-            if not loaded:
+                # Load Data
+                if not loaded:
                 
-                if verbose:
-                    print('Generating results for', os.path.basename(file))
-                    print('    Opening EUV Image')
+                    if verbose:
+                        print('Generating results for', os.path.basename(file))
+                        print('    Opening EUV Image')
                     
-                I,H,loaded = loadfits(dataFolder,CR,file,loaded)
+                    I,H,loaded = loadfits(dataFolder,CR,file,loaded)
                         
-            # Inform User
-            if verbose:
-                print('        Performing ACWE On',scaleType[-1][:-1])
+                # Inform User
+                if verbose:
+                    print('        Performing ACWE On',scaleType[-1][:-1])
             
-            # Update Scale As Needed
-            Imin = scaleType[0];Imax = scaleType[1]
-            if Imin == 'Imin':   # Image Minimum
-                Imin = np.min(I)
-            elif Imin == 'Smin': # Minimum Value on Solar Disk
-                Ishape = np.asarray(I.shape)
-                c_mask = make_circle_mask(Ishape/2.,Ishape,H['R_SUN'])
-                Imin = np.min(I[c_mask])
-            if Imax == 'Imax':   # Image Maximum
-                Imax = np.max(I)
-            elif Imax == 'Smax': # Maximum Value on Solar Disk
-                Ishape = np.asarray(I.shape)
-                c_mask = make_circle_mask(Ishape/2.,Ishape,H['R_SUN'])
-                Imax = np.max(I[c_mask])
+                # Update Scale As Needed
+                Imin = scaleType[0];Imax = scaleType[1]
+                if Imin == 'Imin':   # Image Minimum
+                    Imin = np.min(I)
+                elif Imin == 'Smin': # Minimum Value on Solar Disk
+                    Ishape = np.asarray(I.shape)
+                    c_mask = acweDiskGeometry.cache.get(Ishape,Ishape/2.,
+                                                        H['R_SUN']).disk_mask()
+                    Imin = np.min(I[c_mask])
+                if Imax == 'Imax':   # Image Maximum
+                    Imax = np.max(I)
+                elif Imax == 'Smax': # Maximum Value on Solar Disk
+                    Ishape = np.asarray(I.shape)
+                    c_mask = acweDiskGeometry.cache.get(Ishape,Ishape/2.,
+                                                        H['R_SUN']).disk_mask()
+                    Imax = np.max(I[c_mask])
                 
-            # Scale (and Unscale)
-            Itmp = pngScale2.scale(I,scaleType[2],Imin,Imax)
-            if scaleType[3]:
-                Itmp = pngScale2.unScale(Itmp,scaleType[2],Imin,Imax)
+                # Scale (and Unscale)
+                Itmp = pngScale2.scale(I,scaleType[2],Imin,Imax)
+                if scaleType[3]:
+                    Itmp = pngScale2.unScale(Itmp,scaleType[2],Imin,Imax)
             
-            # Save Scaling Inforamtion:
-            image_preprocess = {'min':[scaleType[0],Imin],
-                                'max':[scaleType[1],Imax],
-                                'scaleType':scaleType[2],
-                                'ReverseScale':scaleType[3]}
+                # Save Scaling Inforamtion:
+                image_preprocess = {'min':[scaleType[0],Imin],
+                                    'max':[scaleType[1],Imax],
+                                    'scaleType':scaleType[2],
+                                    'ReverseScale':scaleType[3]}
             
-            if verbose:
-                print('            Min:',image_preprocess['min'])
-                print('            Max:',image_preprocess['max'])
-                print('            ScaleType:',image_preprocess['scaleType'])
-                print('            Reverse:',image_preprocess['ReverseScale'])
-                print('            NaNs:',np.sum(np.isnan(Itmp)))
+                if verbose:
+                    print('            Min:',image_preprocess['min'])
+                    print('            Max:',image_preprocess['max'])
+                    print('            ScaleType:',image_preprocess['scaleType'])
+                    print('            Reverse:',image_preprocess['ReverseScale'])
+                    print('            NaNs:',np.sum(np.isnan(Itmp)))
             
-            try:
-                # Run ACWE
-                seg,m = acweFunctions_v6.run_acwe(Itmp,H,resize_param,
-                                                  foreground_weight,
-                                                  background_weight,
-                                                  alpha,narrowband,
-                                                  N,acweVerbose,
-                                                  correctLimbBrightening,
-                                                  rollingAlpha,
-                                                  fillInitHoles)
+                try:
+                    # Run ACWE
+                    seg,m = acweFunctions_v6.run_acwe(Itmp,H,resize_param,
+                                                      foreground_weight,
+                                                      background_weight,
+                                                      alpha,narrowband,
+                                                      N,acweVerbose,
+                                                      correctLimbBrightening,
+                                                      rollingAlpha,
+                                                      fillInitHoles,
+                                        geometryCache=acweDiskGeometry.cache)
                 
-                # Inform User
-                if verbose:
-                    print('            Saving Results')
+                    # Inform User
+                    if verbose:
+                        print('            Saving Results')
                 
-                # Save Result
-                init_mask_method = 'alpha*mean(qs)'
-                alphar = alpha * 1
-                acweSaveSeg_v5.saveSeg(crSaveFolder + acweFile,seg,H,
-                                       correctLimbBrightening,resize_param,
-                                       foreground_weight,background_weight,m,
-                                       init_mask_method,fillInitHoles,alpha,
-                                       alphar,narrowband,N,image_preprocess)
-            except:
+                    # Save Result
+                    init_mask_method = 'alpha*mean(qs)'
+                    alphar = alpha * 1
+                    pipeline.submit(acweSaveSeg_v5.saveSeg,
+                                    crSaveFolder + acweFile,seg,H,
+                                    correctLimbBrightening,resize_param,
+                                    foreground_weight,background_weight,m,
+                                    init_mask_method,fillInitHoles,alpha,
+                                    alphar,narrowband,N,image_preprocess)
+                except:
                 
-                # Inform User
-                if verbose:
-                    print('            Error Saving Empty')
+                    # Inform User
+                    if verbose:
+                        print('            Error Saving Empty')
                     
-                # Save Result
-                init_mask_method = 'alpha*mean(qs)'
-                segShape = (np.asarray(I.shape)/resize_param).astype(int)
-                seg = np.empty(segShape); seg[:] = np.nan
-                alphar = alpha * 1
-                m = np.empty(segShape); m[:] = np.nan
-                acweSaveSeg_v5.saveSeg(crSaveFolder + acweFile,seg,H,
-                                       correctLimbBrightening,resize_param,
-                                       foreground_weight,background_weight,m,
-                                       init_mask_method,fillInitHoles,alpha,
-                                       alphar,narrowband,N,image_preprocess)
+                    # Save Result
+                    init_mask_method = 'alpha*mean(qs)'
+                    segShape = (np.asarray(I.shape)/resize_param).astype(int)
+                    seg = np.empty(segShape); seg[:] = np.nan
+                    alphar = alpha * 1
+                    m = np.empty(segShape); m[:] = np.nan
+                    pipeline.submit(acweSaveSeg_v5.saveSeg,
+                                    crSaveFolder + acweFile,seg,H,
+                                    correctLimbBrightening,resize_param,
+                                    foreground_weight,background_weight,m,
+                                    init_mask_method,fillInitHoles,alpha,
+                                    alphar,narrowband,N,image_preprocess)
                 
     # Inform User When Aplicible
     if verbose and loaded:
@@ -288,4 +280,7 @@ for file in data[keys[acweChoice]]:#[len(data[keys[acweChoice]])-1:0:-1]:
 # In[6]:
 # End Process
 
+pipeline.close()
+print('Manifest:',manifest.summary())
+manifest.close()
 print('**Process Complete**')
@@ -16,11 +16,9 @@ Updated on Tue Feb 21 12:14:04 2023
 # Import Libraries and Tools
 import os 
 import sys
+import time
 import pandas as pd
 import numpy as np
-from astropy.io import fits
-import sunpy.map
-from aiapy.calibrate import register, update_pointing
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -30,8 +28,9 @@ ROOT_DIR = os.path.abspath("../")
 # Import ACWE Tools
 sys.path.append(ROOT_DIR)
 from ACWE_python_spring_2023 import acweFunctions_v6, acweSaveSeg_v5
-
-# import time
+from ACWE_python_spring_2023 import acweManifest, acweBatch
+from ACWE_python_spring_2023 import acweRegisteredCache, acweScaleStore
+from ACWE_python_spring_2023 import acwePrefetch
 
 # In[2]:
 # Key Variables
@@ -57,6 +56,26 @@ else:
 # Run Parameters
 overwrite = False # If True run from beginning 
 
+# Failed Images - each image is attempted up to maxAttempts times over all
+# runs, then quarantined in the job manifest (see acweManifest.py)
+maxAttempts = 3
+retries     = 5  # Further attempts to open an image, e.g. if update_pointing 
+sleepTime   = 30 # times out, sleepTime seconds apart
+
+# Registered image cache shared by all run scripts (see acweRegisteredCache.py)
+# - None opens and registers every image
+cacheFolder = None
+
+# Preprocessed image store (see acweScaleStore.py) - each image is resized and
+# limb corrected once for every value of storeScales, so later runs at any
+# of them only run ACWE. None preprocesses every image for resize_param only
+scaleStoreFolder = None
+storeScales = [1, 2, 4]
+
+# Prefetching (see acwePrefetch.py) - the next prefetch images are opened, and
+# results saved, in the background while ACWE runs; 0 does each in turn
+prefetch = 2
+
 # ACWE Parameters 
 acweChoice = '193'
 noScale = True            # These values are the default values taken from:
@@ -102,6 +121,36 @@ acweChoice = np.where(keys == acweChoice)[0][0]
 crSaveFolder = saveFolder + CR + '/'
 if not os.path.exists(crSaveFolder):
     os.makedirs(crSaveFolder)
+
+# Job manifest - images left to segment
+manifest = acweManifest.Manifest(
+    acweManifest.manifest_file(crSaveFolder,acwePrefix),maxAttempts)
+todo = manifest.plan(data[keys[acweChoice]],overwrite,
+                     lambda file: os.path.exists(crSaveFolder + 
+                                  acweBatch.acwe_filename(file,acwePrefix)))
+
+# Registered image cache
+cache = acweRegisteredCache.as_cache(cacheFolder)
+
+# Preprocessed image store
+store = acweScaleStore.as_store(scaleStoreFolder,correctLimbBrightening)
+
+# Open Level 1.5 Image, registering it if needed, or Preprocessed Image,
+# preprocessing all scales if needed
+def loadImage(file):
+    filename = dataFolder+str(CR)+'/'+file
+    if store is None:
+        return acweRegisteredCache.load(filename,cache,retries,sleepTime)
+    frame = store.get(file,storeScales + [resize_param],
+                      lambda: acweRegisteredCache.load(filename,cache,
+                                                       retries,sleepTime),
+                      source=filename)
+    return frame,frame.header
+
+# Open images ahead, and save results in the background
+pipeline = acwePrefetch.Pipeline(
+    loadImage,[file for file in data[keys[acweChoice]] if file in todo],
+    prefetch,writeDepth=prefetch,manifest=manifest,verbose=verbose)
     
 # # Prepare time file
 # if not os.path.exists(timeFile):
@@ -123,87 +172,68 @@ for file in data[keys[acweChoice]]:#[len(data[keys[acweChoice]])-1:0:-1]:
     acweFile = acwePrefix + os.path.basename(file)
     acweFile = acweFolder + acweFile + '.npz'
     
-    # Check for File
-    if overwrite or not os.path.exists(crSaveFolder + acweFile):
+    # Check Manifest
+    if file in todo:
         
         # Inform User
         if verbose:
             print('Generating', os.path.basename(acweFile))
             print('    Opening EUV Image')
         
-        # Account for possible timeout when updating header
-        success = False
-        while not success:
-            try:
-                # Extract Image and Header Data
-                hdulist = fits.open(dataFolder+str(CR) +'/'+file)
-                hdulist.verify('silentfix') # no clue why this is needed for successful data read
-                h = hdulist[1].header
-                J = hdulist[1].data
-                hdulist.close()
-                
-                # Update to Level 1.5 Data Product
-                if h['LVL_NUM'] < 1.5:
-                    m = sunpy.map.Map((J,h))    # Create Sunpy Map
-                    m = update_pointing(m)      # Update Header based on Latest Information
-                    m_registrered = register(m) # Recenter and rotate to Solar North
-                    I = m_registrered.data
-                    # Undo Keword Renaming
-                    H = dict()
-                    for k in m_registrered.meta.keys(): 
-                        H[k.upper()] = m_registrered.meta[k] 
-                # Skip if already Level 1.5
-                else:
-                    # Convert header to dictionary
-                    m = sunpy.map.Map((J,h)) # Create Map
-                    H = dict()
-                    for k in m.meta.keys():
-                        h[k.upper()] = m.meta[k]
-                    I = J*1 # Copy image
-                success = True
-            except:
-                pass
+        # Record the Outcome in the Manifest, once the Result is Saved
+        with pipeline.frame(file):
+            
+            # Open Image (the preprocessed frame if store is set)
+            I,H = pipeline.load(file)
         
-        # Inform user
-        if verbose:
-            print('    Running ACWE')
+            # Inform user
+            if verbose:
+                print('    Running ACWE')
             
-        # # Time
-        # start = time.time()
+            # # Time
+            # start = time.time()
         
-        # Run ACWE
-        seg,alphar,m = acweFunctions_v6.run_acwe(I,H,resize_param,
-                                                 foreground_weight,
-                                                 background_weight,
-                                                 alpha,narrowband,
-                                                 N,acweVerbose,
-                                                 correctLimbBrightening,
-                                                 rollingAlpha,
-                                                 fillInitHoles)
+            # Run ACWE
+            if store is None:
+                seg,alphar,m = acweFunctions_v6.run_acwe(I,H,resize_param,
+                                                         foreground_weight,
+                                                         background_weight,
+                                                         alpha,narrowband,
+                                                         N,acweVerbose,
+                                                     correctLimbBrightening,
+                                                         rollingAlpha,
+                                                         fillInitHoles)
+            else:
+                seg,alphar,m = I.prepared(resize_param).segment(
+                    foreground_weight,background_weight,alpha,narrowband,N,
+                    acweVerbose,rollingAlpha,fillInitHoles)
         
-        # # Time
-        # end = time.time()
-        # timeTotal = end-start
-        # timeTotal = str(timeTotal)
+            # # Time
+            # end = time.time()
+            # timeTotal = end-start
+            # timeTotal = str(timeTotal)
         
-        # Inform User
-        if verbose:
-            print('    Saving Results\n\n')
+            # Inform User
+            if verbose:
+                print('    Saving Results\n\n')
         
-        # Save Result
-        init_mask_method = 'alpha*mean(qs)'
-        acweSaveSeg_v5.saveSeg(crSaveFolder + acweFile,seg,H,
-                               correctLimbBrightening,resize_param,
-                               foreground_weight,background_weight,m,
-                               init_mask_method,fillInitHoles,alpha,
-                               alphar,narrowband,N)
+            # Save Result
+            init_mask_method = 'alpha*mean(qs)'
+            pipeline.submit(acweSaveSeg_v5.saveSeg,crSaveFolder + acweFile,
+                            seg,H,correctLimbBrightening,resize_param,
+                            foreground_weight,background_weight,m,
+                            init_mask_method,fillInitHoles,alpha,alphar,
+                            narrowband,N)
         
-        # # Time
-        # row = acweFile + ',' + timeTotal + '\n'
-        # with open(timeFile,'a+') as f:
-        #     f.write(row)
+            # # Time
+            # row = acweFile + ',' + timeTotal + '\n'
+            # with open(timeFile,'a+') as f:
+            #     f.write(row)
         
 # In[6]:
 # End Process
 
+pipeline.close()
+print('Manifest:',manifest.summary())
+manifest.close()
 print('**Process Complete**')
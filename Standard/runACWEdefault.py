@@ -20,9 +20,6 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-from astropy.io import fits
-import sunpy.map
-from aiapy.calibrate import register, update_pointing
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -32,8 +29,9 @@ ROOT_DIR = os.path.abspath("../")
 # Import ACWE Tools
 sys.path.append(ROOT_DIR)
 from ACWE_python_spring_2023 import acweFunctions_v6, acweSaveSeg_v5
-
-# import time
+from ACWE_python_spring_2023 import acweTimeSeries, acweTelemetry
+from ACWE_python_spring_2023 import acweManifest, acweBatch
+from ACWE_python_spring_2023 import acweRegisteredCache, acwePrefetch
 
 # In[2]:
 # Key Variables
@@ -51,6 +49,20 @@ saveFolder = '/mnt/coronal_holes/Code Paper I Observations/Standard/'
 acwePrefix = 'ACWE.' # Prefix for ACWE
 overwrite = False    # If True run from begining 
 
+# Failed Images - each image is attempted up to maxAttempts times over all
+# runs, then quarantined in the job manifest (see acweManifest.py)
+maxAttempts = 3
+retries     = 5  # Further attempts to open an image, e.g. if update_pointing 
+sleepTime   = 30 # times out, sleepTime seconds apart
+
+# Registered image cache shared by all run scripts (see acweRegisteredCache.py)
+# - None opens and registers every image
+cacheFolder = None
+
+# Prefetching (see acwePrefetch.py) - the next prefetch images are opened, and
+# results saved, in the background while ACWE runs; 0 does each in turn
+prefetch = 2
+
 # ACWE Parameters 
 acweChoice = '193'
 noScale = True
@@ -65,6 +77,8 @@ acweVerbose = False           # Show process mask generation
 correctLimbBrightening = True # Correct for Limb Brightening
 rollingAlpha = 0.01           # Incrementally Increase Alpha when Failed Threshold
 fillInitHoles=True            # Fill holes in mask before running ACWE
+warmStart = False             # Seed each image with the rotated segmentation
+                              # of the previous hour (see acweTimeSeries.py)
 
 # Inform user
 verbose = True  # Inform user about which image is being processed
@@ -72,8 +86,12 @@ verbose = True  # Inform user about which image is being processed
 # ACWE on 211 Data
 # acweChoice = 211; alpha = 0.3; background_weight = 1/100. # Old - refine parameters
 
-# # Time ACWE
-# timeFile = os.path.join(ROOT_DIR,'Standard/') + CR + '_timeStandard.csv'
+# Time ACWE - stage times and iterations are saved in each ACWE header and, 
+# if recordTelemetry, summarized in timeFile (see ConfidenceMapping/TimeCheck.py);
+# with prefetch, load and save are the times spent waiting for them
+recordTelemetry = False
+timeFile = os.path.join(ROOT_DIR,'Standard/') + CR + '_timeStandard.csv'
+stages = ['load','register','resize','limb','seed','evolve','save']
 
 # In[3]:
 # Open file and get list of images
@@ -94,10 +112,35 @@ crSaveFolder = saveFolder + CR + '/'
 if not os.path.exists(crSaveFolder):
     os.makedirs(crSaveFolder)
     
-# # Prepare time file
-# if not os.path.exists(timeFile):
-#     with open(timeFile,'w+') as f:
-#         f.write('file,time\n')
+# Job manifest - images left to segment
+manifest = acweManifest.Manifest(
+    acweManifest.manifest_file(crSaveFolder,acwePrefix),maxAttempts)
+todo = manifest.plan(data[keys[acweChoice]],overwrite,
+                     lambda file: os.path.exists(crSaveFolder + 
+                                  acweBatch.acwe_filename(file,acwePrefix)))
+
+# Registered image cache
+cache = acweRegisteredCache.as_cache(cacheFolder)
+
+# Open images ahead, and save results in the background
+pipeline = acwePrefetch.Pipeline(
+    lambda file: acweRegisteredCache.load(dataFolder+str(CR)+'/'+file,cache,
+                                          retries,sleepTime),
+    [file for file in data[keys[acweChoice]] if file in todo],prefetch,
+    writeDepth=prefetch,manifest=manifest,verbose=verbose)
+    
+# Prepare time file
+if recordTelemetry and not os.path.exists(timeFile):
+    with open(timeFile,'w+') as f:
+        f.write(','.join(['file','time']+stages+['iterations'])+'\n')
+    
+# Warm started time series
+if warmStart:
+    series = acweTimeSeries.WarmStartSeries(resize_param,foreground_weight,
+                                            background_weight,alpha,
+                                            narrowband,N,
+                                            correctLimbBrightening,
+                                            rollingAlpha,fillInitHoles)
     
 # In[5]:
 # Perform ACWE
@@ -114,87 +157,73 @@ for file in data[keys[acweChoice]]:#[len(data[keys[acweChoice]])-1:0:-1]:
     acweFile = acwePrefix + os.path.basename(file)
     acweFile = acweFolder + acweFile + '.npz'
     
-    # Check for File
-    if overwrite or not os.path.exists(crSaveFolder + acweFile):
+    # Check Manifest
+    if file in todo:
         
         # Inform User
         if verbose:
             print('Generating', os.path.basename(acweFile))
             print('    Opening EUV Image')
         
-        # Attempt to open and update file
-        success = False
-        while not success:
-            try:
-                # Extract Image and Header Data
-                hdulist = fits.open(dataFolder+str(CR) +'/'+file)
-                hdulist.verify('silentfix') # no clue why this is needed for successful data read
-                h = hdulist[1].header
-                J = hdulist[1].data
-                hdulist.close()
-                
-                # Update to Level 1.5 Data Product
-                if h['LVL_NUM'] < 1.5:
-                    m = sunpy.map.Map((J,h))    # Create Sunpy Map
-                    m = update_pointing(m)      # Update Header based on Latest Information
-                    m_registrered = register(m) # Recenter and rotate to Solar North
-                    I = m_registrered.data
-                    # Undo Keword Renaming
-                    H = dict()
-                    for k in m_registrered.meta.keys(): 
-                        H[k.upper()] = m_registrered.meta[k] 
-                # Skip if already Level 1.5
-                else:
-                    # Convert header to dictionary
-                    m = sunpy.map.Map((J,h)) # Create Map
-                    H = dict()
-                    for k in m.meta.keys():
-                        h[k.upper()] = m.meta[k]
-                    I = J*1 # Copy image
-                success = True
-            except:
-                pass
+        # Stage times and iterations of this image
+        telemetry = acweTelemetry.Telemetry()
         
-        # Inform user
-        if verbose:
-            print('    Running ACWE')
+        # Record the Outcome in the Manifest, once the Result is Saved
+        with pipeline.frame(file,telemetry):
             
-        # # Time
-        # start = time.time()
+            # Open Level 1.5 Image, registering it if needed
+            I,H = pipeline.load(file,telemetry)
         
-        # Run ACWE
-        seg,alphar,m = acweFunctions_v6.run_acwe(I,H,resize_param,
-                                                   foreground_weight,
-                                                   background_weight,
-                                                   alpha,narrowband,
-                                                   N,acweVerbose,
-                                                   correctLimbBrightening,
-                                                   rollingAlpha,
-                                                   fillInitHoles)
+            # Inform user
+            if verbose:
+                print('    Running ACWE')
         
-        # # Time
-        # end = time.time()
-        # timeTotal = end-start
-        # timeTotal = str(timeTotal)
+            # Run ACWE
+            init_mask_method = 'alpha*mean(qs)'
+            if warmStart:
+                with telemetry.stage('evolve'):
+                    seg,alphar,m = series.segment(I,H)
+                if series.records[-1]['warm']:
+                    init_mask_method = 'rotated previous segmentation'
+            else:
+                seg,alphar,m,telemetry = acweFunctions_v6.run_acwe(I,H,
+                                                           resize_param,
+                                                           foreground_weight,
+                                                           background_weight,
+                                                           alpha,narrowband,
+                                                           N,acweVerbose,
+                                                           correctLimbBrightening,
+                                                           rollingAlpha,
+                                                           fillInitHoles,
+                                                           telemetry=telemetry)
+            timeTotal = sum(telemetry.times.get(k,0.) for k in stages[2:-1])
         
-        # Inform User
-        if verbose:
-            print('    Saving Results\n\n')
+            # Inform User
+            if verbose:
+                print('    Saving Results\n\n')
         
-        # Save Result
-        init_mask_method = 'alpha*mean(qs)'
-        acweSaveSeg_v5.saveSeg(crSaveFolder + acweFile,seg,H,
-                               correctLimbBrightening,resize_param,
-                               foreground_weight,background_weight,m,
-                               init_mask_method,fillInitHoles,alpha,
-                               alphar,narrowband,N)
+            # Save Result
+            with telemetry.stage('save'):
+                pipeline.submit(acweSaveSeg_v5.saveSeg,crSaveFolder + acweFile,
+                                seg,H,correctLimbBrightening,resize_param,
+                                foreground_weight,background_weight,m,
+                                init_mask_method,fillInitHoles,alpha,alphar,
+                                narrowband,N,telemetry=telemetry)
         
-        # # Time
-        # row = acweFile + ',' + timeTotal + '\n'
-        # with open(timeFile,'a+') as f:
-        #     f.write(row)
+            # Time - the save time is only known after saving, so is only 
+            # recorded here
+            if recordTelemetry:
+                times = [telemetry.times.get(k,np.nan) for k in stages]
+                row = [acweFile,timeTotal]+times+[telemetry.to_dict()['iterations']]
+                with open(timeFile,'a+') as f:
+                    f.write(','.join(str(v) for v in row)+'\n')
         
 # In[6]:
 # End Process
 
+pipeline.close()
+if warmStart:
+    print('Warm start:',series.summary())
+print('Manifest:',manifest.summary())
+manifest.close()
 print('**Process Complete**')
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Tests of the batch runner (acweBatch.run_rotation) with tasks that need
+    no .fits files.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import time
+import errno
+import pytest
+from ACWE_python_spring_2023 import acweBatch, acweManifest
+from ACWE_python_spring_2023.acweManifest import RUNNING
+
+# In[2]
+# Tasks
+class CrashTask:
+    # Saves an empty file per frame, and kills its worker on frame 'crash'
+    prefix = 'TEST.'
+
+    def outputs(self,file):
+        return [file + '.out']
+
+    def load(self,filename,file,state,retries=5,wait=30.,telemetry=None):
+        return None,{}
+
+    def __call__(self,I,H,file,crSaveFolder,state,telemetry=None):
+        if os.path.basename(file) == 'crash':
+            os._exit(1)
+        open(crSaveFolder + file + '.out','w').close()
+
+# In[3]
+# Tests
+def test_crashing_frame_is_quarantined(tmp_path):
+    files = ['a/frame1','a/crash','a/frame2','a/frame3','a/frame4']
+    crSaveFolder = str(tmp_path) + '/'
+    filename = crSaveFolder + 'manifest.sqlite'
+    for run in range(4):
+        with acweManifest.Manifest(filename,maxAttempts=3) as manifest:
+            records = acweBatch.run_rotation(files,crSaveFolder,crSaveFolder,
+                                             CrashTask(),processes=2,
+                                             verbose=False,manifest=manifest)
+
+            # The crash fails the frames in progress but does not stop the run
+            assert RUNNING not in [f['status'] for f in manifest.frames()]
+            assert all(r['status'] in ['done','skipped','failed',
+                                       'quarantined'] for r in records)
+    with acweManifest.Manifest(filename,maxAttempts=3) as manifest:
+        frames = {f['file']:f for f in manifest.frames()}
+    assert frames['a/crash']['status'] == acweManifest.QUARANTINED
+    assert frames['a/crash']['attempts'] == 3
+    assert 'BrokenProcessPool' in frames['a/crash']['error']
+    for file in files:
+        if file != 'a/crash':
+            assert frames[file]['status'] == acweManifest.DONE
+            assert os.path.exists(crSaveFolder + file + '.out')
+
+def test_crashing_frame_without_manifest(tmp_path):
+    files = ['a/crash','a/frame1','a/frame2']
+    crSaveFolder = str(tmp_path) + '/'
+    records = acweBatch.run_rotation(files,crSaveFolder,crSaveFolder,
+                                     CrashTask(),processes=1,verbose=False)
+    assert [r['file'] for r in records] == files
+    assert records[0]['status'] == 'failed'
+    assert [r['status'] for r in records[1:]] == ['done','done']
+
+def test_transient_errors():
+    assert acweBatch.transient_error(TimeoutError())
+    assert acweBatch.transient_error(ConnectionResetError())
+    assert acweBatch.transient_error(OSError(errno.EIO,'I/O error'))
+    assert not acweBatch.transient_error(FileNotFoundError(errno.ENOENT,''))
+    assert not acweBatch.transient_error(OSError('Empty or corrupt FITS'))
+    assert not acweBatch.transient_error(KeyError('LVL_NUM'))
+
+def test_corrupt_file_is_not_retried(tmp_path):
+    filename = str(tmp_path/'corrupt.fits')
+    with open(filename,'wb') as f:
+        f.write(b'SIMPLE  = T' + b' '*100)
+    start = time.perf_counter()
+    with pytest.raises(OSError):
+        acweBatch.load_image(filename,retries=5,wait=30.)
+    assert time.perf_counter()-start < 10.
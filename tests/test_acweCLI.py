@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Tests of the acwe command (acweCLI.py) that need no .fits files.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import pytest
+from ACWE_python_spring_2023 import acweCLI
+
+# In[2]
+# Tests
+@pytest.mark.parametrize('mode',list(acweCLI.MODES))
+def test_build_task_rejects_unknown_parameters(mode):
+    config = dict(acweCLI.DEFAULTS,acwe={'retries':0})
+    with pytest.raises(ValueError,match='retries'):
+        acweCLI.build_task(mode,config)
+    config['acwe'] = {'engine':'sparse','background_weight':0.02}
+    acweCLI.build_task(mode,config)
+
+def test_run_stops_before_any_frame(tmp_path):
+    lists = tmp_path/'lists'
+    lists.mkdir()
+    (lists/'CR9999.csv').write_text('193\n2010-07-13T090006Z/a.fits\n')
+    status = acweCLI.main(['run','--cr','CR9999','--data-folder',
+                           str(tmp_path) + '/','--save-folder',
+                           str(tmp_path/'out') + '/','--trace-folder',
+                           str(lists) + '/','--set','retries=0'])
+    assert status == 2
+    assert not os.path.exists(tmp_path/'out')
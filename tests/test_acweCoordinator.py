@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Tests of the leases of the work coordinator (acweCoordinator.py).
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import time
+from ACWE_python_spring_2023 import acweCoordinator
+from ACWE_python_spring_2023.acweCoordinator import PENDING, RUNNING, DONE, \
+    QUARANTINED
+
+def records(batch,error=None):
+    return [{'file':file,'status':'done' if error is None else 'failed',
+             'error':error} for file in batch['files']]
+
+def status(coordinator):
+    return {b['id']:(b['status'],b['worker'],b['attempts'])
+            for b in coordinator.batches()}
+
+# In[2]
+# Tests
+def test_frame_batches(tmp_path):
+    with open(str(tmp_path/'CR2000.csv'),'w') as f:
+        f.write('171,193\n')
+        for i in range(5):
+            f.write('a{0}.fits,b{0}.fits\n'.format(i))
+    batches = acweCoordinator.frame_batches(str(tmp_path),['CR2000'],
+                                            batchSize=2)
+    assert [b['id'] for b in batches] == ['CR2000/193/0000','CR2000/193/0001',
+                                          'CR2000/193/0002']
+    assert batches[2] == {'id':'CR2000/193/0002','cr':'CR2000',
+                          'files':['b4.fits']}
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    coordinator = acweCoordinator.SQLiteCoordinator(str(tmp_path/'c.sqlite'),
+                                                    leaseTime=0.2)
+    coordinator.add([{'id':'x','cr':'CR2000','files':['a','b']}])
+    coordinator.add([{'id':'x','cr':'CR2000','files':['a','b']}])
+    batch = coordinator.claim('w1')
+    assert batch == {'id':'x','cr':'CR2000','files':['a','b'],'attempts':1}
+    assert coordinator.claim('w2') is None
+    assert coordinator.renew('x','w1')
+
+    # w1 stops renewing its lease
+    time.sleep(0.3)
+    assert coordinator.claim('w2')['attempts'] == 2
+    assert status(coordinator) == {'x':(RUNNING,'w2',2)}
+    assert not coordinator.renew('x','w1')
+
+    # A failure of w1 does not affect the batch of w2, but its results do
+    assert coordinator.complete('x','w1',records(batch,'error')) == RUNNING
+    assert coordinator.complete('x','w1',records(batch)) == DONE
+    assert coordinator.complete('x','w2',records(batch)) == DONE
+    assert coordinator.summary() == {PENDING:0,RUNNING:0,DONE:1,
+                                     QUARANTINED:0}
+
+def test_batches_are_quarantined_after_max_attempts(tmp_path):
+    coordinator = acweCoordinator.SQLiteCoordinator(str(tmp_path/'c.sqlite'),
+                                                    leaseTime=0.1,
+                                                    maxAttempts=2)
+    coordinator.add([{'id':'x','cr':'CR2000','files':['a']},
+                     {'id':'y','cr':'CR2000','files':['b']}])
+
+    # Released batches do not count an attempt
+    coordinator.release(coordinator.claim('w1')['id'],'w1')
+    assert status(coordinator)['x'] == (PENDING,'w1',0)
+
+    # x fails, then its worker dies
+    batch = coordinator.claim('w1')
+    assert coordinator.complete('x','w1',records(batch,'error')) == PENDING
+    assert coordinator.claim('w1')['id'] == 'x'
+    time.sleep(0.2)
+    assert coordinator.claim('w2')['id'] == 'y'
+    assert status(coordinator)['x'][0] == QUARANTINED
+
+    coordinator.reset()
+    assert status(coordinator)['x'] == (PENDING,'w1',0)
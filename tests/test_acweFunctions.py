@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Tests that the options of ACWE (acweFunctions_v6.py) give the same
+    segmentation as the dense float64 baseline on synthetic images (see
+    acweSynthetic.py).
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import numpy as np
+import pytest
+from ACWE_python_spring_2023 import acweFunctions_v6, acweSynthetic
+
+@pytest.fixture(scope='module')
+def frames():
+    # Two frames a day apart, and the baseline segmentation of each
+    frames = []
+    for days in [0,1]:
+        J,h,truth = acweSynthetic.synthetic_disk(1024,days=days,seed=days)
+        ref = acweFunctions_v6.run_acwe(J,h,8)[0]
+        frames.append((J,h,ref))
+    return frames
+
+# In[2]
+# Tests
+def test_baseline_finds_the_holes(frames):
+    for J,h,ref in frames:
+        assert 300 < np.count_nonzero(ref) < 2000
+
+@pytest.mark.parametrize('options',[dict(engine='sparse'),
+                                    dict(engine='sparse',reinit='edt'),
+                                    dict(reinit='band'),
+                                    dict(incrementalMeans=True),
+                                    dict(cropToSeed=True),
+                                    dict(engine='sparse',reinit='band',
+                                         incrementalMeans=True,
+                                         cropToSeed=True)])
+def test_options_give_the_baseline(frames,options):
+    for J,h,ref in frames:
+        seg = acweFunctions_v6.run_acwe(J,h,8,**options)[0]
+        assert np.array_equal(seg.astype(bool),ref.astype(bool))
+
+def test_float32_matches_float64(frames):
+    for J,h,ref in frames:
+        passed,mismatch,seg,ref32 = acweFunctions_v6.check_precision(J,h,8)
+        assert passed and np.array_equal(ref32.astype(bool),ref.astype(bool))
+
+@pytest.mark.parametrize('reinit',[None,'edt'])
+def test_batch_gives_the_baseline(frames,reinit):
+    J = [J for J,h,ref in frames]
+    h = [h for J,h,ref in frames]
+    segs = acweFunctions_v6.run_acwe_batch(J,h,8,reinit=reinit)[0]
+    for seg,(J,h,ref) in zip(segs,frames):
+        assert np.array_equal(seg.astype(bool),ref.astype(bool))
+
+@pytest.mark.parametrize('interpolation,image,tolerance',
+                         [('Gaussian-decimate',0.02,0.01),
+                          ('Block-mean',0.15,0.02)])
+def test_integer_downsampling_matches_bicubic(frames,interpolation,image,
+                                              tolerance):
+    # At resize_param=8 the holes of a 1024x1024 image are too small to
+    # compare Block-mean, which does not smooth the image
+    for J,h,ref in frames:
+        passed,mismatch,difference,seg,ref_bicubic = \
+            acweFunctions_v6.check_interpolation(J,h,4,interpolation,
+                                                 tolerance=tolerance)
+        assert passed and difference[0] < image
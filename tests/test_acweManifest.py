@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Tests of the state transitions of the job manifest (acweManifest.py).
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+from ACWE_python_spring_2023 import acweManifest
+from ACWE_python_spring_2023.acweManifest import PENDING, RUNNING, DONE, \
+    FAILED, QUARANTINED
+
+def status(manifest):
+    return {f['file']:(f['status'],f['attempts'])
+            for f in manifest.frames()}
+
+def record(file,error=None):
+    return {'file':file,'status':'done' if error is None else 'failed',
+            'error':error}
+
+# In[2]
+# Tests
+def test_frames_move_through_each_status(tmp_path):
+    manifest = acweManifest.Manifest(str(tmp_path/'m.sqlite'),maxAttempts=2)
+    assert manifest.plan(['a','b','c'],done=lambda file: file == 'c') == \
+        {'a','b'}
+    assert status(manifest) == {'a':(PENDING,0),'b':(PENDING,0),
+                                'c':(DONE,0)}
+
+    manifest.start('a')
+    manifest.start('b')
+    assert status(manifest)['a'] == (RUNNING,1)
+    assert manifest.finish(record('a')) == DONE
+    assert manifest.finish(record('b','error 1')) == FAILED
+    assert manifest.todo() == ['b']
+
+    # A failed frame is retried until maxAttempts
+    manifest.start('b')
+    assert manifest.finish(record('b','error 2')) == QUARANTINED
+    assert manifest.todo() == []
+    assert manifest.frames(QUARANTINED)[0]['error'] == 'error 2'
+    assert manifest.summary() == {PENDING:0,RUNNING:0,DONE:2,FAILED:0,
+                                  QUARANTINED:1}
+
+    manifest.reset(status=QUARANTINED)
+    assert status(manifest) == {'a':(DONE,1),'b':(PENDING,0),'c':(DONE,0)}
+    assert manifest.plan(['a','b','c'],overwrite=True) == {'a','b','c'}
+    assert status(manifest)['a'] == (PENDING,0)
+
+def test_released_frames_do_not_count_an_attempt(tmp_path):
+    manifest = acweManifest.Manifest(str(tmp_path/'m.sqlite'))
+    manifest.add(['a'])
+    manifest.start('a')
+    manifest.release('a')
+    assert status(manifest) == {'a':(PENDING,0)}
+
+    # Only running frames are released
+    manifest.start('a')
+    manifest.finish(record('a'))
+    manifest.release('a')
+    assert status(manifest) == {'a':(DONE,1)}
+
+def test_frame_context_records_errors(tmp_path):
+    with acweManifest.Manifest(str(tmp_path/'m.sqlite')) as manifest:
+        manifest.add(['a','b'])
+        with manifest.frame('a',verbose=False):
+            pass
+        with manifest.frame('b',verbose=False):
+            raise ValueError('bad frame')
+        assert status(manifest) == {'a':(DONE,1),'b':(FAILED,1)}
+        assert 'bad frame' in manifest.frames(FAILED)[0]['error']
+
+def test_recover_quarantines_frames_that_crash_every_run(tmp_path):
+    manifest = acweManifest.Manifest(str(tmp_path/'m.sqlite'),maxAttempts=3)
+    manifest.add(['a','b'])
+    for run in range(3):
+        # Each run crashes while a is running
+        assert 'a' in manifest.plan(['a','b'])
+        manifest.start('a')
+    manifest.start('b')
+    manifest.recover()
+    assert status(manifest) == {'a':(QUARANTINED,3),'b':(PENDING,1)}
+    assert manifest.todo() == ['b']
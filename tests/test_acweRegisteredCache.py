@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Tests of the registered image cache (acweRegisteredCache.py), with
+    small arrays in place of registered images.
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import numpy as np
+from ACWE_python_spring_2023 import acweRegisteredCache
+
+def sources(folder,n):
+    # Source files, as .fits files would be
+    files = []
+    for i in range(n):
+        files.append(os.path.join(folder,'frame' + str(i) + '.fits'))
+        with open(files[-1],'w') as f:
+            f.write(str(i))
+    return files
+
+# In[2]
+# Tests
+def test_get_put_and_changed_source(tmp_path):
+    filename, = sources(str(tmp_path),1)
+    cache = acweRegisteredCache.RegisteredCache(str(tmp_path/'cache'),
+                                                calibration='test')
+    assert cache.get(filename) == (None,None)
+    I = np.arange(16.).reshape(4,4)
+    cache.put(filename,I,{'LVL_NUM':1.5})
+    J,H = cache.get(filename)
+    assert np.array_equal(I,J) and H == {'LVL_NUM':1.5}
+
+    # Downloaded again, or another calibration
+    os.utime(filename,ns=(1,1))
+    assert cache.get(filename) == (None,None)
+    cache.put(filename,I,{'LVL_NUM':1.5})
+    other = acweRegisteredCache.RegisteredCache(str(tmp_path/'cache'),
+                                                calibration='other')
+    assert other.get(filename) == (None,None)
+
+def test_put_lists_the_cache_only_when_needed(tmp_path,monkeypatch):
+    files = sources(str(tmp_path),20)
+    cache = acweRegisteredCache.RegisteredCache(str(tmp_path/'cache'),1e9,
+                                                'test',scanEvery=8)
+    scans = []
+    entries = cache.entries
+    monkeypatch.setattr(cache,'entries',lambda: scans.append(1) or entries())
+    for filename in files:
+        cache.put(filename,np.zeros((8,8)),{})
+    assert len(scans) == 3 # first put, then every 8 puts
+    assert cache.size() == cache._size
+
+def test_full_cache_is_evicted_at_once(tmp_path):
+    files = sources(str(tmp_path),6)
+    I = np.zeros((32,32)) # 8 kB
+    cache = acweRegisteredCache.RegisteredCache(str(tmp_path/'cache'),
+                                                3.5*I.nbytes,'test',
+                                                scanEvery=100)
+    for i,filename in enumerate(files):
+        cache.put(filename,I,{})
+        os.utime(cache._paths(cache.key(filename))[0],(i,i))
+        assert cache.size() <= cache.maxBytes
+    assert [cache.get(f)[0] is not None for f in files] == \
+        [False,False,False,True,True,True]
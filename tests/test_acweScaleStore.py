@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Description:
+    Tests of the preprocessed image store (acweScaleStore.py) on synthetic
+    images (see acweSynthetic.py).
+
+Created on Sat Oct 17 2026
+
+@author: jgra
+"""
+
+# In[1]
+# Import Libraries and tools
+import os
+import numpy as np
+from ACWE_python_spring_2023 import acweScaleStore, acweSynthetic
+
+# In[2]
+# Tests
+def test_changed_source_is_built_again(tmp_path):
+    J,h,truth = acweSynthetic.synthetic_disk(512)
+    source = str(tmp_path/'frame.fits')
+    with open(source,'w') as f:
+        f.write('version 1')
+    loads = []
+    def load():
+        loads.append(1)
+        return J,h
+
+    store = acweScaleStore.ScaleStore(str(tmp_path/'store'),
+                                      calibration='test 1')
+    frame = store.get('a/frame.fits',[2,4],load,source=source)
+    assert frame.resize_params == [2,4] and len(loads) == 1
+    store.get('a/frame.fits',[4],load,source=source)
+    assert len(loads) == 1
+
+    # Downloaded again
+    with open(source,'w') as f:
+        f.write('version 2, a new file')
+    os.utime(source,ns=(1,1))
+    assert store.open('a/frame.fits',[4],source) is None
+    frame = store.get('a/frame.fits',[4],load,source=source)
+    assert frame.resize_params == [4] and len(loads) == 2
+
+    # New calibration
+    store = acweScaleStore.ScaleStore(str(tmp_path/'store'),
+                                      calibration='test 2')
+    assert store.open('a/frame.fits',[4],source) is None
+    assert store.open('a/frame.fits',[4]) is not None
+    frame = store.get('a/frame.fits',[4],load,source=source)
+    assert len(loads) == 3
+    assert np.isfinite(frame.image(4)).any()